@@ -0,0 +1,109 @@
+import contextlib
+
+from config_logs.logger import setup_logger
+from find_coins import fast_json
+from find_coins.DataFetcher import DataFetcher
+from find_coins.DataProcessor import DataProcessor
+from find_coins.KlineStore import KlineStore
+from find_coins.SymbolStore import SymbolStore
+from simulation.historical_trade_simulator import HistoricalTradeSimulator
+from simulation.real_time_trade_simulator import RealTimeTradeSimulator
+from .generators import make_symbols, make_klines, make_symbol_dates, make_trade_messages, write_agg_trades_archive, EPOCH
+from .runner import benchmark
+
+# Requests to the fake server are real HTTP round trips, so the network benchmarks stop at 1k
+NETWORK_SCALES = (10, 1000)
+START_DATE = '1 Jan, 2017'
+# Far above anything the synthetic prices reach, so simulations run through all of their input
+UNREACHABLE_TARGET = 1e12
+
+
+class _StaticKlinesClient:
+    """
+    Serves pre-generated historical klines, so the simulation is timed without the download.
+    """
+
+    def __init__(self, klines):
+        self.klines = klines
+
+    def get_historical_klines(self, symbol, interval, start_str):
+        return self.klines
+
+
+@benchmark('fetch_all_klines', NETWORK_SCALES)
+def fetch_all_klines(scale, context):
+    fetcher = DataFetcher(
+        kline_store=KlineStore(context.path('klines')),
+        symbol_store=SymbolStore(context.path('symbols.db')),
+        client=context.client(),
+    )
+    symbols = [(symbol, symbol[:-4], 'USDT') for symbol in make_symbols(scale)]
+    return lambda: fetcher.fetch_all_klines(symbols, START_DATE)
+
+
+@benchmark('sort_and_prepare_data')
+def sort_and_prepare_data(scale, context):
+    new_symbol_dates = make_symbol_dates(scale)
+    return lambda: DataProcessor.sort_and_prepare_data(new_symbol_dates)
+
+
+@benchmark('append_data_to_symbols')
+def append_data_to_symbols(scale, context):
+    # A file of scale listings that a batch of scale new listings is merged into
+    symbols_path = context.path('symbols.json')
+    fast_json.dump(DataProcessor.sort_and_prepare_data(make_symbol_dates(scale, seed=1)), symbols_path)
+    new_data = DataProcessor.sort_and_prepare_data(make_symbol_dates(scale, seed=2))
+    return lambda: DataProcessor.append_data_to_symbols(new_data, symbols_path)
+
+
+@benchmark('historical_simulate_trade')
+def historical_simulate_trade(scale, context):
+    client = _StaticKlinesClient(make_klines(scale))
+    simulator = HistoricalTradeSimulator(client, setup_logger(), 'C000000USDT', START_DATE, 100, UNREACHABLE_TARGET)
+    return simulator.simulate_trade
+
+
+@benchmark('historical_agg_trades')
+def historical_agg_trades(scale, context):
+    # The same simulation replayed trade by trade from a monthly archive, decoded and parsed on every run
+    root = context.path('agg_trades')
+    write_agg_trades_archive(root, 'C000000USDT', scale)
+    simulator = HistoricalTradeSimulator(None, setup_logger(), 'C000000USDT', EPOCH, 100, UNREACHABLE_TARGET, trades_root=root)
+    return simulator.simulate_trade
+
+
+def _realtime_simulator(client=None, hub=None):
+    simulator = RealTimeTradeSimulator(client, setup_logger(), 'C000000USDT', UNREACHABLE_TARGET, 100, hub=hub, tick_interval=1.0)
+    simulator._buy(100.0)
+    return simulator
+
+
+@benchmark('realtime_process_message')
+def realtime_process_message(scale, context):
+    # Any hub skips the socket manager; the messages are fed in directly
+    simulator = _realtime_simulator(hub=object())
+    messages = make_trade_messages('C000000USDT', scale)
+
+    async def run():
+        for msg in messages:
+            await simulator.process_message(msg)
+    return run
+
+
+@benchmark('realtime_socket', NETWORK_SCALES)
+def realtime_socket(scale, context):
+    # The same per-message path, with the messages received and decoded from the fake server's trade stream
+    simulator = _realtime_simulator(client=context.client())
+    simulator.bm.STREAM_URL = context.server.stream_url
+
+    async def run():
+        socket = simulator.bm.trade_socket(simulator.symbol)
+        await socket.__aenter__()
+        try:
+            for _ in range(scale):
+                await simulator.process_message(await socket.recv())
+        finally:
+            # python-binance 1.0.19 calls a method that newer websockets releases no longer have on close
+            with contextlib.suppress(AttributeError):
+                await socket.__aexit__(None, None, None)
+    return run
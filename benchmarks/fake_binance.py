@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+from aiohttp import web
+
+from find_coins import fast_json
+from find_coins.BinanceClient import RateLimitedClient
+from .generators import make_symbols, make_exchange_info, make_klines, make_trade_messages, listing_time, HOUR, DAY
+
+INTERVALS = {'1h': HOUR, '1d': DAY, '1M': 30 * DAY}
+
+
+class FakeBinanceServer:
+    """
+    A local stand-in for the Binance REST and WebSocket APIs that serves synthetic data.
+
+    It runs an aiohttp server on its own event loop in a background thread, so both blocking and
+    asyncio clients can use it. Klines start at a deterministic listing time per symbol, and every
+    trade stream sends trades_per_stream messages before it goes quiet.
+
+    Attributes:
+        symbols (list): The symbols listed in exchangeInfo.
+        trades_per_stream (int): The number of trade messages sent on each stream connection.
+        api_url (str): The base REST URL, set once the server is started.
+        stream_url (str): The base WebSocket URL, set once the server is started.
+
+    Methods:
+        start(): Starts serving in the background.
+        stop(): Stops the server.
+        client(cls, **kwargs): Returns a client of cls that talks to this server.
+    """
+
+    def __init__(self, symbols=100, trades_per_stream=1000, host='127.0.0.1'):
+        self.symbols = make_symbols(symbols) if isinstance(symbols, int) else list(symbols)
+        self.trades_per_stream = trades_per_stream
+        self.host = host
+        self.api_url = None
+        self.stream_url = None
+        self._exchange_info = fast_json.dumps(make_exchange_info(self.symbols))
+        self._loop = None
+        self._thread = None
+        self._sockets = set()
+
+    def _app(self):
+        app = web.Application()
+        app.router.add_get('/api/v3/ping', self._ping)
+        app.router.add_get('/api/v3/exchangeInfo', self._exchange_info_handler)
+        app.router.add_get('/api/v3/klines', self._klines)
+        app.router.add_get('/api/v3/ticker/price', self._ticker_price)
+        app.router.add_get('/ws/{stream}', self._stream)
+        return app
+
+    @staticmethod
+    def _json(body):
+        return web.Response(text=body if isinstance(body, str) else fast_json.dumps(body), content_type='application/json')
+
+    async def _ping(self, request):
+        return self._json({})
+
+    async def _exchange_info_handler(self, request):
+        if 'symbols' in request.query:
+            symbols = set(fast_json.loads(request.query['symbols']))
+            return self._json(make_exchange_info([symbol for symbol in self.symbols if symbol in symbols]))
+        return self._json(self._exchange_info)
+
+    async def _klines(self, request):
+        query = request.query
+        symbol = query['symbol']
+        interval = INTERVALS[query['interval']]
+        listed = listing_time(symbol)
+        start = int(query.get('startTime', listed))
+        end = int(query.get('endTime', time.time() * 1000))
+        limit = min(int(query.get('limit', 500)), 1000)
+        # The first kline at or after start, on the grid of the symbol's listing time
+        first = listed if start <= listed else listed + -(-(start - listed) // interval) * interval
+        count = max(0, min(limit, (end - first) // interval + 1))
+        return self._json(make_klines(count, first, interval, seed=first))
+
+    async def _ticker_price(self, request):
+        if 'symbol' in request.query:
+            return self._json({'symbol': request.query['symbol'], 'price': '100.00000000'})
+        return self._json([{'symbol': symbol, 'price': '100.00000000'} for symbol in self.symbols])
+
+    async def _stream(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        symbol = request.match_info['stream'].split('@', 1)[0].upper()
+        try:
+            for msg in make_trade_messages(symbol, self.trades_per_stream):
+                await ws.send_str(fast_json.dumps(msg))
+            # Keep the connection open until the client is done with it
+            async for _ in ws:
+                pass
+        finally:
+            self._sockets.discard(ws)
+        return ws
+
+    async def _shutdown(self, runner):
+        # Streams left open by clients would otherwise hold up the cleanup until it times out
+        for ws in list(self._sockets):
+            await ws.close()
+        await runner.cleanup()
+
+    def _serve(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        runner = web.AppRunner(self._app())
+        self._loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, self.host, 0)
+        self._loop.run_until_complete(site.start())
+        port = runner.addresses[0][1]
+        self.api_url = f"http://{self.host}:{port}/api"
+        self.stream_url = f"ws://{self.host}:{port}/"
+        ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._shutdown(runner))
+            self._loop.close()
+
+    def start(self):
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def client(self, cls=RateLimitedClient, **kwargs):
+        # The API URL is a class attribute that the client constructor pings, so it is set on a subclass
+        return type(cls.__name__, (cls,), {'API_URL': self.api_url})(**kwargs)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
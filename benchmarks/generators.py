@@ -0,0 +1,110 @@
+import os
+import random
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+HOUR = 3600000
+DAY = 24 * HOUR
+# Synthetic listings are spread over the days after this time
+EPOCH = 1500000000000
+
+
+def make_symbols(count):
+    return [f"C{index:06d}USDT" for index in range(count)]
+
+
+def listing_time(symbol):
+    """
+    Returns a deterministic listing time for a synthetic symbol, at midnight of one of the 2000 days after EPOCH.
+    """
+    return EPOCH - EPOCH % DAY + (sum(map(ord, symbol)) * 7919 % 2000) * DAY
+
+
+def make_klines(count, start=EPOCH, interval=HOUR, price=100.0, seed=0):
+    """
+    Generates raw klines as the Binance API returns them: 12 values with prices as strings.
+    """
+    rng = random.Random(seed)
+    klines = []
+    for index in range(count):
+        open_time = start + index * interval
+        close = max(price * (1 + rng.gauss(0, 0.01)), 1e-8)
+        high = max(price, close) * (1 + abs(rng.gauss(0, 0.005)))
+        low = min(price, close) * (1 - abs(rng.gauss(0, 0.005)))
+        klines.append([
+            open_time, f"{price:.8f}", f"{high:.8f}", f"{low:.8f}", f"{close:.8f}", f"{rng.uniform(1, 1000):.8f}",
+            open_time + interval - 1, "0", 100, "0", "0", "0",
+        ])
+        price = close
+    return klines
+
+
+def make_exchange_info(symbols):
+    return {
+        'timezone': 'UTC',
+        'serverTime': EPOCH,
+        'rateLimits': [],
+        'symbols': [
+            {
+                'symbol': symbol,
+                'status': 'TRADING',
+                'baseAsset': symbol[:-4],
+                'quoteAsset': 'USDT',
+                'baseAssetPrecision': 8,
+                'quotePrecision': 8,
+                'orderTypes': ['LIMIT', 'MARKET'],
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'minPrice': '0.00000100', 'maxPrice': '100000.00000000', 'tickSize': '0.00000100'},
+                    {'filterType': 'LOT_SIZE', 'minQty': '0.00100000', 'maxQty': '100000.00000000', 'stepSize': '0.00100000'},
+                ],
+            }
+            for symbol in symbols
+        ],
+    }
+
+
+def make_symbol_dates(count, seed=0):
+    """
+    Generates fetched first klines in the shape DataProcessor.sort_and_prepare_data takes, in random date order.
+    """
+    rng = random.Random(seed)
+    start = datetime(2017, 1, 1)
+    return [
+        ((symbol, symbol[:-4], 'USDT'), start + timedelta(hours=rng.randrange(24 * 365 * 6)), 1.0, 1.5, 0.5, 1.25)
+        for symbol in make_symbols(count)
+    ]
+
+
+def make_trade_messages(symbol, count, price=100.0, seed=0):
+    """
+    Generates trade stream messages around price.
+    """
+    rng = random.Random(seed)
+    messages = []
+    for index in range(count):
+        price = max(price * (1 + rng.gauss(0, 0.0005)), 1e-8)
+        messages.append({
+            'e': 'trade', 'E': EPOCH + index, 's': symbol, 't': index, 'p': f"{price:.8f}", 'q': '1.00000000',
+            'T': EPOCH + index, 'm': False, 'M': True,
+        })
+    return messages
+
+
+def write_agg_trades_archive(root, symbol, count, start=EPOCH, price=100.0, seed=0):
+    """
+    Writes count aggregate trades around price from start as a monthly archive in the data.binance.vision format.
+
+    Returns:
+        str: The path of the archive, root/SYMBOL/SYMBOL-aggTrades-YYYY-MM.zip.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        price = max(price * (1 + rng.gauss(0, 0.0005)), 1e-8)
+        rows.append(f"{index},{price:.8f},1.00000000,{index},{index},{start + index},{'True' if index % 2 else 'False'},True\n")
+    name = f"{symbol}-aggTrades-{datetime.fromtimestamp(start / 1000, timezone.utc):%Y-%m}"
+    os.makedirs(os.path.join(root, symbol), exist_ok=True)
+    path = os.path.join(root, symbol, name + '.zip')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(name + '.csv', ''.join(rows))
+    return path
@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import inspect
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+
+from config_logs.logger import setup_logger
+from find_coins import fast_json
+from find_coins.RateLimiter import WeightRateLimiter
+from .fake_binance import FakeBinanceServer
+
+SCALES = (10, 1000, 100000)
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+BENCHMARKS = {}
+
+
+class Benchmark:
+    """
+    A registered benchmark: a setup function that builds fresh inputs and returns the call to time.
+
+    Attributes:
+        name (str): The name results are recorded under.
+        scales (tuple): The input sizes the benchmark runs at.
+        setup (callable): Takes the scale and a BenchmarkContext and returns a function or coroutine function to time.
+    """
+
+    def __init__(self, name, scales, setup):
+        self.name = name
+        self.scales = scales
+        self.setup = setup
+
+
+def benchmark(name, scales=SCALES):
+    """
+    Registers a setup function as a benchmark.
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = Benchmark(name, scales, setup)
+        return setup
+    return decorator
+
+
+class BenchmarkContext:
+    """
+    Resources shared by the benchmarks of one run: a scratch directory and a lazily started fake Binance server.
+
+    Attributes:
+        root (str): A temporary directory removed when the run ends.
+        server (FakeBinanceServer): The fake server, started on first use.
+
+    Methods:
+        path(*parts): Returns a path in a fresh directory under root.
+        client(cls, **kwargs): Returns a client of the fake server that is never throttled.
+        close(): Stops the server and removes root.
+    """
+
+    def __init__(self, symbols=1000, trades_per_stream=1000):
+        self.root = tempfile.mkdtemp(prefix='coin_searcher_bench_')
+        self._symbols = symbols
+        self._trades_per_stream = trades_per_stream
+        self._paths = 0
+
+    @cached_property
+    def server(self):
+        return FakeBinanceServer(self._symbols, self._trades_per_stream).start()
+
+    def path(self, *parts):
+        self._paths += 1
+        directory = os.path.join(self.root, str(self._paths))
+        os.makedirs(directory)
+        return os.path.join(directory, *parts)
+
+    def client(self, cls=None, **kwargs):
+        # The shared limiter would throttle thousands of local requests, so each client gets an unbounded one
+        kwargs.setdefault('rate_limiter', WeightRateLimiter(capacity=10 ** 9))
+        if cls is None:
+            return self.server.client(**kwargs)
+        return self.server.client(cls, **kwargs)
+
+    def close(self):
+        if 'server' in self.__dict__:
+            self.server.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _time_once(run):
+    if inspect.iscoroutinefunction(run):
+        async def timed():
+            start = time.perf_counter_ns()
+            await run()
+            return time.perf_counter_ns() - start
+        return asyncio.run(timed())
+    start = time.perf_counter_ns()
+    run()
+    return time.perf_counter_ns() - start
+
+
+def run_benchmark(bench, scale, context, repeat):
+    """
+    Times a benchmark at one scale. Inputs are rebuilt before every repeat and only the returned call is timed.
+
+    Returns:
+        dict: The timings in nanoseconds and the throughput in items per second.
+    """
+    times = [_time_once(bench.setup(scale, context)) for _ in range(repeat)]
+    best = min(times)
+    return {
+        'name': bench.name,
+        'scale': scale,
+        'repeat': repeat,
+        'min_ns': best,
+        'median_ns': int(statistics.median(times)),
+        'mean_ns': int(statistics.fmean(times)),
+        'items_per_second': scale * 1e9 / best if best else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(names=None, scales=None, repeat=3):
+    """
+    Runs the registered benchmarks and returns the results document.
+
+    Args:
+        names (list): Substrings selecting benchmarks by name, every benchmark by default.
+        scales (list): The scales to run, limited to those each benchmark supports.
+        repeat (int): The number of timed runs per benchmark and scale.
+
+    Returns:
+        dict: The run metadata under 'meta' and one entry per benchmark and scale under 'results'.
+    """
+    # Imported for its registrations
+    from . import cases  # noqa: F401
+
+    # Per-symbol and per-message logging would dominate the timings
+    logger = setup_logger()
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    results = []
+    try:
+        with BenchmarkContext() as context:
+            for bench in BENCHMARKS.values():
+                if names and not any(name in bench.name for name in names):
+                    continue
+                for scale in bench.scales:
+                    if scales and scale not in scales:
+                        continue
+                    result = run_benchmark(bench, scale, context, repeat)
+                    print(f"{bench.name:<32} {scale:>7} {result['min_ns'] / 1e6:>12.3f} ms {result['items_per_second']:>14.0f} items/s", flush=True)
+                    results.append(result)
+    finally:
+        logger.setLevel(level)
+    meta = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'commit': _git_commit(),
+        'json_backend': fast_json.BACKEND,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare(current, baseline, threshold):
+    """
+    Prints the ratio of each current minimum time to its baseline and returns the regressions past threshold.
+
+    Returns:
+        list: (name, scale, ratio) for every benchmark slower than the baseline by more than threshold.
+    """
+    previous = {(result['name'], result['scale']): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get((result['name'], result['scale']))
+        if old is None or not old['min_ns']:
+            continue
+        ratio = result['min_ns'] / old['min_ns']
+        print(f"{result['name']:<32} {result['scale']:>7} {ratio:>8.2f}x")
+        if ratio > 1 + threshold:
+            regressions.append((result['name'], result['scale'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks the fetch, process and simulate hot paths.')
+    parser.add_argument('--filter', action='append', help='Only run benchmarks whose name contains this; may be repeated.')
+    parser.add_argument('--scale', type=int, action='append', help='Only run at this scale; may be repeated.')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark and scale.')
+    parser.add_argument('--output', help='Where to write the JSON results, benchmarks/results/<timestamp>.json by default.')
+    parser.add_argument('--compare', help='A previous results file to compare against.')
+    parser.add_argument('--threshold', type=float, default=0.2, help='The slowdown over the baseline that fails the run.')
+    args = parser.parse_args(argv)
+
+    document = run_suite(args.filter, args.scale, args.repeat)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    fast_json.dump(document, output)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        regressions = compare(document, fast_json.load(args.compare), args.threshold)
+        for name, scale, ratio in regressions:
+            print(f"Regression: {name} at {scale} is {ratio:.2f}x slower than the baseline", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
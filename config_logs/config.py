@@ -8,6 +8,45 @@ BINANCE_API_KEY = os.getenv('BINANCE_API_KEY')
 BINANCE_API_SECRET = os.getenv('BINANCE_API_SECRET')
 FETCHED_SYMBOLS_PATH = os.getenv('FETCHED_SYMBOLS_PATH')
 SYMBOLS_PATH = os.getenv('SYMBOLS_PATH')
+SYMBOL_DB_PATH = os.getenv('SYMBOL_DB_PATH')
+KLINE_STORE_PATH = os.getenv('KLINE_STORE_PATH', 'data/klines')
+KLINE_BASE_INTERVAL = os.getenv('KLINE_BASE_INTERVAL', '1h') or None
+KLINE_CACHE_SIZE = int(os.getenv('KLINE_CACHE_SIZE', 256))
+ARCHIVE_PATH = os.getenv('ARCHIVE_PATH')
+ARCHIVE_PROCESSES = int(os.getenv('ARCHIVE_PROCESSES', 0))
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+FETCH_MODE = os.getenv('FETCH_MODE', 'threads')
+FETCH_CONCURRENCY = int(os.getenv('FETCH_CONCURRENCY', 50))
+FETCH_FLUSH_SIZE = int(os.getenv('FETCH_FLUSH_SIZE', 100))
+FETCH_JOB_PATH = os.getenv('FETCH_JOB_PATH')
+FETCH_MAX_ATTEMPTS = int(os.getenv('FETCH_MAX_ATTEMPTS', 3))
+UNIVERSE_CACHE_PATH = os.getenv('UNIVERSE_CACHE_PATH', 'data/universe.json')
+UNIVERSE_CACHE_TTL = float(os.getenv('UNIVERSE_CACHE_TTL', 3600))
+UNIVERSE_STATUSES = [status for status in os.getenv('UNIVERSE_STATUSES', 'TRADING').split(',') if status]
+UNIVERSE_QUOTE_ASSETS = [quote for quote in os.getenv('UNIVERSE_QUOTE_ASSETS', '').split(',') if quote]
+UNIVERSE_PERMISSIONS = [permission for permission in os.getenv('UNIVERSE_PERMISSIONS', '').split(',') if permission]
+UNIVERSE_MAX_MIN_NOTIONAL = float(os.getenv('UNIVERSE_MAX_MIN_NOTIONAL', 0))
+REQUEST_WEIGHT_LIMIT = int(os.getenv('REQUEST_WEIGHT_LIMIT', 6000))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv('RATE_LIMIT_MAX_RETRIES', 5))
+RUN_MODE = os.getenv('RUN_MODE', 'simulate')
+SWEEP_RESULTS_PATH = os.getenv('SWEEP_RESULTS_PATH', 'sweep_results.csv')
+PORTFOLIO_EQUITY_PATH = os.getenv('PORTFOLIO_EQUITY_PATH', 'portfolio_equity.csv')
+PORTFOLIO_TRADES_PATH = os.getenv('PORTFOLIO_TRADES_PATH', 'portfolio_trades.csv')
+STREAMS_PER_CONNECTION = int(os.getenv('STREAMS_PER_CONNECTION', 1024))
+REALTIME_FEED = os.getenv('REALTIME_FEED', 'trade')
+PRICE_TICK_INTERVAL = float(os.getenv('PRICE_TICK_INTERVAL', 1))
+STREAM_RECORD_PATH = os.getenv('STREAM_RECORD_PATH')
+EXIT_STRATEGY = os.getenv('EXIT_STRATEGY')
+AGG_TRADES_PATH = os.getenv('AGG_TRADES_PATH')
+LISTING_POLL_INTERVAL = float(os.getenv('LISTING_POLL_INTERVAL', 5))
+WATCH_SIMULATE = os.getenv('WATCH_SIMULATE', 'false').lower() == 'true'
+SCAN_RANK_BY = os.getenv('SCAN_RANK_BY')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_DUMP_PATH = os.getenv('METRICS_DUMP_PATH')
+METRICS_DUMP_INTERVAL = float(os.getenv('METRICS_DUMP_INTERVAL', 60))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_SAMPLE_RATE = int(os.getenv('LOG_SAMPLE_RATE', 20))
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
 
 def load_configuration():
     # Load environment variables from .env file
@@ -19,4 +58,20 @@ def load_configuration():
     target_price = 1200
     num_coins = 3
 
-    return coins_list, start_time, amount_usd, target_price, num_coins
\ No newline at end of file
+    return coins_list, start_time, amount_usd, target_price, num_coins
+
+def _parse_grid(value, cast):
+    if not value:
+        return None
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+def load_sweep_configuration():
+    # Grids default to the single scenario of load_configuration
+    coins_list, start_time, amount_usd, target_price, num_coins = load_configuration()
+
+    start_times = _parse_grid(os.getenv('SWEEP_START_TIMES'), str) or [start_time]
+    amounts = _parse_grid(os.getenv('SWEEP_AMOUNTS'), float) or [amount_usd]
+    target_prices = _parse_grid(os.getenv('SWEEP_TARGET_PRICES'), float) or [target_price]
+    num_coins_grid = _parse_grid(os.getenv('SWEEP_NUM_COINS'), int) or [num_coins]
+
+    return coins_list, start_times, amounts, target_prices, num_coins_grid
\ No newline at end of file
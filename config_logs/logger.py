@@ -1,6 +1,128 @@
 import os
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+from config_logs.config import LOG_QUEUE_SIZE, LOG_SAMPLE_RATE, LOG_FORMAT
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line, for log shippers that parse structured lines.
+    """
+
+    def format(self, record):
+        # Tracebacks are already merged into the message when the record is queued
+        return json.dumps({
+            'time': self.formatTime(record, self.datefmt),
+            'logger': record.name,
+            'level': record.levelname,
+            'message': record.getMessage(),
+        })
+
+
+# Passed as extra= by the high-frequency call sites that may be sampled, such as per-trade price updates
+SAMPLED = {'sampled': True}
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through at most rate records per second from each call site that opts in with extra=SAMPLED.
+
+    Only records marked as sampled are thinned out before they reach the queue; every other record,
+    trade results included, always passes, as do warnings and errors. The first record a site lets
+    through in a new second reports how many of its records were suppressed in the last one. A rate
+    of 0 lets everything through.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self._windows = {}
+        # The filter runs on every thread that logs
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate <= 0 or record.levelno >= logging.WARNING or not getattr(record, 'sampled', False):
+            return True
+        site = (record.pathname, record.lineno)
+        second = int(record.created)
+        suppressed = 0
+        with self._lock:
+            window, count = self._windows.get(site, (second, 0))
+            if window != second:
+                suppressed = max(count - self.rate, 0)
+                window, count = second, 0
+            self._windows[site] = (window, count + 1)
+        if count >= self.rate:
+            return False
+        if suppressed:
+            record.msg, record.args = f"{record.getMessage()} ({suppressed} similar records suppressed)", None
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    A QueueHandler over a bounded queue that never blocks the caller for records below WARNING.
+
+    When the writer thread falls behind and the queue is full, such records are dropped and counted,
+    and the count is logged once there is room again. Warnings and errors wait for space instead.
+
+    Attributes:
+        dropped (int): The number of records dropped since the last report.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def _report_dropped(self):
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            record = logging.LogRecord('coin_searcher', logging.WARNING, __file__, 0,
+                                       f"Dropped {dropped} log records while the log queue was full", None, None)
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += dropped
+
+    def enqueue(self, record):
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        self._report_dropped()
+
+
+def _file_handlers():
+    # Create logs directory if it doesn't exist
+    if not os.path.exists('logs'):
+        os.makedirs('logs')
+
+    # Delete error log file from previous run
+    if os.path.exists('logs/coin_searcher_info.log'):
+        os.remove('logs/coin_searcher_info.log')
+
+    # File handler for info with a maximum file size of 1MB
+    f_handler_info = RotatingFileHandler('logs/coin_searcher_info.log', maxBytes=1*1024*1024, backupCount=1)
+    # File handler for errors with no size limit
+    f_handler_error = logging.FileHandler('logs/coin_searcher_error.log')
+
+    f_handler_info.setLevel(logging.INFO)  # Set level for info file handler
+    f_handler_error.setLevel(logging.ERROR)  # Set level for error file handler
+    return f_handler_info, f_handler_error
+
 
 def setup_logger():
     # Create a custom logger
@@ -13,33 +135,26 @@ def setup_logger():
 
         # Create handlers
         c_handler = logging.StreamHandler()  # Console handler
-
-        # Create logs directory if it doesn't exist
-        if not os.path.exists('logs'):
-            os.makedirs('logs')
-
-        # Delete error log file from previous run
-        if os.path.exists('logs/coin_searcher_info.log'):
-            os.remove('logs/coin_searcher_info.log')
-
-        # File handler for info with a maximum file size of 1MB
-        f_handler_info = RotatingFileHandler('logs/coin_searcher_info.log', maxBytes=1*1024*1024, backupCount=1)
-        # File handler for errors with no size limit
-        f_handler_error = logging.FileHandler('logs/coin_searcher_error.log')
-        
         c_handler.setLevel(logging.INFO)  # Set level for console handler
-        f_handler_info.setLevel(logging.INFO)  # Set level for info file handler
-        f_handler_error.setLevel(logging.ERROR)  # Set level for error file handler
+        handlers = (c_handler,) + _file_handlers()
 
         # Create formatters and add them to handlers
-        format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-        c_handler.setFormatter(format)
-        f_handler_info.setFormatter(format)
-        f_handler_error.setFormatter(format)
+        if LOG_FORMAT == 'json':
+            format = JsonFormatter(datefmt='%Y-%m-%dT%H:%M:%S')
+        else:
+            format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+        for handler in handlers:
+            handler.setFormatter(format)
+
+        # The terminal and files are written by a dedicated thread, so logging calls only enqueue a record
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        # Flush what is still queued when the process exits
+        atexit.register(listener.stop)
 
-        # Add handlers to the logger
-        logger.addHandler(c_handler)
-        logger.addHandler(f_handler_info)
-        logger.addHandler(f_handler_error)
+        queue_handler = DroppingQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+        logger.addHandler(queue_handler)
 
-    return logger
\ No newline at end of file
+    return logger
@@ -0,0 +1,229 @@
+import concurrent.futures
+import hashlib
+import collections
+import io
+import os
+import re
+import warnings
+import zipfile
+
+import numpy as np
+
+from config_logs.config import ARCHIVE_PROCESSES
+from config_logs.logger import setup_logger
+from .Klines import Klines, KLINE_DTYPE
+from .Metrics import metrics
+
+PERIODS = ('monthly', 'daily')
+# Spot archives switched from millisecond to microsecond timestamps in 2025; no millisecond time reaches this
+MICROSECOND_THRESHOLD = 10 ** 14
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_files = metrics.counter('archive_files_imported_total')
+_klines = metrics.counter('archive_klines_imported_total')
+
+
+class ChecksumError(ValueError):
+    """
+    Raised when an archive does not match the SHA-256 digest of its .CHECKSUM file.
+    """
+
+
+def verify_checksum(path):
+    """
+    Checks an archive against the 'path.CHECKSUM' file published next to it, if there is one.
+
+    Returns:
+        bool: Whether a checksum was verified; False if the archive has no checksum file.
+    """
+    checksum_path = path + '.CHECKSUM'
+    if not os.path.exists(checksum_path):
+        return False
+    with open(checksum_path) as f:
+        expected = f.read().split()[0].lower()
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    if digest.hexdigest() != expected:
+        raise ChecksumError(f"Checksum mismatch for {path}")
+    return True
+
+
+def parse_archive(path):
+    """
+    Verifies and parses one kline archive into a KLINE_DTYPE array, with times in milliseconds.
+
+    This runs in the worker processes, so it is a module function that only takes and returns picklable values.
+    """
+    verify_checksum(path)
+    with zipfile.ZipFile(path) as archive:
+        text = archive.read(archive.namelist()[0])
+    if text[:1] and not text[:1].isdigit():
+        # Some archives start with a header row
+        text = text[text.find(b'\n') + 1:]
+    with warnings.catch_warnings():
+        # An empty archive is not worth a warning
+        warnings.simplefilter('ignore', UserWarning)
+        data = np.loadtxt(io.BytesIO(text), delimiter=',', usecols=range(len(KLINE_DTYPE)), dtype=KLINE_DTYPE, ndmin=1)
+    for name in ('open_time', 'close_time'):
+        times = data[name]
+        microseconds = times >= MICROSECOND_THRESHOLD
+        if microseconds.any():
+            times[microseconds] //= 1000
+    return data
+
+
+def _load(path):
+    # Errors are returned rather than raised, so one bad archive does not end the whole pool's map
+    try:
+        return parse_archive(path), None
+    except Exception as e:
+        return None, e
+
+
+class ArchiveImporter:
+    """
+    A class for backfilling the kline store from the public Binance kline archives instead of paged REST calls.
+
+    Archives are read from a local copy of the data.binance.vision layout,
+    root/{monthly,daily}/klines/SYMBOL/INTERVAL/SYMBOL-INTERVAL-PERIOD.zip, where root is
+    e.g. '.../data/spot'. Monthly archives are used where they exist and daily archives fill in
+    the months that have none. The archives are verified and parsed on a process pool, symbol
+    by symbol, with at most window symbols submitted and not yet merged, so memory stays bounded
+    while the main process merges a symbol and syncs it over REST. Only the gap after the last
+    archived kline is then requested over REST.
+
+    A symbol's archives are imported up to the first one that fails its checksum or cannot be
+    parsed. If the store already holds klines that do not meet the archived range, the klines in
+    between are requested over REST, and the archives are not merged when they cannot be, so the
+    store never has a hole in the middle.
+
+    Attributes:
+        kline_store (KlineStore): The store the archives are merged into.
+        root (str): The directory holding the 'monthly' and 'daily' archive trees.
+        processes (int): The number of worker processes; 1 parses in the calling process.
+        window (int): The number of symbols whose archives may be in flight at once.
+
+    Methods:
+        symbols(interval): Returns the symbols that have archives of an interval.
+        archive_files(symbol, interval): Returns the archives of a series in time order.
+        import_symbols(symbols, interval, client): Imports the archives of many symbols and fills the recent gap.
+    """
+
+    def __init__(self, kline_store, root, processes=ARCHIVE_PROCESSES, window=None):
+        self.logger = setup_logger()
+        self.kline_store = kline_store
+        self.root = root
+        self.processes = processes or os.cpu_count()
+        # Enough symbols ahead to keep every worker busy while the main process merges and syncs
+        self.window = window or 2 * self.processes
+
+    def _directory(self, period, symbol=None, interval=None):
+        return os.path.join(self.root, period, 'klines', *(part for part in (symbol, interval) if part))
+
+    def symbols(self, interval):
+        symbols = set()
+        for period in PERIODS:
+            directory = self._directory(period)
+            if os.path.isdir(directory):
+                symbols.update(symbol for symbol in os.listdir(directory) if os.path.isdir(self._directory(period, symbol, interval)))
+        return sorted(symbols)
+
+    def archive_files(self, symbol, interval):
+        pattern = re.compile(rf'^{re.escape(symbol)}-{re.escape(interval)}-(\d{{4}}-\d{{2}}(?:-\d{{2}})?)\.zip$')
+        found = {}
+        for period in PERIODS:
+            directory = self._directory(period, symbol, interval)
+            if os.path.isdir(directory):
+                for name in os.listdir(directory):
+                    match = pattern.match(name)
+                    if match is not None:
+                        found[match[1]] = os.path.join(directory, name)
+        # A daily archive is only needed for a month without a monthly one
+        return [found[key] for key in sorted(found) if len(key) == 7 or key[:7] not in found]
+
+    def _gap(self, series, data):
+        # The open times of the klines missing between the stored series and the archived range, if any
+        if series is None or not len(series):
+            return None
+        if int(data['close_time'][-1]) + 1 < int(series.open_time[0]):
+            return int(data['close_time'][-1]) + 1, int(series.open_time[0]) - 1
+        if int(series.close_time[-1]) + 1 < int(data['open_time'][0]):
+            return int(series.close_time[-1]) + 1, int(data['open_time'][0]) - 1
+        return None
+
+    def _merge(self, symbol, interval, results, client):
+        parts = []
+        for path, (data, error) in results:
+            if error is not None:
+                self.logger.error(f"Stopped importing {symbol} at {os.path.basename(path)}: {error}")
+                break
+            parts.append(data)
+        if not parts:
+            return None
+        data = np.concatenate(parts)
+        # Sorted by open time, keeping the first copy of klines repeated by overlapping archives
+        data = data[np.unique(data['open_time'], return_index=True)[1]]
+        if not len(data):
+            return None
+        new = Klines(data)
+        gap = self._gap(self.kline_store.load(symbol, interval), data)
+        if gap is not None and client is not None:
+            klines = Klines.from_raw(client.get_historical_klines(symbol, interval, *gap))
+            combined = Klines.concatenate((new, klines))
+            new = combined[np.argsort(combined.open_time, kind='stable')]
+            gap = self._gap(self.kline_store.load(symbol, interval), new.data)
+        if gap is not None:
+            self.logger.error(f"Skipped the archives of {symbol}: they leave the klines from {gap[0]} to {gap[1]} missing before the stored series")
+            return None
+        _files.inc(len(parts))
+        _klines.inc(len(data))
+        return self.kline_store.merge(symbol, interval, new, int(new.open_time[0]))
+
+    def _finish(self, symbol, interval, results, client):
+        series = self._merge(symbol, interval, results, client)
+        if series is not None and client is not None:
+            series = self.kline_store.sync(client, symbol, interval, series.start)
+        return len(series) if series is not None else 0
+
+    def import_symbols(self, symbols, interval, client=None):
+        """
+        Imports the archives of every symbol into the store, then brings each series up to date over REST.
+
+        Args:
+            symbols (list): The symbols to import.
+            interval (str): The kline interval of the archives.
+            client (Client): If given, the klines after the last archived one, and any between the archives and
+                the stored series, are fetched with it.
+
+        Returns:
+            dict: The number of klines stored per symbol that had archives.
+        """
+        jobs = [(symbol, self.archive_files(symbol, interval)) for symbol in symbols]
+        jobs = [(symbol, paths) for symbol, paths in jobs if paths]
+        self.logger.info(f"Importing {sum(len(paths) for symbol, paths in jobs)} archives of {len(jobs)} symbols with {self.processes} processes")
+        imported = {}
+        if self.processes == 1:
+            for symbol, paths in jobs:
+                imported[symbol] = self._finish(symbol, interval, [(path, _load(path)) for path in paths], client)
+            return imported
+
+        executor = concurrent.futures.ProcessPoolExecutor(self.processes)
+        in_flight = collections.deque()
+        try:
+            for symbol, paths in jobs:
+                in_flight.append((symbol, paths, [executor.submit(_load, path) for path in paths]))
+                if len(in_flight) >= self.window:
+                    self._finish_next(in_flight, interval, client, imported)
+            while in_flight:
+                self._finish_next(in_flight, interval, client, imported)
+        finally:
+            executor.shutdown(cancel_futures=True)
+        return imported
+
+    def _finish_next(self, in_flight, interval, client, imported):
+        # Symbols are merged in submission order, each once all of its archives are parsed
+        symbol, paths, futures = in_flight.popleft()
+        results = [(path, future.result()) for path, future in zip(paths, futures)]
+        imported[symbol] = self._finish(symbol, interval, results, client)
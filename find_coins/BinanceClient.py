@@ -1,11 +1,119 @@
-from binance.client import Client
+import asyncio
+import time
+from urllib.parse import urlparse
+
+from binance.client import Client, AsyncClient
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+
+from config_logs.config import RATE_LIMIT_MAX_RETRIES
+from config_logs.logger import setup_logger
+from .RateLimiter import rate_limiter, endpoint_weight, BAN_STATUS_CODES
+from .Metrics import metrics
+from . import fast_json
+
+logger = setup_logger()
+_response_bytes = metrics.counter('binance_response_bytes_total')
+
+
+def _endpoint(uri):
+    # The path without the host, e.g. '/api/v3/klines', keeps the label set small
+    return urlparse(uri).path
+
+
+class RateLimitedClient(Client):
+    """
+    A Binance client that spends request weight from a shared WeightRateLimiter before every call.
+
+    429/418 responses are retried up to RATE_LIMIT_MAX_RETRIES times with exponential backoff and jitter.
+    """
+
+    def __init__(self, *args, rate_limiter=rate_limiter, **kwargs):
+        self.rate_limiter = rate_limiter
+        super().__init__(*args, **kwargs)
+
+    def _request(self, method, uri, signed, force_params=False, **kwargs):
+        weight = endpoint_weight(uri, kwargs.get('data') or kwargs.get('params'))
+        endpoint = _endpoint(uri)
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            self.rate_limiter.acquire(weight)
+            metrics.counter('binance_requests_total', endpoint=endpoint).inc()
+            try:
+                with metrics.timer('binance_request_duration_seconds', endpoint=endpoint):
+                    return super()._request(method, uri, signed, force_params, **kwargs)
+            except BinanceAPIException as e:
+                if e.status_code not in BAN_STATUS_CODES or attempt == RATE_LIMIT_MAX_RETRIES:
+                    raise
+                metrics.counter('binance_retries_total', status=e.status_code).inc()
+                delay = self.rate_limiter.penalize(getattr(e.response, 'headers', None), attempt)
+                logger.error(f"Rate limited with status {e.status_code} on {uri}, retrying in {delay:.2f} seconds...")
+                time.sleep(delay)
+            finally:
+                if self.response is not None:
+                    self.rate_limiter.update_from_headers(self.response.headers)
+
+    @staticmethod
+    def _handle_response(response):
+        # Large payloads such as exchangeInfo are decoded with the fast JSON backend
+        if not (200 <= response.status_code < 300):
+            raise BinanceAPIException(response, response.status_code, response.text)
+        _response_bytes.inc(len(response.content))
+        try:
+            return fast_json.loads(response.content)
+        except ValueError:
+            raise BinanceRequestException('Invalid Response: %s' % response.text)
+
+
+class RateLimitedAsyncClient(AsyncClient):
+    """
+    An AsyncClient that spends request weight from the same shared WeightRateLimiter as RateLimitedClient.
+    """
+
+    def __init__(self, *args, rate_limiter=rate_limiter, **kwargs):
+        self.rate_limiter = rate_limiter
+        super().__init__(*args, **kwargs)
+
+    async def _request(self, method, uri, signed, force_params=False, **kwargs):
+        weight = endpoint_weight(uri, kwargs.get('data') or kwargs.get('params'))
+        endpoint = _endpoint(uri)
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            await self.rate_limiter.acquire_async(weight)
+            metrics.counter('binance_requests_total', endpoint=endpoint).inc()
+            try:
+                with metrics.timer('binance_request_duration_seconds', endpoint=endpoint):
+                    return await super()._request(method, uri, signed, force_params, **kwargs)
+            except BinanceAPIException as e:
+                if e.status_code not in BAN_STATUS_CODES or attempt == RATE_LIMIT_MAX_RETRIES:
+                    raise
+                metrics.counter('binance_retries_total', status=e.status_code).inc()
+                delay = self.rate_limiter.penalize(getattr(e.response, 'headers', None), attempt)
+                logger.error(f"Rate limited with status {e.status_code} on {uri}, retrying in {delay:.2f} seconds...")
+                await asyncio.sleep(delay)
+            finally:
+                if self.response is not None:
+                    self.rate_limiter.update_from_headers(self.response.headers)
+
+    async def _handle_response(self, response):
+        if not str(response.status).startswith('2'):
+            raise BinanceAPIException(response, response.status, await response.text())
+        body = await response.read()
+        _response_bytes.inc(len(body))
+        try:
+            return fast_json.loads(body)
+        except ValueError:
+            raise BinanceRequestException(f'Invalid Response: {body.decode(errors="replace")}')
+
+    async def get_exchange_info_for_symbols(self, symbols):
+        # Only the requested symbols are returned, instead of the multi-megabyte full payload
+        data = {'symbols': fast_json.dumps(list(symbols))}
+        return await self._get('exchangeInfo', data=data, version=self.PRIVATE_API_VERSION)
+
 
 class BinanceClient:
     def __init__(self):
-        self.client = Client()
+        self.client = RateLimitedClient()
 
     def get_exchange_info(self):
         return self.client.get_exchange_info()
 
     def get_historical_klines(self, symbol, interval, start_date):
-        return self.client.get_historical_klines(symbol, interval, start_date)
\ No newline at end of file
+        return self.client.get_historical_klines(symbol, interval, start_date)
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import aiohttp
+from requests.adapters import HTTPAdapter
+
+from config_logs.config import BINANCE_API_KEY, BINANCE_API_SECRET, FETCH_CONCURRENCY
+from .BinanceClient import RateLimitedClient, RateLimitedAsyncClient
+
+
+class ClientPool:
+    """
+    A class for sharing one sync and one async Binance client across every fetcher and simulator.
+
+    Clients are created lazily on first use, so the ping done at construction is paid once per
+    process instead of once per coin. The sync client's connection pool and the async client's
+    connector are sized for pool_size concurrent requests.
+
+    Methods:
+        get_client(): Returns the shared RateLimitedClient.
+        get_async_client(): Returns the shared RateLimitedAsyncClient of the running event loop.
+        close(): Closes the sync client.
+        close_async(): Closes the async client.
+    """
+
+    def __init__(self, api_key=None, api_secret=None, pool_size=FETCH_CONCURRENCY):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.pool_size = pool_size
+        self._client = None
+        self._lock = threading.Lock()
+        self._async_client = None
+        self._async_loop = None
+        self._async_lock = None
+
+    def get_client(self):
+        with self._lock:
+            if self._client is None:
+                client = RateLimitedClient(self.api_key, self.api_secret)
+                client.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+                self._client = client
+            return self._client
+
+    async def get_async_client(self):
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            # An AsyncClient and its session belong to the event loop they were created on
+            self._async_client = None
+            self._async_lock = asyncio.Lock()
+            self._async_loop = loop
+        async with self._async_lock:
+            if self._async_client is None:
+                self._async_client = await RateLimitedAsyncClient.create(
+                    self.api_key, self.api_secret, session_params={'connector': aiohttp.TCPConnector(limit=self.pool_size)}
+                )
+            return self._async_client
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close_connection()
+                self._client = None
+
+    async def close_async(self):
+        if self._async_client is not None and self._async_loop is asyncio.get_running_loop():
+            await self._async_client.close_connection()
+        self._async_client = None
+        self._async_loop = None
+
+
+client_pool = ClientPool(BINANCE_API_KEY, BINANCE_API_SECRET)
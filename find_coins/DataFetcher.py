@@ -1,67 +1,183 @@
-from datetime import datetime
+import asyncio
 import concurrent.futures
 from config_logs.logger import setup_logger
-from config_logs.config import FETCHED_SYMBOLS_PATH
+from config_logs.config import FETCHED_SYMBOLS_PATH, KLINE_STORE_PATH, FETCH_CONCURRENCY
 import os
-import json
 
-from .BinanceClient import Client
+from .ClientPool import client_pool
+from . import fast_json
 from .decorators import timer_decorator
+from .KlineStore import KlineStore
+from .ListingDateResolver import ListingDateResolver
+from .SymbolUniverse import SymbolUniverse
 
 class DataFetcher:
     """
     A class for fetching kline data from Binance.
 
     Attributes:
-        client (Client): The Binance client for making API requests.
+        client (Client): The Binance client for making API requests, the pooled one unless given.
         fetched_symbols (set): A set of symbols that have already been fetched.
+        kline_store (KlineStore): The local kline store checked before any request.
+        symbol_store (SymbolStore): If set, the fetched symbols are read from it instead of 'fetched_symbols.json'.
+        resolver (ListingDateResolver): Finds the first kline of a symbol with O(1) requests.
+        universe (SymbolUniverse): The cached exchange symbols that get_symbols filters.
 
     Methods:
         __init__(): Initializes the BinanceDataFetcher class.
         fetch_kline(symbol_info, start_date): Fetches kline data for a specific symbol.
-        get_symbols(symbol_limit): Retrieves a list of symbols from the Binance exchange.
+        get_symbols(symbol_limit): Retrieves the symbols of the Binance exchange that pass the universe filters.
         fetch_all_klines(symbols, start_date): Fetches kline data for all symbols concurrently.
+        fetch_outcome(symbol_info, start_date): Fetches kline data for a symbol and returns any error instead of logging it.
+        fetch_kline_async(resolver, symbol_info, start_date): Awaitable version of fetch_kline.
+        fetch_outcome_async(resolver, symbol_info, start_date): Awaitable version of fetch_outcome.
+        iter_klines_async(symbols, start_date, concurrency): Yields kline data for all symbols as it arrives.
+        iter_outcomes_async(symbols, start_date, concurrency): Yields the outcome for all symbols as it arrives.
     """
 
-    def __init__(self):
+    def __init__(self, kline_store=None, symbol_store=None, client=None, universe=None):
 
         self.logger = setup_logger()
 
-        self.client = Client()
+        self.client = client if client is not None else client_pool.get_client()
+        self.kline_store = kline_store if kline_store is not None else KlineStore(KLINE_STORE_PATH)
+        self.universe = universe if universe is not None else SymbolUniverse()
+        self.resolver = ListingDateResolver(self.client, self.kline_store)
 
         self.fetched_symbols = set()
-        if os.path.exists(FETCHED_SYMBOLS_PATH):
-            with open(FETCHED_SYMBOLS_PATH, 'r') as f:
-                self.fetched_symbols = set(json.load(f))
+        if symbol_store is not None:
+            self.fetched_symbols = set(symbol_store.fetched_symbols())
+        elif os.path.exists(FETCHED_SYMBOLS_PATH):
+            self.fetched_symbols = set(fast_json.load(FETCHED_SYMBOLS_PATH))
 
-    @timer_decorator
-    def fetch_kline(self, symbol_info, start_date):
-        symbol, base, quote = symbol_info
+    def _should_fetch(self, symbol):
         if symbol in self.fetched_symbols:
             self.logger.info(f"Skipping {symbol} as it has already been fetched")
-            return None
+            return False
         self.logger.info(f"Fetching klines for symbol {symbol}")
+        return True
+
+    def _fetched(self, symbol_info, symbol_date):
+        # Shared by the sync and async paths once the resolver has answered
+        if symbol_date is not None:
+            self.logger.info(f"First kline for symbol {symbol_info[0]} is at {symbol_date[1]}")
+            self.fetched_symbols.add(symbol_info[0])
+        return symbol_date
+
+    @timer_decorator
+    def fetch_kline(self, symbol_info, start_date):
+        if not self._should_fetch(symbol_info[0]):
+            return None
+        try:
+            return self._fetched(symbol_info, self.resolver.resolve(symbol_info, start_date))
+        except Exception as e:
+            self.logger.error(f"Could not fetch klines for symbol {symbol_info[0]}: {e}")
+
+    def fetch_outcome(self, symbol_info, start_date, resolver=None):
+        """
+        Fetches the first kline of a symbol for a FetchJob, which records failures instead of logging them away.
+
+        Args:
+            symbol_info (tuple): The symbol, base asset and quote asset.
+            start_date (str): The start date for fetching the kline data.
+            resolver (ListingDateResolver): The resolver to use, the one over the sync client by default.
+
+        Returns:
+            tuple: The symbol date, None if the symbol has no klines after start_date, and the exception raised, if any.
+        """
         try:
-            klines = self.client.get_historical_klines(symbol, Client.KLINE_INTERVAL_1DAY, start_date)
-            if klines:
-                first_kline = klines[0]
-                date = datetime.fromtimestamp(first_kline[0] / 1000)
-                self.logger.info(f"First kline for symbol {symbol} is at {date}")
-                self.fetched_symbols.add(symbol)  # Add symbol to fetched_symbols
-                return (symbol_info, date, first_kline[1], first_kline[2], first_kline[3], first_kline[4])
+            symbol_date = (resolver or self.resolver).resolve(symbol_info, start_date)
         except Exception as e:
-            self.logger.error(f"Could not fetch klines for symbol {symbol}: {e}")
+            return None, e
+        return self._fetched(symbol_info, symbol_date), None
 
     def get_symbols(self, symbol_limit):
-        info = self.client.get_exchange_info()
-        symbols = [(symbol_info['symbol'], symbol_info['baseAsset'], symbol_info['quoteAsset']) for symbol_info in info['symbols']]
-        if symbol_limit is not None:
-            symbols = symbols[:symbol_limit]
-        return symbols
+        # Filtered before any kline request, so the limit only counts symbols worth fetching
+        return self.universe.query(self.client, limit=symbol_limit)
 
     def fetch_all_klines(self, symbols, start_date):
         symbol_info_and_start_date = [(symbol_info, start_date) for symbol_info in symbols]
         with concurrent.futures.ThreadPoolExecutor() as executor:
             symbol_dates = list(executor.map(lambda p: self.fetch_kline(*p), symbol_info_and_start_date))
         new_symbol_dates = [x for x in symbol_dates if x is not None]
-        return new_symbol_dates
\ No newline at end of file
+        return new_symbol_dates
+
+    async def fetch_kline_async(self, resolver, symbol_info, start_date):
+        if not self._should_fetch(symbol_info[0]):
+            return None
+        try:
+            return self._fetched(symbol_info, await resolver.resolve_async(symbol_info, start_date))
+        except Exception as e:
+            self.logger.error(f"Could not fetch klines for symbol {symbol_info[0]}: {e}")
+
+    async def fetch_outcome_async(self, resolver, symbol_info, start_date):
+        """
+        Awaitable version of fetch_outcome.
+        """
+        try:
+            symbol_date = await resolver.resolve_async(symbol_info, start_date)
+        except Exception as e:
+            return None, e
+        return self._fetched(symbol_info, symbol_date), None
+
+    async def _map_async(self, fetch, symbols, concurrency):
+        # A fixed number of workers share the pooled AsyncClient, so at most `concurrency` requests are in flight
+        pending = asyncio.Queue()
+        for symbol_info in symbols:
+            pending.put_nowait(symbol_info)
+        results = asyncio.Queue(maxsize=concurrency)
+
+        client = await client_pool.get_async_client()
+        resolver = ListingDateResolver(client, self.kline_store)
+
+        async def worker():
+            while not pending.empty():
+                symbol_info = pending.get_nowait()
+                await results.put((symbol_info, await fetch(resolver, symbol_info)))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(symbols)))]
+        try:
+            for _ in range(len(symbols)):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def iter_klines_async(self, symbols, start_date, concurrency=None):
+        """
+        Fetches kline data for all symbols over one pooled aiohttp session and yields it as it arrives.
+
+        A fixed number of workers share the pooled AsyncClient, so at most `concurrency` requests are in flight.
+
+        Args:
+            symbols (list): A list of (symbol, base, quote) tuples.
+            start_date (str): The start date for fetching the kline data.
+            concurrency (int): The number of concurrent requests, FETCH_CONCURRENCY by default.
+
+        Yields:
+            tuple: The symbol info, date, open price, high price, low price and close price of the first kline.
+        """
+        concurrency = concurrency or FETCH_CONCURRENCY
+
+        async def fetch(resolver, symbol_info):
+            return await self.fetch_kline_async(resolver, symbol_info, start_date)
+
+        async for symbol_info, symbol_date in self._map_async(fetch, symbols, concurrency):
+            if symbol_date is not None:
+                yield symbol_date
+
+    async def iter_outcomes_async(self, symbols, start_date, concurrency=None):
+        """
+        Fetches the first kline of every symbol like iter_klines_async, yielding every outcome for a FetchJob.
+
+        Yields:
+            tuple: The symbol info, the symbol date or None if the symbol has no klines, and the exception raised, if any.
+        """
+        concurrency = concurrency or FETCH_CONCURRENCY
+
+        async def fetch(resolver, symbol_info):
+            return await self.fetch_outcome_async(resolver, symbol_info, start_date)
+
+        async for symbol_info, (symbol_date, error) in self._map_async(fetch, symbols, concurrency):
+            yield symbol_info, symbol_date, error
@@ -1,8 +1,9 @@
-import json
 import os
 from collections import OrderedDict
 from datetime import datetime
 
+from . import fast_json
+
 class DataProcessor:
     """
     A class for processing kline data fetched from Binance.
@@ -54,18 +55,15 @@ class DataProcessor:
         # Check if 'symbols.json' exists and is not empty
         if not os.path.exists(symbols_path) or os.stat(symbols_path).st_size == 0:
             # If 'symbols.json' does not exist or is empty, write new data to it
-            with open(symbols_path, 'w') as f:
-                json.dump(new_data, f)
+            fast_json.dump(new_data, symbols_path)
         else:
             # If 'symbols.json' does exist and is not empty, merge and sort data
-            with open(symbols_path, 'r') as f:
-                existing_data = json.load(f)
+            existing_data = fast_json.load(symbols_path)
 
             merged_data = existing_data + new_data
             sorted_merged_data = sorted(merged_data, key=lambda x: x["date"])
 
-            with open(symbols_path, 'w') as f:
-                json.dump(sorted_merged_data, f)
+            fast_json.dump(sorted_merged_data, symbols_path)
 
     @staticmethod
     def append_data_to_fetched_symbols(sorted_new_symbols, fetched_symbols_path):
@@ -82,12 +80,10 @@ class DataProcessor:
         new_symbols_dict = OrderedDict.fromkeys(new_symbols)
 
         if os.path.exists(fetched_symbols_path):
-            with open(fetched_symbols_path, 'r') as f:
-                existing_symbols = OrderedDict.fromkeys(json.load(f))
+            existing_symbols = OrderedDict.fromkeys(fast_json.load(fetched_symbols_path))
             existing_symbols.update(new_symbols_dict)
-            new_symbols_json = json.dumps(list(existing_symbols.keys()))
+            new_symbols = list(existing_symbols.keys())
         else:
-            new_symbols_json = json.dumps(list(new_symbols_dict.keys()))
+            new_symbols = list(new_symbols_dict.keys())
 
-        with open(fetched_symbols_path, 'w') as f:
-            f.write(new_symbols_json)
\ No newline at end of file
+        fast_json.dump(new_symbols, fetched_symbols_path)
\ No newline at end of file
@@ -0,0 +1,119 @@
+import os
+import time
+
+from binance.exceptions import BinanceAPIException
+
+from config_logs.config import FETCH_MAX_ATTEMPTS
+from .RateLimiter import BAN_STATUS_CODES
+from . import fast_json
+
+PENDING = 'pending'
+DONE = 'done'
+NOT_LISTED = 'not_listed'
+# A transient failure such as a timeout, a ban or a server error, retried on the next run
+RETRY = 'retry'
+# A permanent failure such as an invalid symbol, never retried
+FAILED = 'failed'
+STATES = (PENDING, DONE, NOT_LISTED, RETRY, FAILED)
+
+
+def is_permanent(error):
+    """
+    Whether an error from fetching a symbol would happen again on retry.
+
+    Client errors reported by Binance, such as an invalid or delisted symbol, are permanent.
+    Bans, server errors, timeouts and connection errors are transient.
+    """
+    if isinstance(error, BinanceAPIException):
+        return error.status_code not in BAN_STATUS_CODES and 400 <= error.status_code < 500
+    return False
+
+
+class FetchJob:
+    """
+    A class for tracking a fetch of first klines symbol by symbol, so that it can be resumed after a crash.
+
+    Every symbol is pending, done, not listed, waiting for a retry after a transient failure, or
+    failed permanently. The job is checkpointed to a JSON file, replaced atomically, so a
+    restart only fetches the symbols that were not finished. A symbol with a transient failure is
+    retried until it has had max_attempts attempts; permanent failures are never retried.
+
+    Attributes:
+        path (str): The path of the checkpoint file.
+        start_date (str): The start date the symbols are fetched from.
+        symbols (list): The (symbol, base, quote) tuples of the job, in fetch order.
+        states (dict): Maps each symbol to its state, attempt count and last error.
+        max_attempts (int): The number of attempts a symbol with transient failures gets in this job.
+
+    Methods:
+        create(path, start_date, symbols): Starts a new job with every symbol pending.
+        load(path): Loads a checkpointed job, or returns None if there is none.
+        unfinished(): Returns the symbols still to fetch.
+        mark(symbol, state, error): Records the outcome of one attempt.
+        mark_error(symbol, error): Records a failure, classified as transient or permanent.
+        failed(): Returns the symbols that failed permanently.
+        counts(): Returns the number of symbols in each state.
+        is_complete(): Whether no symbol is left to fetch.
+        checkpoint(): Writes the job to its file.
+    """
+
+    def __init__(self, path, start_date, symbols, states=None, created=None, max_attempts=FETCH_MAX_ATTEMPTS):
+        self.path = path
+        self.start_date = start_date
+        self.symbols = [tuple(symbol_info) for symbol_info in symbols]
+        self.states = states if states is not None else {
+            symbol: {'state': PENDING, 'attempts': 0, 'error': None} for symbol, base, quote in self.symbols
+        }
+        self.created = created if created is not None else time.time()
+        self.max_attempts = max_attempts
+
+    @classmethod
+    def create(cls, path, start_date, symbols):
+        job = cls(path, start_date, symbols)
+        job.checkpoint()
+        return job
+
+    @classmethod
+    def load(cls, path):
+        if not path or not os.path.exists(path):
+            return None
+        data = fast_json.load(path)
+        return cls(path, data['start_date'], data['symbols'], data['states'], data['created'])
+
+    def _is_unfinished(self, entry):
+        return entry['state'] == PENDING or (entry['state'] == RETRY and entry['attempts'] < self.max_attempts)
+
+    def unfinished(self):
+        return [symbol_info for symbol_info in self.symbols if self._is_unfinished(self.states[symbol_info[0]])]
+
+    def failed(self):
+        return [symbol for symbol, entry in self.states.items() if entry['state'] == FAILED]
+
+    def mark(self, symbol, state, error=None):
+        entry = self.states[symbol]
+        entry['state'] = state
+        entry['attempts'] += 1
+        entry['error'] = error
+
+    def mark_error(self, symbol, error):
+        self.mark(symbol, FAILED if is_permanent(error) else RETRY, str(error))
+
+    def counts(self):
+        counts = dict.fromkeys(STATES, 0)
+        for entry in self.states.values():
+            counts[entry['state']] += 1
+        return counts
+
+    def is_complete(self):
+        return not self.unfinished()
+
+    def checkpoint(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fast_json.dump({
+            'start_date': self.start_date,
+            'created': self.created,
+            'symbols': self.symbols,
+            'states': self.states,
+        }, self.path)
@@ -0,0 +1,217 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from binance.helpers import date_to_milliseconds
+
+from config_logs.config import KLINE_BASE_INTERVAL, KLINE_CACHE_SIZE
+from .Klines import Klines
+from .Resampler import can_resample, resample
+
+
+def to_milliseconds(value):
+    """
+    Converts a start date (millisecond timestamp, digit string or date string) to milliseconds.
+    """
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return date_to_milliseconds(value)
+
+
+class KlineStore:
+    """
+    An on-disk store of kline data keyed by (symbol, interval).
+
+    Each series is kept as Klines, saved column by column in '<root>/<interval>/<symbol>.npz' together with
+    the earliest start time it was synced from. Syncing only requests klines from the last stored
+    open time onwards, so a rerun costs one short request per series instead of the whole history.
+
+    Intervals that are multiples of base_interval and have no series of their own are derived from
+    the base series, so asking for 4h, 1d or 1w data costs no extra download.
+
+    Loaded and derived series are kept in memory, each cache holding at most cache_size series and
+    evicting the least recently used one, so a pass over the whole exchange stays bounded in memory.
+
+    Attributes:
+        root (str): The directory holding the stored series.
+        base_interval (str): The interval coarser series are resampled from, or None to store every interval.
+        cache_size (int): The number of series each in-memory cache keeps.
+
+    Methods:
+        load(symbol, interval): Returns the stored Klines of a series or None.
+        last_open_time(symbol, interval): Returns the open time of the last stored kline or None.
+        append(symbol, interval, klines, start): Merges raw klines into a stored series.
+        merge(symbol, interval, new, start): Merges parsed Klines into a stored series.
+        sync(client, symbol, interval, start_str): Fetches missing klines and returns the series from start_str.
+    """
+
+    def __init__(self, root, base_interval=KLINE_BASE_INTERVAL, cache_size=KLINE_CACHE_SIZE):
+        self.root = root
+        self.base_interval = base_interval
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # Derived series keyed by (symbol, interval), with the base series they were derived from
+        self._derived = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.root, interval, f"{symbol}.npz")
+
+    def _key_lock(self, symbol, interval):
+        with self._lock:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def _cached(self, cache, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _remember(self, cache, key, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def _is_derived(self, symbol, interval):
+        # A series stored under its own interval, e.g. by an earlier version, is used as it is
+        return (
+            self.base_interval is not None and can_resample(interval, self.base_interval)
+            and (symbol, interval) not in self._cache and not os.path.exists(self._path(symbol, interval))
+        )
+
+    def _load_derived(self, symbol, interval, base):
+        if base is None:
+            return None
+        derived = self._cached(self._derived, (symbol, interval))
+        if derived is None or derived[0] is not base:
+            derived = (base, resample(base, interval))
+            self._remember(self._derived, (symbol, interval), derived)
+        return derived[1]
+
+    def load(self, symbol, interval):
+        """
+        Returns the stored series as Klines with its start, or None if it was never synced.
+
+        Intervals derived from the base interval are resampled from the stored base series.
+        """
+        if self._is_derived(symbol, interval):
+            return self._load_derived(symbol, interval, self.load(symbol, self.base_interval))
+        key = (symbol, interval)
+        series = self._cached(self._cache, key)
+        if series is not None:
+            return series
+        path = self._path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as npz:
+            series = Klines.from_columns(npz, int(npz['start']))
+        self._remember(self._cache, key, series)
+        return series
+
+    def last_open_time(self, symbol, interval):
+        series = self.load(symbol, interval)
+        if series is None or not len(series):
+            return None
+        return int(series.open_time[-1])
+
+    def _save(self, symbol, interval, series):
+        path = self._path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, start=series.start, **series.columns())
+        # Replace the old file only once the new one is fully written
+        os.replace(tmp_path, path)
+        self._remember(self._cache, (symbol, interval), series)
+
+    def append(self, symbol, interval, klines, start):
+        """
+        Merges raw klines into the stored series, replacing stored klines with the same or later open time.
+
+        Args:
+            symbol (str): The symbol of the series.
+            interval (str): The Binance kline interval of the series.
+            klines (list): Raw klines as returned by the Binance API.
+            start (int): The earliest time in milliseconds the series now covers.
+
+        Returns:
+            Klines: The merged series.
+        """
+        return self.merge(symbol, interval, Klines.from_raw(klines, start), start)
+
+    def merge(self, symbol, interval, new, start):
+        """
+        Merges parsed Klines into the stored series, replacing the stored klines within their open time range.
+
+        Args:
+            symbol (str): The symbol of the series.
+            interval (str): The Binance kline interval of the series.
+            new (Klines): The klines to merge, sorted by open time.
+            start (int): The earliest time in milliseconds the series now covers.
+
+        Returns:
+            Klines: The merged series.
+        """
+        series = self.load(symbol, interval)
+        start = start if series is None else min(start, series.start)
+        new = Klines(new.data, start)
+        if series is None:
+            merged = new
+        elif not len(new):
+            merged = Klines(series.data, start)
+        else:
+            before = series.open_time < new.open_time[0]
+            after = series.open_time > new.open_time[-1]
+            merged = Klines.concatenate((series[before], new, series[after]), start)
+        self._save(symbol, interval, merged)
+        return merged
+
+    def sync(self, client, symbol, interval, start_str):
+        """
+        Brings the stored series up to date and returns its klines from start_str onwards.
+
+        Only klines from the last stored open time are requested; the last stored kline is fetched
+        again because it may still have been open when it was stored. Nothing is requested while
+        that kline is still open. If start_str lies before the stored range, the missing head of
+        the series is fetched as well.
+
+        Args:
+            client (Client): The Binance client used for missing klines.
+            symbol (str): The symbol to sync.
+            interval (str): The Binance kline interval to sync.
+            start_str (str | int): The start date of the requested range.
+
+        Returns:
+            Klines: A view of the stored klines starting at start_str.
+        """
+        if self._is_derived(symbol, interval):
+            # Only the base series is synced; the requested interval is resampled from it
+            self.sync(client, symbol, self.base_interval, start_str)
+            series = self._load_derived(symbol, interval, self.load(symbol, self.base_interval))
+            index = np.searchsorted(series.open_time, to_milliseconds(start_str))
+            return series[index:]
+        start = to_milliseconds(start_str)
+        with self._key_lock(symbol, interval):
+            series = self.load(symbol, interval)
+            if series is None:
+                klines = client.get_historical_klines(symbol, interval, start)
+                series = self.append(symbol, interval, klines, start)
+            else:
+                if start < series.start:
+                    head = client.get_historical_klines(symbol, interval, start, series.start - 1)
+                    series = self.append(symbol, interval, head, start)
+                last_open_time = self.last_open_time(symbol, interval)
+                now = int(time.time() * 1000)
+                if last_open_time is None or now > int(series.close_time[-1]):
+                    klines = client.get_historical_klines(symbol, interval, last_open_time if last_open_time is not None else series.start)
+                    series = self.append(symbol, interval, klines, start)
+        index = np.searchsorted(series.open_time, start)
+        return series[index:]
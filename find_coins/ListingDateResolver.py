@@ -0,0 +1,108 @@
+from datetime import datetime
+
+from binance.client import Client
+
+from .KlineStore import to_milliseconds
+
+
+class ListingDateResolver:
+    """
+    A class for finding the first kline of a symbol without downloading its history.
+
+    The first daily kline at or after the start date is requested with a single limit=1 call, and
+    its open time is taken as the listing time, whether it comes from the exchange or the store.
+
+    Every lookup has an awaitable twin for use with an AsyncClient.
+
+    Attributes:
+        client (Client | AsyncClient): The Binance client for making API requests.
+        kline_store (KlineStore): An optional local kline store checked before any request.
+
+    Methods:
+        first_kline(symbol, start_date): Returns the first daily kline and its open time.
+        resolve(symbol_info, start_date): Returns the tuple expected by DataProcessor.sort_and_prepare_data.
+        first_kline_async(symbol, start_date): Awaitable version of first_kline.
+        resolve_async(symbol_info, start_date): Awaitable version of resolve.
+    """
+
+    def __init__(self, client, kline_store=None):
+        self.client = client
+        self.kline_store = kline_store
+
+    def _stored_first_kline(self, symbol, start):
+        if self.kline_store is None:
+            return None
+        series = self.kline_store.load(symbol, Client.KLINE_INTERVAL_1DAY)
+        # The stored series only starts at the listing if it was synced from before its first kline
+        if series is None or not len(series) or not series.start < series.open_time[0]:
+            return None
+        if series.open_time[0] < start:
+            return None
+        # Prices are formatted the way the API sends them, so 'symbols.json' keeps string prices either way
+        first_kline = [int(series.open_time[0])] + [f"{float(series[name][0]):.8f}" for name in ('open', 'high', 'low', 'close')]
+        return first_kline, first_kline[0]
+
+    @staticmethod
+    def _request(symbol, start):
+        return dict(symbol=symbol, interval=Client.KLINE_INTERVAL_1DAY, startTime=start, limit=1)
+
+    @staticmethod
+    def _first(klines):
+        # A daily kline exists for every day with trades, so no daily kline after start means no listing after it
+        return (klines[0], klines[0][0]) if klines else None
+
+    def first_kline(self, symbol, start_date=0):
+        """
+        Finds the first daily kline of a symbol at or after start_date.
+
+        Args:
+            symbol (str): The symbol to resolve.
+            start_date (str | int): The earliest date to consider, epoch 0 by default.
+
+        Returns:
+            tuple: The raw first daily kline and its open time in milliseconds, or None if the symbol has no klines.
+        """
+        start = to_milliseconds(start_date)
+        stored = self._stored_first_kline(symbol, start)
+        if stored is not None:
+            return stored
+        return self._first(self.client.get_klines(**self._request(symbol, start)))
+
+    async def first_kline_async(self, symbol, start_date=0):
+        """
+        Awaitable version of first_kline for an AsyncClient.
+        """
+        start = to_milliseconds(start_date)
+        stored = self._stored_first_kline(symbol, start)
+        if stored is not None:
+            return stored
+        return self._first(await self.client.get_klines(**self._request(symbol, start)))
+
+    @staticmethod
+    def _to_symbol_date(symbol_info, resolved):
+        if resolved is None:
+            return None
+        first_kline, listing_time = resolved
+        date = datetime.fromtimestamp(listing_time / 1000)
+        return (symbol_info, date, first_kline[1], first_kline[2], first_kline[3], first_kline[4])
+
+    def resolve(self, symbol_info, start_date=0):
+        """
+        Resolves the listing of a symbol.
+
+        Args:
+            symbol_info (tuple): The symbol, base asset and quote asset.
+            start_date (str | int): The earliest date to consider, epoch 0 by default.
+
+        Returns:
+            tuple: The symbol info, listing date, and the open, high, low and close price strings of the first daily kline, or None.
+        """
+        symbol, base, quote = symbol_info
+        return self._to_symbol_date(symbol_info, self.first_kline(symbol, start_date))
+
+    async def resolve_async(self, symbol_info, start_date=0):
+        """
+        Awaitable version of resolve for an AsyncClient.
+        """
+        symbol, base, quote = symbol_info
+        return self._to_symbol_date(symbol_info, await self.first_kline_async(symbol, start_date))
@@ -0,0 +1,98 @@
+import asyncio
+
+from config_logs.config import LISTING_POLL_INTERVAL
+from config_logs.logger import setup_logger
+from .ClientPool import client_pool
+from .ListingDateResolver import ListingDateResolver
+
+
+class ListingWatcher:
+    """
+    A long-running watcher that detects new listings by diffing the set of traded symbols.
+
+    Each poll costs one all-symbols price ticker request (weight 4) instead of the full exchangeInfo
+    payload. The exchangeInfo of a symbol is only requested when it first appears, or while it is
+    not yet TRADING. Once a new symbol trades, its first kline is resolved and written with
+    write_batch, and on_listing is awaited with the symbol.
+
+    Attributes:
+        data_fetcher (DataFetcher): Resolves first klines and remembers fetched symbols.
+        write_batch (callable): Receives a list of new first klines, e.g. FindCoins.write_batch.
+        on_listing (callable): An optional coroutine function called with every new symbol.
+        poll_interval (float): The number of seconds between polls.
+        symbols (set): The symbols of the last ticker snapshot.
+        pending (set): New symbols waiting to start trading.
+
+    Methods:
+        snapshot(client): Takes a fresh snapshot without reporting anything as new.
+        poll(client, resolver): Diffs the symbol set once and handles new listings.
+        run(): Polls until cancelled.
+    """
+
+    def __init__(self, data_fetcher, write_batch, on_listing=None, poll_interval=LISTING_POLL_INTERVAL, start_date="1 Jan, 2017"):
+        self.logger = setup_logger()
+        self.data_fetcher = data_fetcher
+        self.write_batch = write_batch
+        self.on_listing = on_listing
+        self.poll_interval = poll_interval
+        self.start_date = start_date
+        self.symbols = None
+        self.pending = set()
+
+    async def _ticker_symbols(self, client):
+        return {ticker['symbol'] for ticker in await client.get_all_tickers()}
+
+    async def snapshot(self, client):
+        self.symbols = await self._ticker_symbols(client)
+
+    async def poll(self, client, resolver):
+        """
+        Diffs the symbol set once and handles new listings.
+
+        Returns:
+            list: The first klines of the symbols that started trading since the last poll.
+        """
+        symbols = await self._ticker_symbols(client)
+        new_symbols = symbols - self.symbols
+        self.symbols = symbols
+        if new_symbols:
+            self.logger.info(f"New symbols detected: {sorted(new_symbols)}")
+        self.pending |= new_symbols
+        # Symbols that were delisted before they started trading are dropped
+        self.pending &= symbols
+        if not self.pending:
+            return []
+
+        info = await client.get_exchange_info_for_symbols(sorted(self.pending))
+        trading = [
+            (symbol_info['symbol'], symbol_info['baseAsset'], symbol_info['quoteAsset'])
+            for symbol_info in info['symbols'] if symbol_info['status'] == 'TRADING'
+        ]
+        new_symbol_dates = []
+        for symbol_info in trading:
+            if symbol_info[0] in self.data_fetcher.fetched_symbols:
+                self.pending.discard(symbol_info[0])
+                continue
+            symbol_date = await self.data_fetcher.fetch_kline_async(resolver, symbol_info, self.start_date)
+            if symbol_date is not None:
+                # Symbols without a kline yet are retried on the next poll
+                self.pending.discard(symbol_info[0])
+                new_symbol_dates.append(symbol_date)
+        if new_symbol_dates:
+            self.write_batch(new_symbol_dates)
+            if self.on_listing is not None:
+                for symbol_date in new_symbol_dates:
+                    await self.on_listing(symbol_date[0][0])
+        return new_symbol_dates
+
+    async def run(self):
+        client = await client_pool.get_async_client()
+        resolver = ListingDateResolver(client, self.data_fetcher.kline_store)
+        await self.snapshot(client)
+        self.logger.info(f"Watching {len(self.symbols)} symbols for new listings every {self.poll_interval} seconds")
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll(client, resolver)
+            except Exception as e:
+                self.logger.error(f"Could not poll for new listings: {e}")
@@ -0,0 +1,303 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config_logs.config import METRICS_PORT, METRICS_DUMP_PATH, METRICS_DUMP_INTERVAL
+from . import fast_json
+
+# Histogram bucket upper bounds in nanoseconds, growing by sqrt(2) from 1 microsecond to about 12 minutes
+BUCKET_BOUNDS = tuple(int(1000 * 2 ** (k / 2)) for k in range(60))
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class Counter:
+    """
+    A monotonically increasing count, such as requests sent or bytes received.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        with self._lock:
+            self.value = 0
+
+
+class Histogram:
+    """
+    A distribution of durations in nanoseconds, kept as counts per logarithmic bucket.
+
+    Recording is O(log buckets) and memory is fixed, however many values are observed. Quantiles
+    are interpolated within their bucket, so they are accurate to about 20% of the value.
+
+    Attributes:
+        counts (list): The number of values in each bucket, the last one unbounded.
+        count (int): The number of values observed.
+        total (int): The sum of the values observed.
+        min (int): The smallest value observed.
+        max (int): The largest value observed.
+
+    Methods:
+        observe(value_ns): Records a duration.
+        quantile(q): Returns an estimate of the q quantile.
+        copy(): Returns a consistent copy to read from while values keep being observed.
+        reset(): Forgets every value.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+            self.count = 0
+            self.total = 0
+            self.min = None
+            self.max = None
+
+    def observe(self, value_ns):
+        index = bisect.bisect_left(BUCKET_BOUNDS, value_ns)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value_ns
+            if self.min is None or value_ns < self.min:
+                self.min = value_ns
+            if self.max is None or value_ns > self.max:
+                self.max = value_ns
+
+    def copy(self):
+        histogram = Histogram()
+        with self._lock:
+            histogram.counts = list(self.counts)
+            histogram.count, histogram.total, histogram.min, histogram.max = self.count, self.total, self.min, self.max
+        return histogram
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKET_BOUNDS[index - 1] if index else 0
+                upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                return min(max(estimate, self.min), self.max)
+            seen += count
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    A class for collecting counters and duration histograms in-process, keyed by name and labels.
+
+    Metrics are created on first use and live for the process, so hot paths can look them up once
+    and keep the object. The registry renders as Prometheus text or as a JSON snapshot with
+    p50/p95/p99 per histogram.
+
+    Methods:
+        counter(name, **labels): Returns the counter of a name and label set.
+        histogram(name, **labels): Returns the histogram of a name and label set.
+        timer(name, **labels): A context manager that records its duration in a histogram.
+        snapshot(): Returns every metric as a JSON-serializable dictionary.
+        render_prometheus(): Returns every metric in the Prometheus text format.
+        reset(): Zeroes every metric.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def _get(self, metrics, factory, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        metric = metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = metrics.setdefault(key, factory())
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(self._counters, Counter, name, labels)
+
+    def histogram(self, name, **labels):
+        return self._get(self._histograms, Histogram, name, labels)
+
+    def timer(self, name, **labels):
+        return _Timer(self.histogram(name, **labels))
+
+    def _items(self):
+        # Copied under the locks, so a histogram is never read halfway through an observe
+        with self._lock:
+            counters, histograms = sorted(self._counters.items()), sorted(self._histograms.items())
+        return [(key, counter.value) for key, counter in counters], [(key, histogram.copy()) for key, histogram in histograms]
+
+    def snapshot(self):
+        """
+        Returns the counters and a summary of each histogram, durations in seconds.
+
+        Returns:
+            dict: 'counters' maps 'name{labels}' to a value; 'histograms' maps it to count, sum, min, max and quantiles.
+        """
+        counter_items, histogram_items = self._items()
+        counters = {name + _format_labels(labels): value for (name, labels), value in counter_items}
+        histograms = {}
+        for (name, labels), histogram in histogram_items:
+            summary = {'count': histogram.count, 'sum': histogram.total / 1e9}
+            if histogram.count:
+                summary['min'] = histogram.min / 1e9
+                summary['max'] = histogram.max / 1e9
+                for q in QUANTILES:
+                    summary[f'p{int(q * 100)}'] = histogram.quantile(q) / 1e9
+            histograms[name + _format_labels(labels)] = summary
+        return {'timestamp': time.time(), 'counters': counters, 'histograms': histograms}
+
+    def render_prometheus(self):
+        lines = []
+        typed = set()
+        counters, histograms = self._items()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f'# TYPE {name} counter')
+                typed.add(name)
+            lines.append(f'{name}{_format_labels(labels)} {value}')
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f'# TYPE {name} histogram')
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(BUCKET_BOUNDS, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", f"{bound / 1e9:g}"),))} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {histogram.count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {histogram.total / 1e9}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        # Metrics are zeroed in place, so the objects hot paths keep stay registered
+        with self._lock:
+            for metric in list(self._counters.values()) + list(self._histograms.values()):
+                metric.reset()
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.histogram.observe(time.perf_counter_ns() - self.start)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        registry = self.server.registry
+        if self.path == '/metrics':
+            body, content_type = registry.render_prometheus(), 'text/plain; version=0.0.4'
+        elif self.path == '/metrics.json':
+            body, content_type = fast_json.dumps(registry.snapshot()), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are not worth a log line each
+        pass
+
+
+class MetricsServer:
+    """
+    Serves a registry over HTTP from a background thread: Prometheus text on /metrics and the JSON snapshot on /metrics.json.
+    """
+
+    def __init__(self, registry, port, host='0.0.0.0'):
+        self.server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.server.registry = registry
+        self.port = self.server.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MetricsDumper:
+    """
+    Writes the JSON snapshot of a registry to a file every interval seconds, and once more when stopped.
+    """
+
+    def __init__(self, registry, path, interval=METRICS_DUMP_INTERVAL):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def dump(self):
+        fast_json.dump(self.registry.snapshot(), self.path)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.dump()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.dump()
+
+
+def start_exporters(registry=None):
+    """
+    Starts the exporters enabled in the configuration: the HTTP endpoint if METRICS_PORT is set and the JSON dump if METRICS_DUMP_PATH is set.
+
+    Returns:
+        list: The started exporters, each with a stop() method.
+    """
+    registry = registry if registry is not None else metrics
+    exporters = []
+    if METRICS_PORT:
+        exporters.append(MetricsServer(registry, METRICS_PORT).start())
+    if METRICS_DUMP_PATH:
+        exporters.append(MetricsDumper(registry, METRICS_DUMP_PATH).start())
+    return exporters
+
+
+# The registry shared by the whole process
+metrics = MetricsRegistry()
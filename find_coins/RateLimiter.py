@@ -0,0 +1,114 @@
+import asyncio
+import random
+import threading
+import time
+
+from config_logs.config import REQUEST_WEIGHT_LIMIT
+
+# Request weight of the public endpoints we use, with and without a symbol parameter
+ENDPOINT_WEIGHTS = {
+    'ping': (1, 1),
+    'time': (1, 1),
+    'exchangeInfo': (20, 20),
+    'klines': (2, 2),
+    'aggTrades': (2, 2),
+    'ticker/price': (2, 4),
+    'ticker/bookTicker': (2, 4),
+    'ticker/24hr': (2, 80),
+}
+DEFAULT_WEIGHT = 1
+BAN_STATUS_CODES = (418, 429)
+
+
+def endpoint_weight(uri, params=None):
+    """
+    Returns the request weight Binance charges for a REST call.
+    """
+    path = uri.split('?')[0].split('/api/v3/')[-1]
+    weight_with_symbol, weight_without_symbol = ENDPOINT_WEIGHTS.get(path, (DEFAULT_WEIGHT, DEFAULT_WEIGHT))
+    if params and ('symbol' in params or 'symbols' in params):
+        return weight_with_symbol
+    return weight_without_symbol
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=60.0):
+    """
+    Returns an exponential backoff delay with full jitter for the given attempt.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class WeightRateLimiter:
+    """
+    A token bucket of Binance request weight shared by every sync and async client.
+
+    The bucket refills at capacity / period weight per second. After each response it is
+    corrected with the weight the server reports in the X-MBX-USED-WEIGHT headers, and a
+    429/418 response blocks every caller until the Retry-After time has passed.
+
+    Attributes:
+        capacity (int): The request weight allowed per period.
+        period (float): The length of the rate limit window in seconds.
+
+    Methods:
+        acquire(weight): Blocks until the weight can be spent.
+        acquire_async(weight): Awaitable version of acquire.
+        update_from_headers(headers): Syncs the bucket with the weight used on the server.
+        penalize(headers, attempt): Blocks the bucket after a 429/418 and returns the delay before retrying.
+    """
+
+    def __init__(self, capacity=REQUEST_WEIGHT_LIMIT, period=60.0):
+        self.capacity = capacity
+        self.period = period
+        self._rate = capacity / period
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _reserve(self, weight):
+        # Spends the weight and returns 0, or returns how long to wait before trying again
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._refill(now)
+            if self._tokens >= weight:
+                self._tokens -= weight
+                return 0
+            return (weight - self._tokens) / self._rate
+
+    def acquire(self, weight=DEFAULT_WEIGHT):
+        wait = self._reserve(weight)
+        while wait > 0:
+            time.sleep(wait)
+            wait = self._reserve(weight)
+
+    async def acquire_async(self, weight=DEFAULT_WEIGHT):
+        wait = self._reserve(weight)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._reserve(weight)
+
+    def update_from_headers(self, headers):
+        used = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('X-MBX-USED-WEIGHT')
+        if used is None:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, self.capacity - int(used))
+
+    def penalize(self, headers, attempt):
+        retry_after = headers.get('Retry-After') if headers is not None else None
+        delay = max(float(retry_after or 0), backoff_delay(attempt))
+        with self._lock:
+            self._tokens = 0
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        return delay
+
+
+rate_limiter = WeightRateLimiter()
@@ -0,0 +1,134 @@
+import numpy as np
+
+from .Klines import Klines, KLINE_DTYPE
+
+MINUTE = 60 * 1000
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+# Interval lengths in milliseconds. Months have no fixed length and are not derived.
+INTERVAL_MS = {
+    '1m': MINUTE, '3m': 3 * MINUTE, '5m': 5 * MINUTE, '15m': 15 * MINUTE, '30m': 30 * MINUTE,
+    '1h': HOUR, '2h': 2 * HOUR, '4h': 4 * HOUR, '6h': 6 * HOUR, '8h': 8 * HOUR, '12h': 12 * HOUR,
+    '1d': DAY, '3d': 3 * DAY, '1w': 7 * DAY,
+}
+# Binance weeks open on Monday; the epoch was a Thursday, so week buckets are shifted by four days
+INTERVAL_OFFSET = {'1w': 4 * DAY}
+
+
+def can_resample(interval, base_interval):
+    """
+    Whether interval can be derived from base_interval: both are fixed-length and base_interval evenly divides interval.
+    """
+    if interval not in INTERVAL_MS or base_interval not in INTERVAL_MS:
+        return False
+    width, base_width = INTERVAL_MS[interval], INTERVAL_MS[base_interval]
+    return width > base_width and width % base_width == 0 and INTERVAL_OFFSET.get(interval, 0) % base_width == 0
+
+
+def bucket_start(open_time, interval):
+    """
+    Returns the open time of the interval candle that contains open_time. Works on scalars and arrays.
+    """
+    width = INTERVAL_MS[interval]
+    offset = INTERVAL_OFFSET.get(interval, 0)
+    return open_time - (open_time - offset) % width
+
+
+def resample(klines, interval):
+    """
+    Derives the klines of a coarser interval from a finer series in one vectorized pass.
+
+    Each candle takes the open of its first base kline, the close of its last, the highest high,
+    the lowest low and the summed volume. A leading candle that opens before the series start is
+    dropped when the series has a kline at the start, because the base klines before the start
+    were never fetched. If the first kline comes after the start, the symbol listed then and the
+    candle is kept, partial like Binance's own. The last candle may still be forming, like the
+    last kline Binance returns.
+
+    Args:
+        klines (Klines): The base series, sorted by open time.
+        interval (str): The interval to derive, e.g. '4h', '1d' or '1w'.
+
+    Returns:
+        Klines: The derived series with the same start as klines.
+    """
+    if not len(klines):
+        return Klines.empty(klines.start)
+    buckets = bucket_start(klines.open_time, interval)
+    first = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    last = np.r_[first[1:] - 1, len(klines) - 1]
+
+    data = np.empty(len(first), dtype=KLINE_DTYPE)
+    data['open_time'] = buckets[first]
+    data['open'] = klines.open[first]
+    data['high'] = np.maximum.reduceat(klines.high, first)
+    data['low'] = np.minimum.reduceat(klines.low, first)
+    data['close'] = klines.close[last]
+    data['volume'] = np.add.reduceat(klines.volume, first)
+    data['close_time'] = data['open_time'] + INTERVAL_MS[interval] - 1
+    if klines.start is not None and data['open_time'][0] < klines.start and klines.open_time[0] <= klines.start:
+        data = data[1:]
+    return Klines(data, klines.start)
+
+
+class IncrementalResampler:
+    """
+    A class for building coarser candles as base candles arrive, in O(1) per candle.
+
+    Attributes:
+        interval (str): The interval of the candles built.
+        current (numpy.void): The candle being built, or None before the first update.
+
+    Methods:
+        update(kline): Adds a base candle and returns the candle it finished, if any.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._current = None
+        self._last_open_time = None
+        self._last_volume = 0.0
+        # The volume of the base candles before the last one
+        self._closed_volume = 0.0
+
+    @property
+    def current(self):
+        return None if self._current is None else self._current.copy()[()]
+
+    def update(self, kline):
+        """
+        Adds a base candle, given as a record of KLINE_DTYPE or a raw Binance kline.
+
+        A base candle with the same open time as the last one replaces it, so a candle that is
+        still forming can be fed again every time it changes.
+
+        Returns:
+            numpy.void: The finished candle if this base candle opened a new one, otherwise None.
+        """
+        open_time, open, high, low, close, volume = (
+            int(kline[0]), float(kline[1]), float(kline[2]), float(kline[3]), float(kline[4]), float(kline[5])
+        )
+        start = bucket_start(open_time, self.interval)
+        finished = None
+        if self._current is not None and start != self._current['open_time']:
+            finished, self._current = self._current[()], None
+        if self._current is None:
+            self._current = np.zeros((), dtype=KLINE_DTYPE)
+            self._current['open_time'] = start
+            self._current['close_time'] = start + INTERVAL_MS[self.interval] - 1
+            self._current['open'] = open
+            self._current['high'] = high
+            self._current['low'] = low
+            self._last_open_time = None
+            self._closed_volume = 0.0
+        else:
+            # A forming candle's high only rises and its low only falls, so replacing it keeps these right
+            self._current['high'] = max(float(self._current['high']), high)
+            self._current['low'] = min(float(self._current['low']), low)
+        if self._last_open_time is not None and open_time != self._last_open_time:
+            self._closed_volume += self._last_volume
+        self._last_open_time = open_time
+        self._last_volume = volume
+        self._current['close'] = close
+        self._current['volume'] = self._closed_volume + volume
+        return finished
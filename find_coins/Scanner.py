@@ -0,0 +1,202 @@
+import os
+import time
+
+import numpy as np
+
+from .KlineStore import to_milliseconds
+from .Resampler import INTERVAL_MS, DAY
+
+YEAR = 365 * DAY
+
+# Running per-symbol aggregates, folded forward one batch of closed klines at a time
+AGGREGATE_DTYPE = np.dtype([
+    ('symbol', 'U32'),
+    ('last_open_time', 'i8'),
+    ('listing_open', 'f8'),
+    ('first_close', 'f8'),
+    ('last_close', 'f8'),
+    ('peak_close', 'f8'),
+    ('max_high', 'f8'),
+    ('max_drawdown', 'f8'),
+    ('returns', 'i8'),
+    ('sum_log_return', 'f8'),
+    ('sum_sq_log_return', 'f8'),
+    ('quote_volume', 'f8'),
+])
+
+SCAN_DTYPE = np.dtype([
+    ('symbol', 'U32'),
+    ('return_since_listing', 'f8'),
+    ('listing_move', 'f8'),
+    ('max_drawdown', 'f8'),
+    ('volatility', 'f8'),
+    ('quote_volume', 'f8'),
+    ('volume_rank', 'i8'),
+])
+METRICS = SCAN_DTYPE.names[1:]
+# Metrics where a smaller value ranks first
+ASCENDING = ('max_drawdown', 'volatility', 'volume_rank')
+
+
+class Scanner:
+    """
+    A class for screening every symbol in the kline store at once.
+
+    Per-symbol aggregates are kept in one structured array, saved next to the store, and folded forward with only the
+    klines closed since the last update, so a rerun touches each series' new tail only. The aggregates cover the
+    klines from the start time they were built from, which is saved with them; an update from another start time
+    rebuilds them from scratch. The metrics of all symbols
+    are then computed from the aggregates in a handful of vectorized operations:
+
+    - return_since_listing: the last close over the first close, minus one.
+    - listing_move: the highest high since listing over the listing open, minus one.
+    - max_drawdown: the largest fall from a running peak close, as a fraction of the peak.
+    - volatility: the annualized standard deviation of log returns between closes.
+    - quote_volume and volume_rank: the summed volume times close, and its rank, 1 being the largest.
+
+    Attributes:
+        kline_store (KlineStore): The store the series are read from.
+        interval (str): The kline interval scanned.
+        path (str): Where the aggregates are saved.
+        aggregates (numpy.ndarray): One AGGREGATE_DTYPE row per symbol.
+        start (int): The start time in milliseconds the aggregates cover klines from, or None before any update.
+
+    Methods:
+        update(symbols, client, start_time): Folds the klines closed since the last update into the aggregates.
+        metrics(): Returns the screening metrics of every symbol.
+        rank(by, limit, ascending): Returns the symbols ordered by a metric.
+        save(): Writes the aggregates to path.
+    """
+
+    def __init__(self, kline_store, interval=None, path=None):
+        self.kline_store = kline_store
+        self.interval = interval or kline_store.base_interval or '1h'
+        self.path = path or os.path.join(kline_store.root, f"scanner_{self.interval}.npz")
+        self.aggregates = np.empty(0, dtype=AGGREGATE_DTYPE)
+        self.start = None
+        if os.path.exists(self.path):
+            with np.load(self.path) as npz:
+                self.aggregates = npz['aggregates']
+                # Aggregates saved without their start are rebuilt on the next update
+                self.start = int(npz['start']) if 'start' in npz.files else None
+        self._rows = {symbol: row for row, symbol in enumerate(self.aggregates['symbol'])}
+
+    def _reset(self, start):
+        self.aggregates = np.empty(0, dtype=AGGREGATE_DTYPE)
+        self._rows = {}
+        self.start = start
+
+    def _add_symbols(self, symbols):
+        missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self._rows]
+        if not missing:
+            return
+        rows = np.zeros(len(missing), dtype=AGGREGATE_DTYPE)
+        rows['symbol'] = missing
+        rows['last_open_time'] = -1
+        for offset, symbol in enumerate(missing):
+            self._rows[symbol] = len(self.aggregates) + offset
+        self.aggregates = np.concatenate((self.aggregates, rows))
+
+    def _fold(self, row, klines):
+        aggregates = self.aggregates
+        close = klines.close
+        if aggregates['last_open_time'][row] < 0:
+            aggregates['listing_open'][row] = klines.open[0]
+            aggregates['first_close'][row] = close[0]
+            aggregates['peak_close'][row] = close[0]
+            log_returns = np.diff(np.log(close))
+        else:
+            log_returns = np.diff(np.log(np.r_[aggregates['last_close'][row], close]))
+        peaks = np.maximum.accumulate(np.r_[aggregates['peak_close'][row], close])[1:]
+        aggregates['max_drawdown'][row] = max(aggregates['max_drawdown'][row], float((1 - close / peaks).max()))
+        aggregates['peak_close'][row] = peaks[-1]
+        aggregates['max_high'][row] = max(aggregates['max_high'][row], float(klines.high.max()))
+        aggregates['returns'][row] += len(log_returns)
+        aggregates['sum_log_return'][row] += log_returns.sum()
+        aggregates['sum_sq_log_return'][row] += np.square(log_returns).sum()
+        aggregates['quote_volume'][row] += float(np.dot(klines.volume, close))
+        aggregates['last_close'][row] = close[-1]
+        aggregates['last_open_time'][row] = klines.open_time[-1]
+
+    def update(self, symbols, client=None, start_time=0):
+        """
+        Folds the klines closed since the last update into the aggregates of each symbol and saves them.
+
+        Args:
+            symbols (list): The symbols to scan.
+            client (Client): If given, each series is synced from start_time first; otherwise only stored klines are used.
+            start_time (str | int): The time the metrics are computed from; the aggregates are rebuilt if it changed.
+        """
+        start = to_milliseconds(start_time)
+        if start != self.start:
+            self._reset(start)
+        self._add_symbols(symbols)
+        now = int(time.time() * 1000)
+        for symbol in symbols:
+            if client is not None:
+                series = self.kline_store.sync(client, symbol, self.interval, start_time)
+            else:
+                series = self.kline_store.load(symbol, self.interval)
+                if series is not None:
+                    series = series[np.searchsorted(series.open_time, start):]
+            if series is None or not len(series):
+                continue
+            row = self._rows[symbol]
+            # Only closed klines are folded in, so a candle that is still forming is never counted twice
+            new = series[(series.open_time > self.aggregates['last_open_time'][row]) & (series.close_time < now)]
+            if len(new):
+                self._fold(row, new)
+        self.save()
+
+    def metrics(self):
+        """
+        Returns the screening metrics of every symbol with at least one closed kline.
+
+        Returns:
+            numpy.ndarray: One SCAN_DTYPE row per symbol.
+        """
+        aggregates = self.aggregates[self.aggregates['last_open_time'] >= 0]
+        scan = np.empty(len(aggregates), dtype=SCAN_DTYPE)
+        scan['symbol'] = aggregates['symbol']
+        scan['return_since_listing'] = aggregates['last_close'] / aggregates['first_close'] - 1
+        scan['listing_move'] = aggregates['max_high'] / aggregates['listing_open'] - 1
+        scan['max_drawdown'] = aggregates['max_drawdown']
+        count = aggregates['returns']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = aggregates['sum_log_return'] / count
+            variance = np.maximum(aggregates['sum_sq_log_return'] / count - mean ** 2, 0)
+        scan['volatility'] = np.where(count > 0, np.sqrt(variance * YEAR / INTERVAL_MS[self.interval]), np.nan)
+        scan['quote_volume'] = aggregates['quote_volume']
+        order = np.argsort(-aggregates['quote_volume'], kind='stable')
+        scan['volume_rank'][order] = np.arange(1, len(scan) + 1)
+        return scan
+
+    def rank(self, by='return_since_listing', limit=None, ascending=None):
+        """
+        Returns the symbols ordered by a metric, best first. Symbols without a value for the metric come last.
+
+        Args:
+            by (str): One of METRICS.
+            limit (int): The number of symbols to return, all by default.
+            ascending (bool): Whether smaller values rank first; by default only for drawdown, volatility and volume rank.
+
+        Returns:
+            list: The ranked symbols.
+        """
+        if by not in METRICS:
+            raise ValueError(f"Unknown scan metric {by}, expected one of {', '.join(METRICS)}")
+        scan = self.metrics()
+        ascending = by in ASCENDING if ascending is None else ascending
+        values = scan[by].astype(np.float64)
+        # NaN sorts last either way
+        order = np.argsort(values if ascending else -values, kind='stable')
+        return scan['symbol'][order[:limit]].tolist()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, aggregates=self.aggregates, start=self.start)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+
+from .DataProcessor import DataProcessor
+from . import fast_json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    pair TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL
+);
+CREATE INDEX IF NOT EXISTS listings_date ON listings (date);
+CREATE TABLE IF NOT EXISTS fetched (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL UNIQUE
+);
+"""
+
+LISTING_COLUMNS = ('symbol', 'date', 'open', 'high', 'low', 'close')
+
+
+class SymbolStore:
+    """
+    A SQLite store for the first klines of listed symbols and the order in which symbols were fetched.
+
+    It replaces the rewrite of 'symbols.json' and 'fetched_symbols.json' on every run. Each batch
+    is inserted in a single transaction, so a run costs O(new) and a crash never leaves a half
+    written file. Listings are indexed by date for ordered range reads, and the existing JSON files
+    can be imported and exported so that current consumers keep working.
+
+    Attributes:
+        path (str): The path of the SQLite database.
+
+    Methods:
+        append(new_symbol_dates): Inserts a batch of fetched first klines.
+        fetched_symbols(): Returns the fetched symbols in fetch order.
+        listings(start, end): Returns the listings in date order, optionally within [start, end).
+        is_empty(): Whether nothing has been stored yet.
+        import_json(symbols_path, fetched_symbols_path): Loads the legacy JSON files.
+        export_json(symbols_path, fetched_symbols_path): Writes the legacy JSON files.
+        close(): Closes the database.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def _insert(self, new_data, symbols):
+        # Existing pairs and symbols keep their first entry, like the JSON merge kept the first position
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO listings (pair, date, open, high, low, close) VALUES (?, ?, ?, ?, ?, ?)',
+                [tuple(row[column] for column in LISTING_COLUMNS) for row in new_data],
+            )
+            self.conn.executemany('INSERT OR IGNORE INTO fetched (symbol) VALUES (?)', [(symbol,) for symbol in symbols])
+
+    def append(self, new_symbol_dates):
+        """
+        Inserts a batch of fetched first klines.
+
+        Args:
+            new_symbol_dates (list): A list of tuples containing the symbol info, date, open price, high price, low price, and close price of the first kline.
+        """
+        new_data = DataProcessor.sort_and_prepare_data(new_symbol_dates)
+        symbols = [symbol for (symbol, base, quote), date, open, high, low, close in new_symbol_dates]
+        self._insert(new_data, symbols)
+
+    def fetched_symbols(self):
+        return [symbol for symbol, in self.conn.execute('SELECT symbol FROM fetched ORDER BY seq')]
+
+    def listings(self, start=None, end=None):
+        """
+        Returns the listings in date order, in the same format as 'symbols.json'.
+
+        Args:
+            start (str): The first ISO date to include.
+            end (str): The ISO date to stop before.
+
+        Returns:
+            list: A list of dictionaries with the symbol, date, open price, high price, low price and close price.
+        """
+        query = 'SELECT pair, date, open, high, low, close FROM listings'
+        conditions, params = [], []
+        if start is not None:
+            conditions.append('date >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('date < ?')
+            params.append(end)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY date, rowid'
+        return [dict(zip(LISTING_COLUMNS, row)) for row in self.conn.execute(query, params)]
+
+    def is_empty(self):
+        return self.conn.execute('SELECT EXISTS (SELECT 1 FROM fetched) OR EXISTS (SELECT 1 FROM listings)').fetchone()[0] == 0
+
+    def import_json(self, symbols_path, fetched_symbols_path):
+        """
+        Loads 'symbols.json' and 'fetched_symbols.json' into the store. Missing or empty files are skipped.
+        """
+        new_data, symbols = [], []
+        if symbols_path and os.path.exists(symbols_path) and os.stat(symbols_path).st_size > 0:
+            new_data = fast_json.load(symbols_path)
+        if fetched_symbols_path and os.path.exists(fetched_symbols_path) and os.stat(fetched_symbols_path).st_size > 0:
+            symbols = fast_json.load(fetched_symbols_path)
+        self._insert(new_data, symbols)
+
+    def export_json(self, symbols_path, fetched_symbols_path):
+        """
+        Writes the store out as 'symbols.json' and 'fetched_symbols.json'. Each file is replaced atomically.
+        """
+        fast_json.dump(self.listings(), symbols_path)
+        fast_json.dump(self.fetched_symbols(), fetched_symbols_path)
+
+    def close(self):
+        self.conn.close()
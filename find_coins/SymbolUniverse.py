@@ -0,0 +1,127 @@
+import os
+import time
+
+from config_logs.config import (
+    UNIVERSE_CACHE_PATH, UNIVERSE_CACHE_TTL, UNIVERSE_STATUSES, UNIVERSE_QUOTE_ASSETS, UNIVERSE_PERMISSIONS,
+    UNIVERSE_MAX_MIN_NOTIONAL,
+)
+from config_logs.logger import setup_logger
+from . import fast_json
+
+# Filters that carry the smallest order value a symbol accepts
+NOTIONAL_FILTERS = ('NOTIONAL', 'MIN_NOTIONAL')
+
+
+def _permissions(symbol_info):
+    # Newer exchangeInfo payloads list permission sets and leave the flat list empty
+    permissions = set(symbol_info.get('permissions') or ())
+    for permission_set in symbol_info.get('permissionSets') or ():
+        permissions.update(permission_set)
+    return sorted(permissions)
+
+
+def _min_notional(symbol_info):
+    for symbol_filter in symbol_info.get('filters') or ():
+        if symbol_filter.get('filterType') in NOTIONAL_FILTERS and 'minNotional' in symbol_filter:
+            return float(symbol_filter['minNotional'])
+    return None
+
+
+def compact(symbol_info):
+    """
+    Keeps the fields of an exchangeInfo symbol entry that the universe is queried on.
+    """
+    return {
+        'symbol': symbol_info['symbol'],
+        'base': symbol_info['baseAsset'],
+        'quote': symbol_info['quoteAsset'],
+        'status': symbol_info.get('status'),
+        'permissions': _permissions(symbol_info),
+        'min_notional': _min_notional(symbol_info),
+    }
+
+
+class SymbolUniverse:
+    """
+    A class for querying the symbols of the exchange before any kline is fetched.
+
+    The exchangeInfo payload is reduced to one small record per symbol and cached to a JSON file,
+    so a rerun within ttl seconds costs no request at all. Queries filter on status, quote asset,
+    permissions and minimum notional, so halted pairs, delisted pairs and quotes that are never
+    traded are dropped before they cost a kline request each.
+
+    Attributes:
+        path (str): The path of the cached snapshot, or None to keep it in memory only.
+        ttl (float): The number of seconds a snapshot is reused for.
+        records (list): The compact symbol records of the snapshot, in exchangeInfo order.
+        fetched_at (float): When the snapshot was taken.
+
+    Methods:
+        refresh(client): Takes a new snapshot from exchangeInfo.
+        load(client): Returns the cached snapshot, refreshed first if it is missing or stale.
+        query(client, statuses, quote_assets, permissions, max_min_notional, limit): Returns the matching symbols.
+    """
+
+    def __init__(self, path=UNIVERSE_CACHE_PATH, ttl=UNIVERSE_CACHE_TTL):
+        self.logger = setup_logger()
+        self.path = path
+        self.ttl = ttl
+        self.records = None
+        self.fetched_at = None
+
+    def _read_cache(self):
+        if not self.path or not os.path.exists(self.path) or os.stat(self.path).st_size == 0:
+            return
+        data = fast_json.load(self.path)
+        self.records, self.fetched_at = data['symbols'], data['fetched_at']
+
+    def _is_fresh(self):
+        return self.records is not None and time.time() - self.fetched_at < self.ttl
+
+    def refresh(self, client):
+        info = client.get_exchange_info()
+        self.records = [compact(symbol_info) for symbol_info in info['symbols']]
+        self.fetched_at = time.time()
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fast_json.dump({'fetched_at': self.fetched_at, 'symbols': self.records}, self.path)
+        return self.records
+
+    def load(self, client):
+        if not self._is_fresh():
+            self._read_cache()
+        if not self._is_fresh():
+            self.refresh(client)
+        return self.records
+
+    def query(self, client, statuses=UNIVERSE_STATUSES, quote_assets=UNIVERSE_QUOTE_ASSETS,
+              permissions=UNIVERSE_PERMISSIONS, max_min_notional=UNIVERSE_MAX_MIN_NOTIONAL, limit=None):
+        """
+        Returns the symbols of the snapshot that pass every filter. An empty filter lets everything through.
+
+        Args:
+            client (Client): Used to refresh a missing or stale snapshot.
+            statuses (list): The accepted statuses, e.g. ['TRADING'].
+            quote_assets (list): The accepted quote assets, e.g. ['USDT', 'FDUSD'].
+            permissions (list): Permissions of which a symbol needs at least one, e.g. ['SPOT'].
+            max_min_notional (float): The largest minimum order value accepted; symbols without one always pass.
+            limit (int): The maximum number of symbols to return, taken after filtering.
+
+        Returns:
+            list: A list of (symbol, base, quote) tuples in exchangeInfo order.
+        """
+        records = self.load(client)
+        statuses, quote_assets, permissions = set(statuses or ()), set(quote_assets or ()), set(permissions or ())
+        symbols = [
+            (record['symbol'], record['base'], record['quote']) for record in records
+            if (not statuses or record['status'] in statuses)
+            and (not quote_assets or record['quote'] in quote_assets)
+            and (not permissions or permissions.intersection(record['permissions']))
+            and (not max_min_notional or record['min_notional'] is None or record['min_notional'] <= max_min_notional)
+        ]
+        self.logger.info(f"Symbol universe has {len(symbols)} of {len(records)} symbols after filtering")
+        if limit is not None:
+            symbols = symbols[:limit]
+        return symbols
@@ -1,36 +1,55 @@
+import asyncio
 import time
 from config_logs.logger import setup_logger
 from functools import wraps
-import random
+from .RateLimiter import backoff_delay
+from .Metrics import metrics
 
 logger = setup_logger()
 
 def timer_decorator(func):
     """
-    A decorator that measures the execution time of a function.
+    A decorator that records the execution time of a function or coroutine function in the
+    'function_duration_seconds' histogram, measured with the monotonic perf_counter_ns clock.
     """
+    histogram = metrics.histogram('function_duration_seconds', function=func.__qualname__)
+
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.perf_counter_ns()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter_ns() - start_time)
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        elapsed_time = end_time - start_time
-        logger.info(f"Function {func.__name__} took {elapsed_time} seconds to run.")
-        return result
+        start_time = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter_ns() - start_time)
     return wrapper
 
-def retry_decorator(max_retries):
+def retry_decorator(max_retries, base_delay=1.0, max_delay=60.0):
     """
-    A decorator that retries a function if it fails.
+    A decorator that retries a function if it fails, with exponential backoff and jitter between attempts.
     """
     def decorator(func):
+        retries = metrics.counter('function_retries_total', function=func.__qualname__)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            for _ in range(max_retries):
+            for attempt in range(max_retries):
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
                     logger.error(f"Function {func.__name__} failed with error: {e}. Retrying...")
+                    if attempt < max_retries - 1:
+                        retries.inc()
+                        time.sleep(backoff_delay(attempt, base_delay, max_delay))
             return None
         return wrapper
     return decorator
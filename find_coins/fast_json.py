@@ -0,0 +1,146 @@
+import json
+import os
+from collections import deque
+
+import numpy as np
+
+from config_logs.config import JSON_BACKEND
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+CHUNK_SIZE = 1 << 16
+_WHITESPACE = ' \t\n\r'
+
+
+def _select_backend(name):
+    """
+    Picks the JSON backend: 'orjson', 'ujson' or 'json', or the fastest installed one for 'auto'.
+    """
+    available = {'orjson': orjson, 'ujson': ujson, 'json': json}
+    if name != 'auto':
+        if available.get(name) is None:
+            raise ValueError(f"JSON backend {name} is not installed")
+        return name
+    return next(candidate for candidate in ('orjson', 'ujson', 'json') if available[candidate] is not None)
+
+
+BACKEND = _select_backend(JSON_BACKEND)
+
+
+def loads(data):
+    if BACKEND == 'orjson':
+        return orjson.loads(data)
+    if BACKEND == 'ujson':
+        return ujson.loads(data)
+    return json.loads(data)
+
+
+def _default(obj):
+    # The json and ujson backends call this for every value they cannot serialize themselves
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """
+    Serializes obj to a compact JSON string. NumPy scalars and arrays are accepted by every backend.
+    """
+    if BACKEND == 'orjson':
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    if BACKEND == 'ujson':
+        return ujson.dumps(obj, default=_default)
+    return json.dumps(obj, separators=(',', ':'), default=_default)
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump(obj, path):
+    """
+    Writes obj to path, replacing the old file only once the new one is fully written.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(dumps(obj))
+    os.replace(tmp_path, path)
+
+
+def iter_array(path, chunk_size=CHUNK_SIZE):
+    """
+    Yields the items of a file holding one JSON array, reading it chunk_size characters at a time.
+
+    Only the item being decoded and one chunk are held in memory, never the whole document.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, position, eof = '', 0, False
+
+        def fill():
+            nonlocal buffer, position, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            # Drop what was consumed so the buffer stays around one chunk long
+            buffer, position = buffer[position:] + chunk, 0
+            return not eof
+
+        def skip_whitespace():
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in _WHITESPACE:
+                    position += 1
+                if position < len(buffer) or not fill():
+                    return
+
+        skip_whitespace()
+        if position == len(buffer):
+            return
+        if buffer[position] != '[':
+            raise ValueError(f"{path} does not hold a JSON array")
+        position += 1
+        while True:
+            skip_whitespace()
+            if position == len(buffer):
+                raise ValueError(f"{path} ends inside the JSON array")
+            if buffer[position] == ']':
+                return
+            if buffer[position] == ',':
+                position += 1
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise
+                continue
+            if end == len(buffer) and not eof:
+                # A number cut at the chunk boundary decodes as a shorter number, so decode it again
+                fill()
+                continue
+            position = end
+            yield item
+
+
+def tail(path, count):
+    """
+    Returns the last count items of a file holding one JSON array, or every item if count is None.
+
+    The file is streamed, so at most count decoded items are held at a time. A missing file gives an empty list.
+    """
+    if not os.path.exists(path):
+        return []
+    if count is None:
+        return list(iter_array(path))
+    if count <= 0:
+        return []
+    return list(deque(iter_array(path), maxlen=count))
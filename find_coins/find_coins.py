@@ -1,24 +1,166 @@
+import concurrent.futures
+
 from .DataFetcher import DataFetcher
 from .DataProcessor import DataProcessor
+from .FetchJob import FetchJob, DONE, NOT_LISTED
 from .decorators import timer_decorator
-from config_logs.config import FETCHED_SYMBOLS_PATH, SYMBOLS_PATH
+from config_logs.config import FETCHED_SYMBOLS_PATH, SYMBOLS_PATH, FETCH_FLUSH_SIZE, FETCH_JOB_PATH
+from config_logs.logger import setup_logger
 
 class FindCoins:
-    def __init__(self):
-        self.data_fetcher = DataFetcher()
+    def __init__(self, kline_store=None, symbol_store=None, job_path=FETCH_JOB_PATH):
+        self.logger = setup_logger()
+        self.data_fetcher = DataFetcher(kline_store, symbol_store)
         self.data_processor = DataProcessor()
+        self.symbol_store = symbol_store
+        # Fetches are checkpointed to this file and resumed from it; without one a fetch runs as a single batch
+        self.job_path = job_path
 
     @timer_decorator
     def fetch_klines_data(self, start_date, symbol_limit):
         """
         Fetches and processes kline data for all symbols.
 
+        With a job path, progress is checkpointed as it goes and a restart only fetches the unfinished symbols.
+
         Args:
             start_date (str): The start date for fetching the kline data.
             symbol_limit (int): The maximum number of symbols to fetch data for.
         """
+        if self.job_path:
+            self.run_job(self.open_job(start_date, symbol_limit))
+            return
         symbols = self.data_fetcher.get_symbols(symbol_limit)
         new_symbol_dates = self.data_fetcher.fetch_all_klines(symbols, start_date)
+        self.write_batch(new_symbol_dates)
+
+    def write_batch(self, new_symbol_dates):
+        """
+        Writes fetched first klines to the symbol store, or to the symbols files if there is none.
+        """
+        if self.symbol_store is not None:
+            self.symbol_store.append(new_symbol_dates)
+            return
         new_data = self.data_processor.sort_and_prepare_data(new_symbol_dates)
         self.data_processor.append_data_to_symbols(new_data, SYMBOLS_PATH)
-        self.data_processor.append_data_to_fetched_symbols(new_symbol_dates, FETCHED_SYMBOLS_PATH)
\ No newline at end of file
+        self.data_processor.append_data_to_fetched_symbols(new_symbol_dates, FETCHED_SYMBOLS_PATH)
+
+    @timer_decorator
+    async def fetch_klines_data_async(self, start_date, symbol_limit, concurrency=None):
+        """
+        Fetches kline data for all symbols with asyncio and writes it as it arrives.
+
+        Results are flushed to the symbols files every FETCH_FLUSH_SIZE symbols instead of after the whole batch.
+
+        Args:
+            start_date (str): The start date for fetching the kline data.
+            symbol_limit (int): The maximum number of symbols to fetch data for.
+            concurrency (int): The number of concurrent requests.
+        """
+        if self.job_path:
+            await self.run_job_async(self.open_job(start_date, symbol_limit), concurrency)
+            return
+        symbols = self.data_fetcher.get_symbols(symbol_limit)
+        batch = []
+        async for symbol_date in self.data_fetcher.iter_klines_async(symbols, start_date, concurrency):
+            batch.append(symbol_date)
+            if len(batch) >= FETCH_FLUSH_SIZE:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+
+    def open_job(self, start_date, symbol_limit):
+        """
+        Resumes the checkpointed fetch job if it has unfinished symbols for the same start date, or starts a new one.
+
+        A new job leaves out the symbols already fetched and those that failed permanently in the previous job.
+        """
+        job = FetchJob.load(self.job_path)
+        if job is not None and job.start_date == start_date and not job.is_complete():
+            self.logger.info(f"Resuming fetch job with {len(job.unfinished())} of {len(job.symbols)} symbols left")
+            return job
+        failed = set(job.failed()) if job is not None else set()
+        symbols = [
+            symbol_info for symbol_info in self.data_fetcher.get_symbols(symbol_limit)
+            if symbol_info[0] not in self.data_fetcher.fetched_symbols and symbol_info[0] not in failed
+        ]
+        return FetchJob.create(self.job_path, start_date, symbols)
+
+    def _record(self, job, batch, symbol_info, symbol_date, error):
+        symbol = symbol_info[0]
+        if error is not None:
+            self.logger.error(f"Could not fetch klines for symbol {symbol}: {error}")
+            job.mark_error(symbol, error)
+        elif symbol_date is None:
+            job.mark(symbol, NOT_LISTED)
+        else:
+            batch.append(symbol_date)
+            job.mark(symbol, DONE)
+
+    def _checkpoint(self, job, batch):
+        # Results are written before the job marks them done, so a crash in between only refetches them
+        if batch:
+            self.write_batch(list(batch))
+            batch.clear()
+        job.checkpoint()
+
+    def _skip_fetched(self, job):
+        # Symbols written by a run that crashed before its checkpoint need no request
+        symbols = []
+        for symbol_info in job.unfinished():
+            if symbol_info[0] in self.data_fetcher.fetched_symbols:
+                job.mark(symbol_info[0], DONE)
+            else:
+                symbols.append(symbol_info)
+        return symbols
+
+    def _log_job(self, job):
+        counts = job.counts()
+        self.logger.info(f"Fetch job: {', '.join(f'{count} {state}' for state, count in counts.items() if count)}")
+
+    @timer_decorator
+    def run_job(self, job):
+        """
+        Fetches the unfinished symbols of a job with a thread pool, checkpointing every FETCH_FLUSH_SIZE symbols.
+
+        Args:
+            job (FetchJob): The job to run.
+        """
+        symbols = self._skip_fetched(job)
+        batch = []
+        executor = concurrent.futures.ThreadPoolExecutor()
+        try:
+            futures = {executor.submit(self.data_fetcher.fetch_outcome, symbol_info, job.start_date): symbol_info for symbol_info in symbols}
+            for finished, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                self._record(job, batch, futures[future], *future.result())
+                if finished % FETCH_FLUSH_SIZE == 0:
+                    self._checkpoint(job, batch)
+        finally:
+            # On an interrupt the queued symbols are dropped instead of requested; they stay unfinished in the job
+            executor.shutdown(cancel_futures=True)
+            # Whatever finished is kept, even if the run is interrupted
+            self._checkpoint(job, batch)
+        self._log_job(job)
+
+    @timer_decorator
+    async def run_job_async(self, job, concurrency=None):
+        """
+        Awaitable version of run_job that fetches with asyncio.
+
+        Args:
+            job (FetchJob): The job to run.
+            concurrency (int): The number of concurrent requests.
+        """
+        symbols = self._skip_fetched(job)
+        batch = []
+        finished = 0
+        try:
+            async for symbol_info, symbol_date, error in self.data_fetcher.iter_outcomes_async(symbols, job.start_date, concurrency):
+                self._record(job, batch, symbol_info, symbol_date, error)
+                finished += 1
+                if finished % FETCH_FLUSH_SIZE == 0:
+                    self._checkpoint(job, batch)
+        finally:
+            self._checkpoint(job, batch)
+        self._log_job(job)
@@ -1,54 +1,197 @@
 import asyncio
-import os
-import json
+from datetime import datetime
 from simulation import CoinTradeSimulator
 from find_coins import FindCoins
+from find_coins.KlineStore import KlineStore
+from find_coins import fast_json
+from find_coins.SymbolStore import SymbolStore
+from find_coins.ClientPool import client_pool
+from find_coins.ListingWatcher import ListingWatcher
+from find_coins.Metrics import start_exporters
+from find_coins.Scanner import Scanner
+from find_coins.ArchiveImporter import ArchiveImporter
 from config_logs.logger import setup_logger
-from config_logs.config import load_configuration
+from config_logs.config import load_configuration, load_sweep_configuration, KLINE_STORE_PATH, SYMBOL_DB_PATH, SYMBOLS_PATH, FETCHED_SYMBOLS_PATH, FETCH_MODE, RUN_MODE, SWEEP_RESULTS_PATH, PORTFOLIO_EQUITY_PATH, PORTFOLIO_TRADES_PATH, REALTIME_FEED, STREAM_RECORD_PATH, WATCH_SIMULATE, SCAN_RANK_BY, ARCHIVE_PATH
+from simulation.parameter_sweep import ParameterSweep
+from simulation.portfolio_backtest import PortfolioBacktest
+from simulation.stream_hub import StreamHub
+from simulation.price_feed import FEED_STREAMS
+from simulation.stream_recorder import StreamRecorder
 
 class SimulationManager:
     def __init__(self):
         self.logger = setup_logger()
         self.coins_list, self.start_time, self.amount_usd, self.target_price, self.num_coins = load_configuration()
+        self.kline_store = KlineStore(KLINE_STORE_PATH)
+        self.symbol_store = self._open_symbol_store()
 
-    def fetch_symbols(self):
-        fetcher = FindCoins()
-        fetcher.fetch_klines_data("1 Jan, 2017", None)
+    def _open_symbol_store(self):
+        if not SYMBOL_DB_PATH:
+            return None
+        store = SymbolStore(SYMBOL_DB_PATH)
+        if store.is_empty():
+            # Carry over what earlier runs wrote to the JSON files
+            store.import_json(SYMBOLS_PATH, FETCHED_SYMBOLS_PATH)
+        return store
 
-    async def start_simulations(self):
-        if os.path.exists(self.coins_list):
-            with open(self.coins_list, 'r') as f:
-                coins = json.load(f)
+    def fetch_symbols(self):
+        fetcher = FindCoins(self.kline_store, self.symbol_store)
+        if FETCH_MODE == 'async':
+            asyncio.run(self._fetch_symbols_async(fetcher))
         else:
-            coins = []
+            fetcher.fetch_klines_data("1 Jan, 2017", None)
+        self.export_symbols()
+
+    def export_symbols(self):
+        # Consumers of 'symbols.json' and 'fetched_symbols.json' keep working when the SQLite store is used
+        if self.symbol_store is not None and SYMBOLS_PATH and FETCHED_SYMBOLS_PATH:
+            self.symbol_store.export_json(SYMBOLS_PATH, FETCHED_SYMBOLS_PATH)
+
+    async def _fetch_symbols_async(self, fetcher):
+        try:
+            await fetcher.fetch_klines_data_async("1 Jan, 2017", None)
+        finally:
+            # The pooled AsyncClient is bound to this event loop
+            await client_pool.close_async()
+
+    def import_archives(self):
+        # Every symbol in the archive directory is backfilled; only the recent gap of each costs REST requests
+        importer = ArchiveImporter(self.kline_store, ARCHIVE_PATH)
+        interval = self.kline_store.base_interval or '1h'
+        imported = importer.import_symbols(importer.symbols(interval), interval, client_pool.get_client())
+        self.logger.info(f"Imported {sum(imported.values())} {interval} klines of {len(imported)} symbols from {ARCHIVE_PATH}")
+
+    def load_coins(self, limit=None):
+        # Only the last `limit` coins are ever picked, so the coin list is streamed instead of decoded whole
+        if self.symbol_store is not None:
+            coins = self.symbol_store.fetched_symbols()
+            return coins[-limit:] if limit else coins
+        return fast_json.tail(self.coins_list, limit)
+
+    def select_coins(self, limit):
+        # With SCAN_RANK_BY set, every fetched coin is screened and the best ranked are picked instead of the latest
+        if not SCAN_RANK_BY:
+            return self.load_coins(limit)
+        scanner = Scanner(self.kline_store)
+        scanner.update(self.load_coins(), client_pool.get_client(), self.start_time)
+        coins = scanner.rank(SCAN_RANK_BY, limit)
+        self.logger.info(f"Scanner picked {', '.join(coins)} by {SCAN_RANK_BY}")
+        # Coin lists are picked from the end, so the best ranked coin goes last
+        return coins[::-1]
+
+    def run_sweep(self):
+        _, start_times, amounts, target_prices, num_coins_grid = load_sweep_configuration()
+        # The client only fills in klines missing from the store before the sweep starts
+        sweep = ParameterSweep(self.kline_store, client_pool.get_client())
+        results = sweep.run(self.select_coins(max(num_coins_grid)), start_times, amounts, target_prices, num_coins_grid)
+        sweep.to_csv(results, SWEEP_RESULTS_PATH)
+        self.logger.info(f"Evaluated {len(results)} scenarios, {int(results['hit'].sum())} reached the target. Results saved to {SWEEP_RESULTS_PATH}")
+
+    def run_portfolio(self):
+        # All coins share one cash balance and are walked on one timeline in memory
+        backtest = PortfolioBacktest(self.kline_store, client_pool.get_client())
+        equity, trades = backtest.run(self.select_coins(self.num_coins), self.start_time, self.amount_usd, self.target_price)
+        ParameterSweep.to_csv(equity, PORTFOLIO_EQUITY_PATH)
+        ParameterSweep.to_csv(trades, PORTFOLIO_TRADES_PATH)
+        if len(equity):
+            self.logger.info(f"Portfolio of {len(trades)} coins ended at {equity['equity'][-1]} USD, {int(trades['hit'].sum())} reached the target. Results saved to {PORTFOLIO_EQUITY_PATH} and {PORTFOLIO_TRADES_PATH}")
 
-        coins = coins[-self.num_coins:]
+    async def start_simulations(self):
+        coins = self.select_coins(self.num_coins)
 
         # Calculate the amount to be used for each coin
         amount_per_coin = self.amount_usd / len(coins)
 
+        # All real-time simulations share a few combined-stream connections, optionally recorded for replay
+        recorder = StreamRecorder(STREAM_RECORD_PATH) if STREAM_RECORD_PATH else None
+        hub = StreamHub(client_pool.get_client(), self.logger, stream_type=FEED_STREAMS[REALTIME_FEED], recorder=recorder)
+
         # Create a list to hold our tasks
         tasks = []
 
         # Create a task for each coin simulation
         for coin in coins:
             self.logger.info(f"Starting simulation for {coin}")
-            simulator = CoinTradeSimulator(coin, self.start_time, amount_per_coin, self.target_price)
+            simulator = CoinTradeSimulator(coin, self.start_time, amount_per_coin, self.target_price, self.kline_store, hub)
             task = asyncio.create_task(simulator.simulate_trade())
             tasks.append(task)
 
         # Run the tasks concurrently
-        await asyncio.gather(*tasks)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await hub.close()
+            await client_pool.close_async()
+            if recorder is not None:
+                recorder.close()
+
+    async def watch_listings(self):
+        fetcher = FindCoins(self.kline_store, self.symbol_store)
+        hub = StreamHub(client_pool.get_client(), self.logger, stream_type=FEED_STREAMS[REALTIME_FEED]) if WATCH_SIMULATE else None
+        tasks = set()
+
+        async def start_simulation(coin):
+            # A start time of today runs the simulation in real time only
+            start_time = int(datetime.today().replace(hour=0, minute=0, second=0, microsecond=0).timestamp() * 1000)
+            self.logger.info(f"Starting simulation for new listing {coin}")
+            simulator = CoinTradeSimulator(coin, start_time, self.amount_usd / self.num_coins, self.target_price, self.kline_store, hub)
+            task = asyncio.create_task(simulator.simulate_trade())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        watcher = ListingWatcher(fetcher.data_fetcher, fetcher.write_batch, start_simulation if WATCH_SIMULATE else None)
+        try:
+            await watcher.run()
+        finally:
+            self.export_symbols()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if hub is not None:
+                await hub.close()
+            await client_pool.close_async()
 
 def main():
     manager = SimulationManager()
+    # Timings and counters are served on METRICS_PORT and/or dumped to METRICS_DUMP_PATH
+    exporters = start_exporters()
+
+    try:
+        if RUN_MODE == 'import':
+            # Backfill the kline store from the public archives before anything asks REST for history
+            manager.logger.info("Importing kline archives")
+            manager.import_archives()
+            return
+
+        # Fetch symbols
+        manager.fetch_symbols()
+
+        if RUN_MODE == 'sweep':
+            # Evaluate the parameter grids against the stored klines
+            manager.logger.info("Starting parameter sweep")
+            manager.run_sweep()
+            return
+
+        if RUN_MODE == 'portfolio':
+            manager.logger.info("Starting portfolio backtest")
+            manager.run_portfolio()
+            return
 
-    # Fetch symbols
-    manager.fetch_symbols()
+        if RUN_MODE == 'watch':
+            # React to new listings as they appear instead of rerunning the batch fetch
+            manager.logger.info("Watching for new listings")
+            asyncio.run(manager.watch_listings())
+            return
 
-    # Start simulations
-    manager.logger.info("Starting simulations")
-    asyncio.run(manager.start_simulations())
+        # Start simulations
+        manager.logger.info("Starting simulations")
+        asyncio.run(manager.start_simulations())
+    finally:
+        for exporter in exporters:
+            exporter.stop()
+        client_pool.close()
+        if manager.symbol_store is not None:
+            manager.symbol_store.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,139 @@
+import io
+import mmap
+import os
+import re
+import warnings
+import zipfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+# The columns of an aggTrades archive row that a replay needs
+AGG_TRADE_DTYPE = np.dtype([('price', 'f8'), ('quantity', 'f8'), ('time', 'i8')])
+# Archive columns: aggregate trade id, price, quantity, first trade id, last trade id, time, is buyer maker, is best match
+AGG_TRADE_COLUMNS = (1, 2, 5)
+CHUNK_SIZE = 4 * 1024 * 1024
+# Spot archives switched from millisecond to microsecond timestamps in 2025; no millisecond time reaches this
+MICROSECOND_THRESHOLD = 10 ** 14
+ARCHIVE_PATTERN = re.compile(r'^(?P<symbol>[A-Z0-9]+)-aggTrades-(?P<year>\d{4})-(?P<month>\d{2})\.(?:zip|csv)$')
+
+
+def _month_end(year, month):
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def archive_files(root, symbol, start_time=0, end_time=None):
+    """
+    Returns the monthly aggTrades archives of a symbol that overlap [start_time, end_time), in month order.
+
+    Archives are looked up as root/SYMBOL/SYMBOL-aggTrades-YYYY-MM.zip, the file names of
+    data.binance.vision. An extracted .csv is read instead of the .zip of the same month.
+    """
+    directory = os.path.join(root, symbol)
+    if not os.path.isdir(directory):
+        return []
+    months = {}
+    for name in os.listdir(directory):
+        match = ARCHIVE_PATTERN.match(name)
+        if match is None or match['symbol'] != symbol:
+            continue
+        year, month = int(match['year']), int(match['month'])
+        start = int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+        if _month_end(year, month) <= int(start_time) or (end_time is not None and start >= int(end_time)):
+            continue
+        if name.endswith('.csv') or (year, month) not in months:
+            months[(year, month)] = os.path.join(directory, name)
+    return [months[key] for key in sorted(months)]
+
+
+def _zip_chunks(path, chunk_size):
+    with zipfile.ZipFile(path) as archive, archive.open(archive.namelist()[0]) as f:
+        tail = b''
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            block = tail + block
+            end = block.rfind(b'\n') + 1
+            tail = block[end:]
+            if end:
+                yield block[:end]
+        if tail:
+            yield tail
+
+
+def _csv_chunks(path, chunk_size):
+    if os.stat(path).st_size == 0:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        position, size = 0, len(mapped)
+        while position < size:
+            limit = position + chunk_size
+            if limit >= size:
+                end = size
+            else:
+                end = mapped.rfind(b'\n', position, limit) + 1
+                if end <= position:
+                    # A row longer than chunk_size grows the block to its line break
+                    end = mapped.find(b'\n', limit) + 1 or size
+            yield mapped[position:end]
+            position = end
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    Yields the rows of an archive in blocks of about chunk_size bytes that end on a line break.
+
+    A .zip is decompressed as a stream and an extracted .csv is memory-mapped, so only one block is held at a time.
+    """
+    if path.endswith('.zip'):
+        return _zip_chunks(path, chunk_size)
+    return _csv_chunks(path, chunk_size)
+
+
+def parse_chunk(chunk):
+    """
+    Parses a block of archive rows into an AGG_TRADE_DTYPE array, with times in milliseconds.
+    """
+    if chunk[:1] and not chunk[:1].isdigit():
+        # Some archives start with a header row
+        chunk = chunk[chunk.find(b'\n') + 1:]
+    with warnings.catch_warnings():
+        # An empty block is not worth a warning
+        warnings.simplefilter('ignore', UserWarning)
+        trades = np.loadtxt(io.BytesIO(chunk), delimiter=',', usecols=AGG_TRADE_COLUMNS, dtype=AGG_TRADE_DTYPE, ndmin=1)
+    times = trades['time']
+    microseconds = times >= MICROSECOND_THRESHOLD
+    if microseconds.any():
+        times[microseconds] //= 1000
+    return trades
+
+
+def iter_agg_trades(root, symbol, start_time=0, end_time=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields the aggregate trades of a symbol in [start_time, end_time) as AGG_TRADE_DTYPE arrays, oldest first.
+
+    The archives are read as a pipeline of generators, month by month and block by block, so
+    any range is replayed in memory bounded by chunk_size, however many trades it holds.
+
+    Args:
+        root (str): The directory holding one directory of monthly archives per symbol.
+        symbol (str): The symbol to replay.
+        start_time (str | int): The first time in milliseconds to include.
+        end_time (int): The time in milliseconds to stop before, or None to read every archive.
+        chunk_size (int): The approximate number of bytes decoded at a time.
+    """
+    start_time = int(start_time)
+    for path in archive_files(root, symbol, start_time, end_time):
+        for chunk in read_chunks(path, chunk_size):
+            trades = parse_chunk(chunk)
+            times = trades['time']
+            first = np.searchsorted(times, start_time) if len(times) and times[0] < start_time else 0
+            last = len(trades)
+            if end_time is not None and len(times) and times[-1] >= end_time:
+                last = np.searchsorted(times, end_time)
+            if first < last:
+                yield trades[first:last]
+            if last < len(trades):
+                return
@@ -0,0 +1,20 @@
+import numpy as np
+
+
+def first_index(mask):
+    """
+    Returns the index of the first True value of a boolean array, or -1 if there is none.
+    """
+    if not len(mask):
+        return -1
+    index = int(np.argmax(mask))
+    return index if mask[index] else -1
+
+
+def first_target_index(quantity, prices, target_value):
+    """
+    Returns the first index where quantity * price reaches target_value, or -1.
+
+    Pass the close column to sell on candle closes, or the high column to sell on intra-candle touches.
+    """
+    return first_index(quantity * prices >= target_value)
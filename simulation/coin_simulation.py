@@ -1,20 +1,26 @@
 from .historical_trade_simulator import HistoricalTradeSimulator
 from .real_time_trade_simulator import RealTimeTradeSimulator
-from config_logs.config import BINANCE_API_KEY, BINANCE_API_SECRET
+from .exit_strategies import parse_exit_strategy
+from config_logs.config import EXIT_STRATEGY, AGG_TRADES_PATH
 from config_logs.logger import setup_logger
-from binance.client import Client
+from find_coins.ClientPool import client_pool
 from datetime import datetime
 
 
 class CoinTradeSimulator:
-    def __init__(self, coin, start_time, amount_usd, target_price):
+    def __init__(self, coin, start_time, amount_usd, target_price, kline_store=None, hub=None):
         self.coin = coin
         self.start_time = start_time
         self.amount_usd = amount_usd
         self.target_price = target_price
+        self.kline_store = kline_store
+        self.hub = hub
+        # One strategy object follows the position from the historical run into the real-time one
+        self.exit_strategy = parse_exit_strategy(EXIT_STRATEGY, target_price) if EXIT_STRATEGY else None
         self.logger = setup_logger()
         try:
-            self.client = Client(BINANCE_API_KEY, BINANCE_API_SECRET)
+            # Every simulator shares one client instead of paying a ping and a connection pool per coin
+            self.client = client_pool.get_client()
         except Exception as e:
             self.logger.error(f"An error occurred while creating the Client for {self.coin}: {e}")
             return
@@ -29,14 +35,14 @@ class CoinTradeSimulator:
 
     async def _simulate_real_time_trade(self):
         try:
-            real_time_simulator = RealTimeTradeSimulator(self.client, self.logger, self.coin, self.target_price, self.amount_usd)
+            real_time_simulator = RealTimeTradeSimulator(self.client, self.logger, self.coin, self.target_price, self.amount_usd, self.hub, exit_strategy=self.exit_strategy)
             await real_time_simulator.simulate_trade()
         except Exception as e:
             self.logger.error(f"An error occurred while simulating real-time trade for {self.coin}: {e}")
 
     async def _simulate_historical_and_real_time_trade(self):
         try:
-            historical_simulator = HistoricalTradeSimulator(self.client, self.logger, self.coin, self.start_time, self.amount_usd, self.target_price)
+            historical_simulator = HistoricalTradeSimulator(self.client, self.logger, self.coin, self.start_time, self.amount_usd, self.target_price, self.kline_store, exit_strategy=self.exit_strategy, trades_root=AGG_TRADES_PATH)
             new_amount_usd = await historical_simulator.simulate_trade()
         except Exception as e:
             self.logger.error(f"An error occurred while simulating historical trade for {self.coin}: {e}")
@@ -44,7 +50,7 @@ class CoinTradeSimulator:
 
         if new_amount_usd is not None:
             try:
-                real_time_simulator = RealTimeTradeSimulator(self.client, self.logger, self.coin, self.target_price, new_amount_usd)
+                real_time_simulator = RealTimeTradeSimulator(self.client, self.logger, self.coin, self.target_price, new_amount_usd, self.hub, exit_strategy=self.exit_strategy)
                 await real_time_simulator.simulate_trade()
             except Exception as e:
                 self.logger.error(f"An error occurred while simulating real-time trade for {self.coin}: {e}")
\ No newline at end of file
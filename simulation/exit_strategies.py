@@ -0,0 +1,299 @@
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+
+from .backtest_kernel import first_index
+
+
+class ExitStrategy(ABC):
+    """
+    The interface of an exit rule that runs both over a whole price series and tick by tick.
+
+    start() is called once at the buy. update() is then called with every price of the live
+    stream, in O(1), while first_exit() scans a whole historical series with NumPy. Both give
+    the same answer for the same prices. first_exit() also leaves the strategy in the state
+    update() would have reached, so a live simulation can continue where a historical one
+    stopped.
+
+    Attributes:
+        name (str): The reason reported when the strategy exits.
+        started (bool): Whether start() has been called.
+
+    Methods:
+        start(buy_price, quantity, buy_time): Resets the state for a new position.
+        update(time, price): Returns the name if the position should be sold at this price, else None.
+        first_exit(times, prices): Returns the index of the first exit price and the name, or (-1, None).
+    """
+
+    name = 'exit'
+
+    def __init__(self):
+        self.started = False
+
+    def start(self, buy_price, quantity, buy_time):
+        self.buy_price = buy_price
+        self.quantity = quantity
+        self.buy_time = buy_time
+        self.started = True
+
+    @abstractmethod
+    def update(self, time, price):
+        pass
+
+    @abstractmethod
+    def exit_mask(self, times, prices):
+        pass
+
+    def advance(self, times, prices):
+        """
+        Moves the state past prices that did not exit. Stateless strategies have nothing to do.
+        """
+
+    def first_exit(self, times, prices):
+        times = np.asarray(times, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        index = first_index(self.exit_mask(times, prices))
+        end = index + 1 if index >= 0 else len(prices)
+        self.advance(times[:end], prices[:end])
+        return index, (self.name if index >= 0 else None)
+
+
+class TargetValue(ExitStrategy):
+    """
+    Sells once the position is worth target_value, the rule the simulators always used.
+    """
+
+    name = 'target'
+
+    def __init__(self, target_value):
+        super().__init__()
+        self.target_value = target_value
+
+    def update(self, time, price):
+        return self.name if self.quantity * price >= self.target_value else None
+
+    def exit_mask(self, times, prices):
+        return self.quantity * prices >= self.target_value
+
+
+class TakeProfit(ExitStrategy):
+    """
+    Sells once the price reaches multiple times the buy price.
+    """
+
+    name = 'take_profit'
+
+    def __init__(self, multiple):
+        super().__init__()
+        self.multiple = multiple
+
+    def update(self, time, price):
+        return self.name if price >= self.buy_price * self.multiple else None
+
+    def exit_mask(self, times, prices):
+        return prices >= self.buy_price * self.multiple
+
+
+class StopLoss(ExitStrategy):
+    """
+    Sells once the price has fallen by fraction below the buy price.
+    """
+
+    name = 'stop_loss'
+
+    def __init__(self, fraction):
+        super().__init__()
+        self.fraction = fraction
+
+    def update(self, time, price):
+        return self.name if price <= self.buy_price * (1 - self.fraction) else None
+
+    def exit_mask(self, times, prices):
+        return prices <= self.buy_price * (1 - self.fraction)
+
+
+class TrailingStop(ExitStrategy):
+    """
+    Sells once the price has fallen by fraction below the highest price since the buy.
+    """
+
+    name = 'trailing_stop'
+
+    def __init__(self, fraction):
+        super().__init__()
+        self.fraction = fraction
+
+    def start(self, buy_price, quantity, buy_time):
+        super().start(buy_price, quantity, buy_time)
+        self.peak = buy_price
+
+    def update(self, time, price):
+        self.peak = max(self.peak, price)
+        return self.name if price <= self.peak * (1 - self.fraction) else None
+
+    def exit_mask(self, times, prices):
+        peaks = np.maximum.accumulate(np.concatenate(([self.peak], prices)))[1:]
+        return prices <= peaks * (1 - self.fraction)
+
+    def advance(self, times, prices):
+        if len(prices):
+            self.peak = max(self.peak, float(prices.max()))
+
+
+class TimeExit(ExitStrategy):
+    """
+    Sells once the position has been held for max_hold milliseconds.
+    """
+
+    name = 'time'
+
+    def __init__(self, max_hold):
+        super().__init__()
+        self.max_hold = max_hold
+
+    def update(self, time, price):
+        return self.name if time - self.buy_time >= self.max_hold else None
+
+    def exit_mask(self, times, prices):
+        return times - self.buy_time >= self.max_hold
+
+
+class MovingAverageCross(ExitStrategy):
+    """
+    Sells when the fast simple moving average crosses below the slow one.
+
+    Running sums over bounded windows keep every update O(1). No exit is taken before slow prices have been seen.
+    """
+
+    name = 'ma_cross'
+
+    def __init__(self, fast, slow):
+        super().__init__()
+        if fast >= slow:
+            raise ValueError("The fast window must be shorter than the slow window")
+        self.fast = fast
+        self.slow = slow
+
+    def start(self, buy_price, quantity, buy_time):
+        super().start(buy_price, quantity, buy_time)
+        self.window = deque(maxlen=self.slow)
+        self.fast_sum = 0.0
+        self.slow_sum = 0.0
+        self.was_above = False
+
+    def update(self, time, price):
+        if len(self.window) == self.slow:
+            self.slow_sum -= self.window[0]
+        if len(self.window) >= self.fast:
+            self.fast_sum -= self.window[-self.fast]
+        self.window.append(price)
+        self.fast_sum += price
+        self.slow_sum += price
+        if len(self.window) < self.slow:
+            return None
+        below = self.fast_sum / self.fast < self.slow_sum / self.slow
+        crossed = below and self.was_above
+        self.was_above = not below
+        return self.name if crossed else None
+
+    def _averages(self, prices):
+        # The window carried over from earlier updates is prepended, so both paths see the same history
+        history = np.concatenate((np.asarray(self.window, dtype=np.float64), prices))
+        sums = np.concatenate(([0.0], np.cumsum(history)))
+        ends = np.arange(len(self.window) + 1, len(history) + 1)
+        fast = (sums[ends] - sums[np.maximum(ends - self.fast, 0)]) / self.fast
+        slow = (sums[ends] - sums[np.maximum(ends - self.slow, 0)]) / self.slow
+        return fast, slow, ends >= self.slow
+
+    def exit_mask(self, times, prices):
+        fast, slow, full = self._averages(prices)
+        below = fast < slow
+        above = full & ~below
+        was_above = np.concatenate(([self.was_above], above[:-1]))
+        return full & below & was_above
+
+    def advance(self, times, prices):
+        if not len(prices):
+            return
+        fast, slow, full = self._averages(prices)
+        if full[-1]:
+            self.was_above = bool(fast[-1] >= slow[-1])
+        self.window.extend(prices[-self.slow:].tolist())
+        self.fast_sum = sum(list(self.window)[-self.fast:])
+        self.slow_sum = sum(self.window)
+
+
+class AnyExit(ExitStrategy):
+    """
+    Combines strategies and exits as soon as any of them does, reporting the first one that fired.
+    """
+
+    def __init__(self, strategies):
+        super().__init__()
+        self.strategies = list(strategies)
+
+    def start(self, buy_price, quantity, buy_time):
+        super().start(buy_price, quantity, buy_time)
+        for strategy in self.strategies:
+            strategy.start(buy_price, quantity, buy_time)
+
+    def update(self, time, price):
+        reason = None
+        # Every strategy sees every price, so stateful ones stay in step
+        for strategy in self.strategies:
+            fired = strategy.update(time, price)
+            reason = reason or fired
+        return reason
+
+    def exit_mask(self, times, prices):
+        mask = np.zeros(len(prices), dtype=bool)
+        for strategy in self.strategies:
+            mask |= strategy.exit_mask(times, prices)
+        return mask
+
+    def first_exit(self, times, prices):
+        times = np.asarray(times, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        indices = [first_index(strategy.exit_mask(times, prices)) for strategy in self.strategies]
+        hits = [(index, position) for position, index in enumerate(indices) if index >= 0]
+        index, position = min(hits) if hits else (-1, None)
+        end = index + 1 if index >= 0 else len(prices)
+        for strategy in self.strategies:
+            strategy.advance(times[:end], prices[:end])
+        return index, (self.strategies[position].name if index >= 0 else None)
+
+
+STRATEGIES = {
+    'target': TargetValue,
+    'take_profit': TakeProfit,
+    'stop_loss': StopLoss,
+    'trailing_stop': TrailingStop,
+    'time': TimeExit,
+    'ma_cross': MovingAverageCross,
+}
+
+
+def parse_exit_strategy(spec, target_price=None):
+    """
+    Builds an exit strategy from a spec like 'take_profit:2,trailing_stop:0.1,ma_cross:5:20'.
+
+    Each comma-separated entry is a strategy name followed by its colon-separated arguments.
+    An empty spec gives the fixed target_price rule.
+
+    Returns:
+        ExitStrategy: The strategy, combined with AnyExit if several are given.
+    """
+    if not spec:
+        return TargetValue(target_price)
+    strategies = []
+    for entry in spec.split(','):
+        name, *args = entry.strip().split(':')
+        if name not in STRATEGIES:
+            raise ValueError(f"Unknown exit strategy {name}")
+        if name == 'target' and not args:
+            args = [target_price]
+        # Window lengths are counts of prices, every other argument is a number
+        convert = int if name == 'ma_cross' else float
+        strategies.append(STRATEGIES[name](*[convert(arg) for arg in args]))
+    return strategies[0] if len(strategies) == 1 else AnyExit(strategies)
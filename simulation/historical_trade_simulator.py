@@ -2,40 +2,115 @@ from binance.client import AsyncClient
 from datetime import datetime
 import asyncio
 
+from find_coins.Klines import Klines
+from find_coins.Metrics import metrics
+from .agg_trades import archive_files, iter_agg_trades
+from .backtest_kernel import first_target_index
+
+_replayed = metrics.counter('agg_trades_replayed_total')
+
 class HistoricalTradeSimulator:
-    def __init__(self, client, logger, symbol, start_time, amount_usd, target_price):
+    def __init__(self, client, logger, symbol, start_time, amount_usd, target_price, kline_store=None, intra_candle=False, exit_strategy=None, trades_root=None):
         self.client = client
         self.logger = logger
         self.symbol = symbol
         self.start_time = start_time
         self.amount_usd = amount_usd
         self.target_price = target_price
+        self.kline_store = kline_store
+        # Sell as soon as a candle's high touches the target instead of waiting for a close above it
+        self.intra_candle = intra_candle
+        # An optional ExitStrategy that replaces the fixed target_price rule, evaluated on candle closes
+        self.exit_strategy = exit_strategy
+        # A directory of monthly aggTrades archives; symbols with archives there are replayed trade by trade
+        self.trades_root = trades_root
+
+    async def _get_klines(self):
+        if self.kline_store is None:
+            klines = await asyncio.to_thread(self.client.get_historical_klines, self.symbol, AsyncClient.KLINE_INTERVAL_1HOUR, self.start_time)
+            # Parsed once into a compact container, so the raw payload can be freed right away
+            return Klines.from_raw(klines)
+
+        # Read from the local store, which only requests the klines it does not have yet
+        return await asyncio.to_thread(self.kline_store.sync, self.client, self.symbol, AsyncClient.KLINE_INTERVAL_1HOUR, self.start_time)
+
+    def _sell_with_strategy(self, klines, quantity, start_price):
+        self.exit_strategy.start(start_price, quantity, int(klines.open_time[0]))
+        index, reason = self.exit_strategy.first_exit(klines.open_time, klines.close)
+        if index < 0:
+            return False
+        sell_date = datetime.fromtimestamp(int(klines.open_time[index]) / 1000)
+        self.logger.info(f"Simulated selling {quantity} {self.symbol} at {float(klines.close[index])} on {sell_date} ({reason})...")
+        return True
+
+    def _simulate_on_trades(self):
+        quantity = None
+        for trades in iter_agg_trades(self.trades_root, self.symbol, self.start_time):
+            prices = trades['price']
+            if quantity is None:
+                start_price = float(prices[0])
+                quantity = self.amount_usd / start_price
+                buy_date = datetime.fromtimestamp(int(trades['time'][0]) / 1000)
+                self.logger.info(f"Simulating buying {quantity} {self.symbol} for {self.amount_usd} USD at {start_price} on {buy_date}...")
+                if self.exit_strategy is not None:
+                    self.exit_strategy.start(start_price, quantity, int(trades['time'][0]))
+            _replayed.inc(len(trades))
+
+            # Every trade is checked, so a target touched within the hour sells at the trade that reached it
+            if self.exit_strategy is not None:
+                index, reason = self.exit_strategy.first_exit(trades['time'], prices)
+            else:
+                index, reason = first_target_index(quantity, prices, self.target_price), None
+            if index >= 0:
+                sell_date = datetime.fromtimestamp(int(trades['time'][index]) / 1000)
+                suffix = f" ({reason})" if reason is not None else ''
+                self.logger.info(f"Simulated selling {quantity} {self.symbol} at {float(prices[index])} on {sell_date}{suffix}...")
+                return
+            last_price = float(prices[-1])
+
+        if quantity is None:
+            self.logger.error(f"The coin {self.symbol} did not exist at the given start time.")
+            return
+        self.logger.info(f"Target price not reached in historical data, continuing with real-time data...")
+        return quantity * last_price
 
     async def simulate_trade(self):
-        klines = await asyncio.to_thread(self.client.get_historical_klines, self.symbol, AsyncClient.KLINE_INTERVAL_1HOUR, self.start_time)
+        if self.trades_root is not None and archive_files(self.trades_root, self.symbol, self.start_time):
+            # Decoding the archives is CPU-bound, so the replay runs off the event loop
+            return await asyncio.to_thread(self._simulate_on_trades)
 
-        if not klines:
+        klines = await self._get_klines()
+
+        if not len(klines):
             self.logger.error(f"The coin {self.symbol} did not exist at the given start time.")
             return
 
-        start_price = float(klines[0][1])
+        start_price = float(klines.open[0])
         quantity = self.amount_usd / start_price
 
-        timestamp = int(klines[0][0])
-        buy_date = datetime.fromtimestamp(timestamp / 1000)
+        buy_date = datetime.fromtimestamp(int(klines.open_time[0]) / 1000)
 
         self.logger.info(f"Simulating buying {quantity} {self.symbol} for {self.amount_usd} USD at {start_price} on {buy_date}...")
 
-        for kline in klines:
-            close_price = float(kline[4])
-            total_value = quantity * close_price  # Calculate the total value of the coins
-            if total_value >= self.target_price:
-                # Convert the timestamp to a datetime object
-                timestamp = int(kline[0])
-                sell_date = datetime.fromtimestamp(timestamp / 1000)
-                self.logger.info(f"Simulated selling {quantity} {self.symbol} at {close_price} on {sell_date}...")
+        if self.exit_strategy is not None:
+            if self._sell_with_strategy(klines, quantity, start_price):
+                return
+        else:
+            if self.intra_candle:
+                index = first_target_index(quantity, klines.high, self.target_price)
+            else:
+                index = first_target_index(quantity, klines.close, self.target_price)
+
+            if index >= 0:
+                if self.intra_candle:
+                    # Filled at the target, or at the open if the candle opened above it
+                    sell_price = max(float(klines.open[index]), self.target_price / quantity)
+                else:
+                    sell_price = float(klines.close[index])
+                sell_date = datetime.fromtimestamp(int(klines.open_time[index]) / 1000)
+                self.logger.info(f"Simulated selling {quantity} {self.symbol} at {sell_price} on {sell_date}...")
                 return
 
         self.logger.info(f"Target price not reached in historical data, continuing with real-time data...")
-        new_amount_usd = quantity * close_price
-        return new_amount_usd
\ No newline at end of file
+        new_amount_usd = quantity * float(klines.close[-1])
+        return new_amount_usd
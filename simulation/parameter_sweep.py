@@ -0,0 +1,181 @@
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from binance.client import Client
+
+from find_coins.KlineStore import to_milliseconds
+
+RESULT_DTYPE = np.dtype([
+    ('symbol', 'U20'),
+    ('start_time', 'i8'),
+    ('amount_usd', 'f8'),
+    ('target_price', 'f8'),
+    ('num_coins', 'i8'),
+    ('buy_time', 'i8'),
+    ('buy_price', 'f8'),
+    ('hit', '?'),
+    ('sell_time', 'i8'),
+    ('time_to_target', 'i8'),
+    ('final_value', 'f8'),
+])
+
+# Rows of the shared block: open time, open and close of every coin laid end to end
+_OPEN_TIME, _OPEN, _CLOSE = range(3)
+_shared = {}
+
+
+def _attach(name, total, offsets):
+    # Runs once per worker: maps the shared kline block instead of copying it into every task
+    block = shared_memory.SharedMemory(name=name)
+    _shared['block'] = block
+    _shared['data'] = np.ndarray((3, total), dtype=np.float64, buffer=block.buf)
+    _shared['offsets'] = offsets
+
+
+def _sweep_coin(task):
+    """
+    Evaluates every parameter combination for one coin against the shared kline block.
+    """
+    coin_index, symbol, rank, start_times, amounts, target_prices, num_coins_grid, coin_count = task
+    begin, end = _shared['offsets'][coin_index], _shared['offsets'][coin_index + 1]
+    data = _shared['data'][:, begin:end]
+    open_time, open_price, close = data[_OPEN_TIME], data[_OPEN], data[_CLOSE]
+    targets = np.asarray(target_prices, dtype=np.float64)
+
+    rows = []
+    for start_time in start_times:
+        start = int(np.searchsorted(open_time, start_time))
+        if start == len(open_time):
+            continue
+        buy_price = open_price[start]
+        # max(quantity * close) == quantity * max(close) for a positive quantity, so one running maximum serves every amount
+        running_max = np.maximum.accumulate(close[start:])
+        for num_coins in num_coins_grid:
+            # Coins are picked like SimulationManager does: the last num_coins of the list
+            if rank >= num_coins:
+                continue
+            for amount_usd in amounts:
+                quantity = amount_usd / min(num_coins, coin_count) / buy_price
+                indices = np.searchsorted(quantity * running_max, targets, side='left')
+                for target_price, index in zip(target_prices, indices):
+                    hit = index < len(running_max)
+                    sell = start + index if hit else len(close) - 1
+                    rows.append((
+                        symbol, start_time, amount_usd, target_price, num_coins,
+                        int(open_time[start]), buy_price, hit, int(open_time[sell]),
+                        int(open_time[sell] - open_time[start]) if hit else -1,
+                        quantity * close[sell],
+                    ))
+    return rows
+
+
+def load_series(kline_store, coins, start_time, client=None, interval=Client.KLINE_INTERVAL_1HOUR):
+    """
+    Reads the klines of every coin from the store, syncing missing klines first if a client is given.
+
+    Returns:
+        dict: The Klines of every coin with at least one kline, keyed by symbol.
+    """
+    series = {}
+    for coin in coins:
+        if client is not None:
+            klines = kline_store.sync(client, coin, interval, start_time)
+        else:
+            klines = kline_store.load(coin, interval)
+        if klines is not None and len(klines):
+            series[coin] = klines
+    return series
+
+
+class ParameterSweep:
+    """
+    A class for evaluating grids of start_time / amount_usd / target_price / num_coins across coins.
+
+    Kline series are read from the local KlineStore and laid out in one shared memory block that
+    every worker of the process pool maps, so the arrays are never copied per task.
+
+    Attributes:
+        kline_store (KlineStore): The local kline store the series are read from.
+        client (Client): An optional Binance client used to sync missing klines; without it only stored klines are used.
+        interval (str): The kline interval to simulate on.
+        processes (int): The number of worker processes, or 1 to run in the calling process.
+
+    Methods:
+        load_series(coins, start_time): Reads the kline series of every coin.
+        run(coins, start_times, amounts, target_prices, num_coins_grid): Returns the results table.
+        to_csv(results, path): Writes the results table to a CSV file.
+    """
+
+    def __init__(self, kline_store, client=None, interval=Client.KLINE_INTERVAL_1HOUR, processes=None):
+        self.kline_store = kline_store
+        self.client = client
+        self.interval = interval
+        self.processes = processes or os.cpu_count()
+
+    def load_series(self, coins, start_time):
+        return load_series(self.kline_store, coins, start_time, self.client, self.interval)
+
+    def run(self, coins, start_times, amounts, target_prices, num_coins_grid):
+        """
+        Evaluates every parameter combination for every coin.
+
+        Args:
+            coins (list): The coin list, in the order SimulationManager picks from.
+            start_times (list): Start times as millisecond timestamps or date strings.
+            amounts (list): Total amounts in USD, split equally between the picked coins.
+            target_prices (list): Position values per coin at which to sell.
+            num_coins_grid (list): Numbers of coins to pick from the end of the coin list.
+
+        Returns:
+            numpy.ndarray: A structured array with one row per coin and combination (see RESULT_DTYPE).
+        """
+        start_times = [to_milliseconds(start_time) for start_time in start_times]
+        picked = coins[-max(num_coins_grid):]
+        series = self.load_series(picked, min(start_times))
+        symbols = [coin for coin in picked if coin in series]
+        if not symbols:
+            return np.empty(0, dtype=RESULT_DTYPE)
+
+        lengths = [len(series[symbol]) for symbol in symbols]
+        offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        total = int(offsets[-1])
+
+        block = shared_memory.SharedMemory(create=True, size=3 * total * 8)
+        try:
+            data = np.ndarray((3, total), dtype=np.float64, buffer=block.buf)
+            for index, symbol in enumerate(symbols):
+                data[_OPEN_TIME, offsets[index]:offsets[index + 1]] = series[symbol].open_time
+                data[_OPEN, offsets[index]:offsets[index + 1]] = series[symbol].open
+                data[_CLOSE, offsets[index]:offsets[index + 1]] = series[symbol].close
+
+            tasks = [
+                (index, symbol, len(picked) - 1 - picked.index(symbol), start_times, amounts, target_prices, num_coins_grid, len(coins))
+                for index, symbol in enumerate(symbols)
+            ]
+            if self.processes == 1:
+                _shared.update(data=data, offsets=offsets)
+                try:
+                    chunks = list(map(_sweep_coin, tasks))
+                finally:
+                    # The module-global view would otherwise keep the block from being closed
+                    _shared.clear()
+            else:
+                with ProcessPoolExecutor(self.processes, initializer=_attach, initargs=(block.name, total, offsets)) as executor:
+                    chunks = list(executor.map(_sweep_coin, tasks))
+        finally:
+            # The view has to be released before the block can be closed
+            data = None
+            block.close()
+            block.unlink()
+
+        return np.array([row for chunk in chunks for row in chunk], dtype=RESULT_DTYPE)
+
+    @staticmethod
+    def to_csv(results, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(results.dtype.names)
+            writer.writerows(results.tolist())
@@ -0,0 +1,156 @@
+import heapq
+
+import numpy as np
+from binance.client import Client
+
+from find_coins.KlineStore import to_milliseconds
+from .backtest_kernel import first_target_index
+from .parameter_sweep import load_series
+
+EQUITY_DTYPE = np.dtype([
+    ('time', 'i8'),
+    ('cash', 'f8'),
+    ('equity', 'f8'),
+])
+
+TRADE_DTYPE = np.dtype([
+    ('symbol', 'U20'),
+    ('buy_time', 'i8'),
+    ('buy_price', 'f8'),
+    ('quantity', 'f8'),
+    ('hit', '?'),
+    ('sell_time', 'i8'),
+    ('sell_price', 'f8'),
+    ('final_value', 'f8'),
+])
+
+# Buys fill at a candle's open and sells at its close, so buys sort first within a candle
+_BUY, _SELL = 0, 1
+
+
+def align_series(series, symbols):
+    """
+    Lays the kline series of several coins out on one shared timeline.
+
+    Args:
+        series (dict): Klines keyed by symbol, as returned by load_series.
+        symbols (list): The symbols to align, in column order.
+
+    Returns:
+        tuple: The sorted union of open times (T,), and the open and close prices as (T, N) arrays
+        holding NaN wherever a coin has no candle.
+    """
+    times = np.unique(np.concatenate([series[symbol].open_time for symbol in symbols]))
+    open_prices = np.full((len(times), len(symbols)), np.nan)
+    closes = np.full((len(times), len(symbols)), np.nan)
+    for column, symbol in enumerate(symbols):
+        rows = np.searchsorted(times, series[symbol].open_time)
+        open_prices[rows, column] = series[symbol].open
+        closes[rows, column] = series[symbol].close
+    return times, open_prices, closes
+
+
+def forward_fill(values):
+    """
+    Replaces NaN values by the last valid value above them in the same column. Leading NaN values are kept.
+    """
+    rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+
+class PortfolioBacktest:
+    """
+    A class for backtesting all selected coins as one portfolio on a single timeline.
+
+    The kline series are aligned into one matrix and walked as a time-ordered heap of buy and
+    sell events that share one cash balance. Each coin is bought at the open of its first candle
+    after the start time with the cash divided by the number of coins still to buy, so proceeds
+    of earlier sales are reinvested. It is sold at the first close at which the position is worth
+    target_price. The equity curve is then computed for every candle of the timeline at once.
+
+    Attributes:
+        kline_store (KlineStore): The local kline store the series are read from.
+        client (Client): An optional Binance client used to sync missing klines; without it only stored klines are used.
+        interval (str): The kline interval to simulate on.
+
+    Methods:
+        run(coins, start_time, amount_usd, target_price): Returns the equity curve and the trades.
+    """
+
+    def __init__(self, kline_store, client=None, interval=Client.KLINE_INTERVAL_1HOUR):
+        self.kline_store = kline_store
+        self.client = client
+        self.interval = interval
+
+    def run(self, coins, start_time, amount_usd, target_price):
+        """
+        Backtests the coins as one portfolio.
+
+        Args:
+            coins (list): The symbols to trade.
+            start_time (int | str): The start time as a millisecond timestamp or date string.
+            amount_usd (float): The starting cash in USD.
+            target_price (float): The position value per coin at which to sell.
+
+        Returns:
+            tuple: The equity curve (see EQUITY_DTYPE) and one trade per bought coin (see TRADE_DTYPE).
+        """
+        start_time = to_milliseconds(start_time)
+        series = load_series(self.kline_store, coins, start_time, self.client, self.interval)
+        symbols = [coin for coin in coins if coin in series]
+        if not symbols:
+            return np.empty(0, dtype=EQUITY_DTYPE), np.empty(0, dtype=TRADE_DTYPE)
+
+        times, open_prices, closes = align_series(series, symbols)
+        start = int(np.searchsorted(times, start_time))
+        times, open_prices, closes = times[start:], open_prices[start:], closes[start:]
+        count = len(times)
+
+        events = []
+        for column in range(len(symbols)):
+            listed = np.flatnonzero(~np.isnan(open_prices[:, column]))
+            if len(listed):
+                heapq.heappush(events, (int(listed[0]), _BUY, column))
+
+        cash = float(amount_usd)
+        to_buy = len(events)
+        cash_delta = np.zeros(count)
+        holdings = np.zeros((count, len(symbols)))
+        trades = {}
+        while events:
+            index, kind, column = heapq.heappop(events)
+            if kind == _BUY:
+                spend = cash / to_buy
+                to_buy -= 1
+                cash -= spend
+                buy_price = open_prices[index, column]
+                quantity = spend / buy_price
+                cash_delta[index] -= spend
+                holdings[index, column] += quantity
+                trades[column] = [symbols[column], int(times[index]), buy_price, quantity, False, -1, np.nan, np.nan]
+                sell = first_target_index(quantity, closes[index:, column], target_price)
+                if sell >= 0:
+                    heapq.heappush(events, (index + sell, _SELL, column))
+                continue
+            trade = trades[column]
+            proceeds = trade[3] * closes[index, column]
+            cash += proceeds
+            cash_delta[index] += proceeds
+            holdings[index, column] -= trade[3]
+            trade[4:] = [True, int(times[index]), closes[index, column], proceeds]
+
+        # Holdings change only at events, so the positions of every candle are a cumulative sum
+        positions = np.cumsum(holdings, axis=0)
+        prices = np.nan_to_num(forward_fill(closes))
+        cash_curve = amount_usd + np.cumsum(cash_delta)
+        equity = np.zeros(count, dtype=EQUITY_DTYPE)
+        equity['time'] = times
+        equity['cash'] = cash_curve
+        equity['equity'] = cash_curve + (positions * prices).sum(axis=1)
+
+        for column, trade in trades.items():
+            if not trade[4]:
+                # Unsold positions are valued at the last close
+                trade[7] = trade[3] * prices[-1, column]
+        return equity, np.array([tuple(trade) for trade in trades.values()], dtype=TRADE_DTYPE)
@@ -0,0 +1,64 @@
+import time
+
+# Real-time feed modes and the stream suffix each one subscribes to
+FEED_STREAMS = {
+    'trade': 'trade',
+    'aggTrade': 'aggTrade',
+    'bookTicker': 'bookTicker',
+    'kline_1s': 'kline_1s',
+}
+
+
+def extract_price(feed, msg):
+    """
+    Returns the latest price and the highest price carried by a message of the given feed.
+
+    bookTicker messages are priced at the best bid, the price a position could be sold at.
+    kline_1s messages report their close as the latest price and their high as the highest price.
+    """
+    if feed == 'bookTicker':
+        price = float(msg['b'])
+        return price, price
+    if feed == 'kline_1s':
+        kline = msg['k']
+        return float(kline['c']), float(kline['h'])
+    price = float(msg['p'])
+    return price, price
+
+
+def open_socket(bm, feed, symbol):
+    """
+    Opens the single-symbol socket of a feed mode on a BinanceSocketManager.
+    """
+    if feed == 'aggTrade':
+        return bm.aggtrade_socket(symbol)
+    if feed == 'bookTicker':
+        return bm.symbol_book_ticker_socket(symbol)
+    if feed == 'kline_1s':
+        return bm.kline_socket(symbol, interval='1s')
+    return bm.trade_socket(symbol)
+
+
+class PriceCoalescer:
+    """
+    Lets through at most one price per tick interval, so per-message work is only a comparison.
+
+    Attributes:
+        interval (float): The tick interval in seconds; 0 lets every price through.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._last_tick = float('-inf')
+
+    def update(self, price, now=None):
+        """
+        Returns True if a tick interval has passed since the last price let through.
+        """
+        if self.interval <= 0:
+            return True
+        now = time.monotonic() if now is None else now
+        if now - self._last_tick < self.interval:
+            return False
+        self._last_tick = now
+        return True
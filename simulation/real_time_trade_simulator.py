@@ -1,40 +1,109 @@
 from binance import AsyncClient, BinanceSocketManager
 from datetime import datetime
 import asyncio
+import time
+
+from config_logs.config import REALTIME_FEED, PRICE_TICK_INTERVAL
+from config_logs.logger import SAMPLED
+from find_coins.Metrics import metrics
+from .price_feed import extract_price, open_socket, PriceCoalescer
+
+_messages = metrics.counter('stream_messages_total', source='socket')
 
 class RealTimeTradeSimulator:
-    def __init__(self, client, logger, symbol, target_price, amount_usd):
+    def __init__(self, client, logger, symbol, target_price, amount_usd, hub=None, feed=REALTIME_FEED, tick_interval=PRICE_TICK_INTERVAL, recorder=None, exit_strategy=None):
         self.client = client
         self.logger = logger
         self.symbol = symbol
         self.target_price = target_price
         self.amount_usd = amount_usd
-        self.bm = BinanceSocketManager(self.client)
+        # A shared StreamHub replaces the per-symbol trade socket when given
+        self.hub = hub
+        self.bm = BinanceSocketManager(self.client) if hub is None else None
+        # One of 'trade', 'aggTrade', 'bookTicker' or 'kline_1s'
+        self.feed = feed
+        self.coalescer = PriceCoalescer(tick_interval)
+        # An optional StreamRecorder that keeps the raw socket messages for later replay
+        self.recorder = recorder
+        # An optional ExitStrategy that replaces the fixed target_price rule; one already started by a historical run carries on
+        self.exit_strategy = exit_strategy
+        self._stopped = False
+        self._done = None
+
+    async def _stop(self):
+        self._stopped = True
+        if self._done is not None:
+            self.hub.unsubscribe(self.symbol, self.process_message)
+            self._done.set()
+        elif getattr(self, 'ts', None) is not None:
+            await self.ts.__aexit__(None, None, None)
+
+    def _buy(self, current_price):
+        self.quantity = self.amount_usd / current_price
+        self.logger.info(f"Simulating buying {self.quantity} {self.symbol} for {self.amount_usd} USD at {current_price}...")
+        if self.exit_strategy is not None and not self.exit_strategy.started:
+            self.exit_strategy.start(current_price, self.quantity, int(time.time() * 1000))
 
     async def process_message(self, msg):
-        if msg['e'] != 'error':
-            current_price = float(msg['p'])
-            total_value = self.quantity * current_price  # Calculate the total value of the coins
-            self.logger.info(f"Current price of {self.symbol}: {current_price}")
-            if total_value >= self.target_price:
+        if msg.get('e') != 'error':
+            current_price, high_price = extract_price(self.feed, msg)
+            if self.exit_strategy is not None:
+                # Strategies see the latest price of every message, timed by the event time where there is one
+                reason = self.exit_strategy.update(msg.get('E') or int(time.time() * 1000), current_price)
+                if reason is not None:
+                    self.logger.info(f"Simulating selling {self.quantity} {self.symbol} at {current_price} on {datetime.now()} ({reason})...")
+                    await self._stop()
+                elif self.coalescer.update(current_price):
+                    self.logger.info(f"Current price of {self.symbol}: {current_price}", extra=SAMPLED)
+            # Every message is checked against the target, only the logging is coalesced per tick
+            elif self.quantity * high_price >= self.target_price:
                 sell_date = datetime.now()
-                self.logger.info(f"Simulating selling {self.quantity} {self.symbol} at {current_price} on {sell_date}...")
-                await self.ts.__aexit__(None, None, None)
+                self.logger.info(f"Simulating selling {self.quantity} {self.symbol} at {high_price} on {sell_date}...")
+                await self._stop()
+            elif self.coalescer.update(current_price):
+                self.logger.info(f"Current price of {self.symbol}: {current_price}", extra=SAMPLED)
         else:
             self.logger.error(msg['m'])
+            if self._done is not None:
+                # The hub only sends errors once it has given up on the connection, so the simulation ends here
+                self._stopped = True
+                self._done.set()
+
+    async def _replay(self, source):
+        async for msg in source:
+            if not hasattr(self, 'quantity'):
+                # Offline replays buy at the first recorded price instead of asking the REST API
+                current_price, _ = extract_price(self.feed, msg)
+                self._buy(current_price)
+                continue
+            await self.process_message(msg)
+            if self._stopped:
+                break
+
+    async def simulate_trade(self, source=None):
+        if source is not None:
+            # Replay recorded messages, e.g. from a ReplaySource, instead of a live socket
+            await self._replay(source)
+            return
 
-    async def simulate_trade(self):
         # Get the current price of the coin
         ticker = await asyncio.to_thread(self.client.get_symbol_ticker, symbol=self.symbol)
         current_price = float(ticker['price'])
 
         # Calculate the quantity that can be bought with the amount_usd at the current price
-        self.quantity = self.amount_usd / current_price
+        self._buy(current_price)
 
-        self.logger.info(f"Simulating buying {self.quantity} {self.symbol} for {self.amount_usd} USD at {current_price}...")
+        if self.hub is not None:
+            self._done = asyncio.Event()
+            self.hub.subscribe(self.symbol, self.process_message)
+            await self._done.wait()
+            return
 
-        self.ts = self.bm.trade_socket(self.symbol)
+        self.ts = open_socket(self.bm, self.feed, self.symbol)
         await self.ts.__aenter__()
-        while True:
+        while not self._stopped:
             res = await self.ts.recv()
-            await self.process_message(res)
\ No newline at end of file
+            _messages.inc()
+            if self.recorder is not None:
+                self.recorder.record(res)
+            await self.process_message(res)
@@ -0,0 +1,169 @@
+import asyncio
+
+from binance import BinanceSocketManager
+
+from config_logs.config import STREAMS_PER_CONNECTION
+from find_coins.Metrics import metrics
+
+_messages = metrics.counter('stream_messages_total', source='hub')
+
+
+class StreamHub:
+    """
+    A class for sharing a few combined-stream websocket connections between many per-symbol simulators.
+
+    Symbols are subscribed with a callback and connected in shards of at most streams_per_connection
+    streams over Binance combined streams. Every message is dispatched to the callbacks of its symbol.
+    Subscriptions made within connect_delay seconds of each other share one connection, and a
+    connection is closed once none of its symbols has subscribers left.
+
+    A connection that fails, or whose socket reports an error, is reopened up to max_reconnects
+    times in a row. After that every subscriber of its symbols is sent an error message, in the
+    shape Binance uses, and unsubscribed, so the simulators waiting on it can finish. A callback
+    that raises is logged and does not affect the other subscribers.
+
+    Attributes:
+        bm (BinanceSocketManager): The socket manager used to open the combined streams.
+        logger (Logger): The logger for stream errors.
+        stream_type (str): The stream suffix subscribed for every symbol, e.g. 'trade'.
+        streams_per_connection (int): The maximum number of streams per connection.
+        recorder (StreamRecorder): An optional recorder every received message is saved to.
+        max_reconnects (int): The number of times in a row a failed connection is reopened.
+
+    Methods:
+        subscribe(symbol, callback): Registers an async callback for a symbol's messages.
+        unsubscribe(symbol, callback): Removes a callback.
+        dispatch(msg): Passes a combined-stream message to the callbacks of its symbol.
+        close(): Closes every connection.
+    """
+
+    def __init__(self, client, logger, stream_type='trade', streams_per_connection=STREAMS_PER_CONNECTION, connect_delay=0.5, recorder=None, max_reconnects=5, reconnect_delay=1.0):
+        self.bm = BinanceSocketManager(client)
+        self.logger = logger
+        self.stream_type = stream_type
+        self.streams_per_connection = streams_per_connection
+        self.connect_delay = connect_delay
+        self.recorder = recorder
+        self.max_reconnects = max_reconnects
+        self.reconnect_delay = reconnect_delay
+        self._subscribers = {}
+        self._pending = []
+        self._connect_task = None
+        self._connections = {}
+
+    def stream_name(self, symbol):
+        return f"{symbol.lower()}@{self.stream_type}"
+
+    @property
+    def connection_count(self):
+        return len(self._connections)
+
+    def subscribe(self, symbol, callback):
+        callbacks = self._subscribers.setdefault(symbol, [])
+        callbacks.append(callback)
+        if len(callbacks) == 1 and not self._is_connected(symbol):
+            self._pending.append(symbol)
+            if self._connect_task is None or self._connect_task.done():
+                self._connect_task = asyncio.create_task(self._connect_pending())
+
+    def unsubscribe(self, symbol, callback):
+        callbacks = self._subscribers.get(symbol, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self._subscribers.pop(symbol, None)
+            # An idle stream may never deliver the message that would let its connection notice, so it is cancelled here
+            for task, symbols in list(self._connections.items()):
+                if symbol in symbols and not self._has_subscribers(symbols) and task is not asyncio.current_task():
+                    task.cancel()
+
+    def _has_subscribers(self, symbols):
+        return any(symbol in self._subscribers for symbol in symbols)
+
+    def _is_connected(self, symbol):
+        return any(symbol in symbols for symbols in self._connections.values())
+
+    async def _connect_pending(self):
+        # Wait briefly so that simulators starting together share connections
+        await asyncio.sleep(self.connect_delay)
+        symbols, self._pending = self._pending, []
+        for start in range(0, len(symbols), self.streams_per_connection):
+            shard = symbols[start:start + self.streams_per_connection]
+            task = asyncio.create_task(self._run_connection(shard))
+            self._connections[task] = shard
+
+    async def _stream(self, symbols):
+        """
+        Reads one socket until no symbol has subscribers left.
+
+        Returns:
+            tuple: Whether any message was dispatched, and the error the socket reported, if any.
+        """
+        received = False
+        socket = self.bm.multiplex_socket([self.stream_name(symbol) for symbol in symbols])
+        # One connection carries many symbols, so allow a deeper queue than a single trade socket
+        socket.MAX_QUEUE_SIZE = 100 * len(symbols)
+        async with socket as ts:
+            while self._has_subscribers(symbols):
+                msg = await ts.recv()
+                _messages.inc()
+                if self.recorder is not None:
+                    self.recorder.record(msg)
+                if 'stream' not in msg:
+                    # Errors are not wrapped in a combined-stream envelope and mean the socket stopped reading
+                    return received, msg.get('m', msg)
+                received = True
+                await self.dispatch(msg)
+        return received, None
+
+    async def _run_connection(self, symbols):
+        failures = 0
+        try:
+            while self._has_subscribers(symbols):
+                try:
+                    received, error = await self._stream(symbols)
+                except Exception as e:
+                    received, error = False, e
+                if error is None:
+                    return
+                # A connection that delivered messages before failing starts a new run of attempts
+                failures = 1 if received else failures + 1
+                if failures > self.max_reconnects:
+                    await self._fail(symbols, error)
+                    return
+                self.logger.error(f"Stream connection of {len(symbols)} symbols failed, reconnecting ({failures}/{self.max_reconnects}): {error}")
+                await asyncio.sleep(self.reconnect_delay * failures)
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+
+    async def _fail(self, symbols, error):
+        self.logger.error(f"Stream connection of {len(symbols)} symbols failed after {self.max_reconnects} reconnects, closing it: {error}")
+        msg = {'e': 'error', 'm': f"Stream connection lost: {error}"}
+        for symbol in symbols:
+            for callback in self._subscribers.pop(symbol, ()):
+                await self._call(symbol, callback, msg)
+
+    async def _call(self, symbol, callback, msg):
+        try:
+            await callback(msg)
+        except Exception as e:
+            self.logger.error(f"A subscriber of {symbol} failed on a message: {e}")
+
+    async def dispatch(self, msg):
+        if 'stream' not in msg:
+            # Errors from the socket are not wrapped in a combined-stream envelope
+            self.logger.error(msg.get('m', msg))
+            return
+        symbol = msg['stream'].split('@', 1)[0].upper()
+        for callback in list(self._subscribers.get(symbol, ())):
+            await self._call(symbol, callback, msg['data'])
+
+    async def close(self):
+        self._subscribers.clear()
+        tasks = list(self._connections)
+        if self._connect_task is not None:
+            tasks.append(self._connect_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._connections.clear()
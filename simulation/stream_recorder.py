@@ -0,0 +1,87 @@
+import asyncio
+import gzip
+import time
+
+from find_coins import fast_json
+
+
+class StreamRecorder:
+    """
+    A class for saving raw stream messages to an append-only, gzip-compressed JSON-lines file.
+
+    Each line holds the receive time in milliseconds and the raw message. Opening an existing
+    file appends a new gzip member, so recordings can be resumed without rewriting anything.
+
+    Methods:
+        record(msg, received_at): Appends one message.
+        close(): Flushes and closes the file.
+    """
+
+    def __init__(self, path, compresslevel=6):
+        self.path = path
+        self._file = gzip.open(path, 'at', encoding='utf-8', compresslevel=compresslevel)
+
+    def record(self, msg, received_at=None):
+        received_at = int(time.time() * 1000) if received_at is None else received_at
+        self._file.write(fast_json.dumps([received_at, msg]))
+        self._file.write('\n')
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ReplaySource:
+    """
+    An async iterator that feeds recorded stream messages back in their original order.
+
+    Attributes:
+        path (str): The recording to replay.
+        speed (float): 1.0 replays at wall-clock speed, 2.0 twice as fast; None replays as fast as possible.
+        symbol (str): If set, only this symbol's messages are replayed from a combined-stream recording, unwrapped.
+        count (int): The number of messages replayed so far.
+    """
+
+    def __init__(self, path, speed=None, symbol=None):
+        self.path = path
+        self.speed = speed
+        self.stream_prefix = f"{symbol.lower()}@" if symbol else None
+        self.count = 0
+
+    def _messages(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                received_at, msg = fast_json.loads(line)
+                if self.stream_prefix is not None:
+                    if not msg.get('stream', '').startswith(self.stream_prefix):
+                        continue
+                    msg = msg['data']
+                yield received_at, msg
+
+    async def __aiter__(self):
+        first_received_at = None
+        started = time.monotonic()
+        for received_at, msg in self._messages():
+            if self.speed is not None:
+                if first_received_at is None:
+                    first_received_at = received_at
+                delay = (received_at - first_received_at) / 1000 / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self.count += 1
+            yield msg
+
+
+async def replay_throughput(simulator, source):
+    """
+    Replays a recording through a RealTimeTradeSimulator and returns the processed messages per second.
+    """
+    started = time.perf_counter()
+    await simulator.simulate_trade(source)
+    elapsed = time.perf_counter() - started
+    return source.count / elapsed if elapsed > 0 else float('inf')
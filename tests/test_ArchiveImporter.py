@@ -0,0 +1,171 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import TestCase
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+
+from find_coins.ArchiveImporter import ArchiveImporter, ChecksumError, parse_archive, verify_checksum
+from find_coins.KlineStore import KlineStore
+
+HOUR = 3600000
+# 2021-08-01, 2021-09-01 and 2021-10-01 in milliseconds
+AUGUST = 1627776000000
+SEPTEMBER = 1630454400000
+OCTOBER = 1633046400000
+
+
+def rows(start, count, price=1.0, scale=1):
+    return ''.join(
+        f"{(start + index * HOUR) * scale},{price},{price + 1},{price - 0.5},{price + 0.5},10,{(start + (index + 1) * HOUR - 1) * scale},15,3,5,7,0\n"
+        for index in range(count)
+    )
+
+
+class TestArchiveImporter(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.archives = os.path.join(self.root, 'spot')
+        self.store = KlineStore(os.path.join(self.root, 'klines'), base_interval='1h')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, symbol, period, text, kind='monthly', checksum=None):
+        directory = os.path.join(self.archives, kind, 'klines', symbol, '1h')
+        os.makedirs(directory, exist_ok=True)
+        name = f"{symbol}-1h-{period}"
+        path = os.path.join(directory, name + '.zip')
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(name + '.csv', text)
+        if checksum is not None:
+            digest = hashlib.sha256(open(path, 'rb').read()).hexdigest() if checksum == 'valid' else checksum
+            with open(path + '.CHECKSUM', 'w') as f:
+                f.write(f"{digest}  {name}.zip\n")
+        return path
+
+    def test_parse_archive_skips_header_and_converts_microseconds(self):
+        path = self.write('BTCUSDT', '2025-01', 'open_time,open,high,low,close,volume,close_time,a,b,c,d,e\n' + rows(AUGUST, 2, scale=1000))
+        data = parse_archive(path)
+        self.assertEqual(data['open_time'].tolist(), [AUGUST, AUGUST + HOUR])
+        self.assertEqual(data['close_time'].tolist(), [AUGUST + HOUR - 1, AUGUST + 2 * HOUR - 1])
+        self.assertEqual(data['high'].tolist(), [2.0, 2.0])
+
+    def test_verify_checksum(self):
+        self.assertFalse(verify_checksum(self.write('BTCUSDT', '2021-08', rows(AUGUST, 1))))
+        self.assertTrue(verify_checksum(self.write('BTCUSDT', '2021-08', rows(AUGUST, 1), checksum='valid')))
+        with self.assertRaises(ChecksumError):
+            verify_checksum(self.write('BTCUSDT', '2021-08', rows(AUGUST, 1), checksum='0' * 64))
+
+    def test_daily_archives_only_fill_months_without_a_monthly_one(self):
+        self.write('BTCUSDT', '2021-08', rows(AUGUST, 1))
+        self.write('BTCUSDT', '2021-08-05', rows(AUGUST, 1), kind='daily')
+        self.write('BTCUSDT', '2021-09-01', rows(SEPTEMBER, 1), kind='daily')
+        self.write('ETHUSDT', '2021-09-02', rows(SEPTEMBER, 1), kind='daily')
+        importer = ArchiveImporter(self.store, self.archives, processes=1)
+        self.assertEqual(importer.symbols('1h'), ['BTCUSDT', 'ETHUSDT'])
+        self.assertEqual([os.path.basename(path) for path in importer.archive_files('BTCUSDT', '1h')],
+                         ['BTCUSDT-1h-2021-08.zip', 'BTCUSDT-1h-2021-09-01.zip'])
+
+    def test_import_on_a_process_pool(self):
+        self.write('BTCUSDT', '2021-09', rows(SEPTEMBER, 720, price=2.0))
+        self.write('BTCUSDT', '2021-08', rows(AUGUST, 744))
+        self.write('ETHUSDT', '2021-09', rows(SEPTEMBER, 24))
+        importer = ArchiveImporter(self.store, self.archives, processes=2)
+        self.assertEqual(importer.import_symbols(['BTCUSDT', 'ETHUSDT', 'XRPUSDT'], '1h'), {'BTCUSDT': 1464, 'ETHUSDT': 24})
+        series = self.store.load('BTCUSDT', '1h')
+        self.assertEqual(series.start, AUGUST)
+        self.assertEqual(series.open_time[-1], OCTOBER - HOUR)
+        self.assertEqual(series.open[744], 2.0)
+        # Derived intervals come from the imported base series
+        self.assertEqual(len(self.store.load('BTCUSDT', '1d')), 61)
+
+    def test_import_stops_at_a_bad_archive_and_fills_the_gap_over_rest(self):
+        self.write('BTCUSDT', '2021-08', rows(AUGUST, 744), checksum='valid')
+        self.write('BTCUSDT', '2021-09', rows(SEPTEMBER, 720), checksum='0' * 64)
+        self.write('BTCUSDT', '2021-10', rows(OCTOBER, 24))
+        client = MagicMock()
+        client.get_historical_klines.return_value = [
+            [SEPTEMBER - HOUR + index * HOUR, '3', '4', '2', '3', '1', SEPTEMBER + index * HOUR - 1] for index in range(3)
+        ]
+        importer = ArchiveImporter(self.store, self.archives, processes=1)
+        self.assertEqual(importer.import_symbols(['BTCUSDT'], '1h', client), {'BTCUSDT': 746})
+        # Only the klines from the last archived one onwards are requested
+        client.get_historical_klines.assert_called_once_with('BTCUSDT', '1h', SEPTEMBER - HOUR)
+        series = self.store.load('BTCUSDT', '1h')
+        self.assertEqual(series.open_time[-1], SEPTEMBER + HOUR)
+        self.assertEqual(series.close[743], 3.0)
+
+    def test_import_keeps_newer_stored_klines(self):
+        self.store.append('BTCUSDT', '1h', [[SEPTEMBER, '5', '6', '4', '5', '1', SEPTEMBER + HOUR - 1]], SEPTEMBER)
+        self.write('BTCUSDT', '2021-08', rows(AUGUST, 744))
+        ArchiveImporter(self.store, self.archives, processes=1).import_symbols(['BTCUSDT'], '1h')
+        series = self.store.load('BTCUSDT', '1h')
+        self.assertEqual(len(series), 745)
+        self.assertEqual(series.start, AUGUST)
+        self.assertEqual(series.close[-1], 5.0)
+
+    def test_gap_to_the_stored_series_is_fetched_over_rest(self):
+        # The store starts in October and the archives end in August; September comes from REST
+        self.store.append('BTCUSDT', '1h', [[OCTOBER, '5', '6', '4', '5', '1', OCTOBER + HOUR - 1]], OCTOBER)
+        self.write('BTCUSDT', '2021-08', rows(AUGUST, 744))
+        client = MagicMock()
+        client.get_historical_klines.side_effect = [
+            [[SEPTEMBER + index * HOUR, '3', '4', '2', '3', '1', SEPTEMBER + (index + 1) * HOUR - 1] for index in range(720)],
+            [],
+        ]
+        ArchiveImporter(self.store, self.archives, processes=1).import_symbols(['BTCUSDT'], '1h', client)
+        self.assertEqual(client.get_historical_klines.call_args_list[0].args, ('BTCUSDT', '1h', SEPTEMBER, OCTOBER - 1))
+        series = self.store.load('BTCUSDT', '1h')
+        self.assertEqual(len(series), 744 + 720 + 1)
+        self.assertTrue((series.open_time[1:] - series.open_time[:-1] == HOUR).all())
+
+    def test_archives_that_leave_a_gap_are_not_merged(self):
+        self.store.append('BTCUSDT', '1h', [[OCTOBER, '5', '6', '4', '5', '1', OCTOBER + HOUR - 1]], OCTOBER)
+        self.write('BTCUSDT', '2021-08', rows(AUGUST, 744))
+        importer = ArchiveImporter(self.store, self.archives, processes=1)
+        self.assertEqual(importer.import_symbols(['BTCUSDT'], '1h'), {'BTCUSDT': 0})
+        self.assertEqual(len(self.store.load('BTCUSDT', '1h')), 1)
+
+    def test_in_flight_symbols_are_bounded_by_the_window(self):
+        submitted, in_flight = [], []
+
+        class Executor:
+            def __init__(self, processes):
+                pass
+
+            def submit(self, fn, path):
+                submitted.append(path)
+                future = Future()
+                future.set_result(fn(path))
+                return future
+
+            def shutdown(self, cancel_futures=False):
+                pass
+
+        for index in range(6):
+            self.write(f'S{index}USDT', '2021-08', rows(AUGUST, 24))
+        importer = ArchiveImporter(self.store, self.archives, processes=2, window=2)
+        finish = importer._finish
+
+        def recording_finish(symbol, *args):
+            in_flight.append(len(submitted) - len(in_flight))
+            return finish(symbol, *args)
+        importer._finish = recording_finish
+        with patch('find_coins.ArchiveImporter.concurrent.futures.ProcessPoolExecutor', Executor):
+            imported = importer.import_symbols(importer.symbols('1h'), '1h')
+        self.assertEqual(imported, {f'S{index}USDT': 24 for index in range(6)})
+        self.assertLessEqual(max(in_flight), 2)
+
+    def test_store_cache_stays_bounded_during_an_import(self):
+        store = KlineStore(os.path.join(self.root, 'bounded'), base_interval='1h', cache_size=2)
+        symbols = [f"COIN{index}USDT" for index in range(5)]
+        for symbol in symbols:
+            self.write(symbol, '2021-08', rows(AUGUST, 24))
+        imported = ArchiveImporter(store, self.archives, processes=1).import_symbols(symbols, '1h')
+        self.assertEqual(imported, {symbol: 24 for symbol in symbols})
+        self.assertEqual(len(store._cache), 2)
+        # Evicted series are read back from disk
+        self.assertEqual(len(store.load('COIN0USDT', '1h')), 24)
@@ -0,0 +1,58 @@
+import asyncio
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from find_coins.ClientPool import ClientPool
+
+
+class TestClientPool(TestCase):
+    def setUp(self):
+        patcher = patch('find_coins.ClientPool.RateLimitedClient')
+        self.client_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = ClientPool('key', 'secret', pool_size=8)
+
+    def test_client_is_lazy_and_shared(self):
+        # No client is created until one is asked for, then every caller gets the same one
+        self.client_class.assert_not_called()
+        client = self.pool.get_client()
+        self.assertIs(self.pool.get_client(), client)
+        self.client_class.assert_called_once_with('key', 'secret')
+
+    def test_connection_pool_size(self):
+        # The HTTPS adapter allows pool_size concurrent connections
+        client = self.pool.get_client()
+        adapter = client.session.mount.call_args.args[1]
+        self.assertEqual(adapter._pool_maxsize, 8)
+
+    def test_close(self):
+        # Closing drops the client, so the next caller gets a fresh one
+        client = self.pool.get_client()
+        self.pool.close()
+        client.close_connection.assert_called_once()
+        self.pool.get_client()
+        self.assertEqual(self.client_class.call_count, 2)
+
+
+class TestClientPoolAsync(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.async_client = MagicMock()
+        self.async_client.close_connection = AsyncMock()
+        patcher = patch('find_coins.ClientPool.RateLimitedAsyncClient.create', AsyncMock(return_value=self.async_client))
+        self.create = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = ClientPool(pool_size=8)
+
+    async def test_async_client_is_shared(self):
+        # Concurrent callers on one event loop share a single AsyncClient
+        clients = await asyncio.gather(*(self.pool.get_async_client() for _ in range(5)))
+        self.assertTrue(all(client is self.async_client for client in clients))
+        self.create.assert_awaited_once()
+
+    async def test_close_async(self):
+        # Closing the async client leaves the pool ready to create a new one
+        await self.pool.get_async_client()
+        await self.pool.close_async()
+        self.async_client.close_connection.assert_awaited_once()
+        await self.pool.get_async_client()
+        self.assertEqual(self.create.await_count, 2)
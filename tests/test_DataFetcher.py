@@ -1,18 +1,24 @@
 import os
 import json
+import asyncio
 from datetime import datetime
-from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, AsyncMock, patch
 
 from binance.client import Client
 from find_coins.DataFetcher import DataFetcher
+from find_coins.SymbolUniverse import SymbolUniverse
 
 class TestDataFetcher(TestCase):
     def setUp(self):
         self.client = MagicMock()
         self.logger = MagicMock()
-        self.fetcher = DataFetcher()
-        self.fetcher.client = self.client
+        patcher = patch('find_coins.DataFetcher.FETCHED_SYMBOLS_PATH', 'missing_fetched_symbols.json')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # The resolver is built over the client given here, so requests reach the mock
+        self.fetcher = DataFetcher(kline_store=MagicMock(), client=self.client, universe=SymbolUniverse(path=None))
+        self.fetcher.kline_store.load.return_value = None
         self.fetcher.logger = self.logger
 
     def test_fetch_kline_symbol_already_fetched(self):
@@ -26,22 +32,24 @@ class TestDataFetcher(TestCase):
     def test_fetch_kline_successful(self):
         # Simulate the case where fetching kline data is successful
         symbol_info = ('BTCUSDT', 'BTC', 'USDT')
-        start_date = datetime.now()
-        klines = [[1620000000000, '50000', '55000', '49000', '52000']]
-        self.client.get_historical_klines.return_value = klines
+        start_date = 1610000000000
+        klines = [[1620000000000, '50000', '55000', '49000', '52000', '10', 1620086399999]]
+        self.client.get_klines.return_value = klines
         result = self.fetcher.fetch_kline(symbol_info, start_date)
-        expected_result = ('BTCUSDT', start_date, '50000', '55000', '49000', '52000')
+        date = datetime.fromtimestamp(1620000000)
+        expected_result = (symbol_info, date, '50000', '55000', '49000', '52000')
         self.assertEqual(result, expected_result)
-        self.logger.info.assert_called_with("Fetching klines for symbol BTCUSDT")
-        self.logger.info.assert_called_with("First kline for symbol BTCUSDT is at <datetime>")
+        self.client.get_klines.assert_called_once_with(symbol='BTCUSDT', interval=Client.KLINE_INTERVAL_1DAY, startTime=start_date, limit=1)
+        self.logger.info.assert_any_call("Fetching klines for symbol BTCUSDT")
+        self.logger.info.assert_called_with(f"First kline for symbol BTCUSDT is at {date}")
         self.assertIn('BTCUSDT', self.fetcher.fetched_symbols)
 
     def test_fetch_kline_exception(self):
         # Simulate the case where an exception occurs during fetching kline data
         symbol_info = ('BTCUSDT', 'BTC', 'USDT')
-        start_date = datetime.now()
+        start_date = 1610000000000
         error_message = "Connection error"
-        self.client.get_historical_klines.side_effect = Exception(error_message)
+        self.client.get_klines.side_effect = Exception(error_message)
         result = self.fetcher.fetch_kline(symbol_info, start_date)
         self.assertIsNone(result)
         self.logger.error.assert_called_with(f"Could not fetch klines for symbol BTCUSDT: {error_message}")
@@ -51,8 +59,8 @@ class TestDataFetcher(TestCase):
         symbol_limit = None
         exchange_info = {
             'symbols': [
-                {'symbol': 'BTCUSDT', 'baseAsset': 'BTC', 'quoteAsset': 'USDT'},
-                {'symbol': 'ETHUSDT', 'baseAsset': 'ETH', 'quoteAsset': 'USDT'}
+                {'symbol': 'BTCUSDT', 'status': 'TRADING', 'baseAsset': 'BTC', 'quoteAsset': 'USDT'},
+                {'symbol': 'ETHUSDT', 'status': 'TRADING', 'baseAsset': 'ETH', 'quoteAsset': 'USDT'}
             ]
         }
         self.client.get_exchange_info.return_value = exchange_info
@@ -68,8 +76,8 @@ class TestDataFetcher(TestCase):
         symbol_limit = 1
         exchange_info = {
             'symbols': [
-                {'symbol': 'BTCUSDT', 'baseAsset': 'BTC', 'quoteAsset': 'USDT'},
-                {'symbol': 'ETHUSDT', 'baseAsset': 'ETH', 'quoteAsset': 'USDT'}
+                {'symbol': 'BTCUSDT', 'status': 'TRADING', 'baseAsset': 'BTC', 'quoteAsset': 'USDT'},
+                {'symbol': 'ETHUSDT', 'status': 'TRADING', 'baseAsset': 'ETH', 'quoteAsset': 'USDT'}
             ]
         }
         self.client.get_exchange_info.return_value = exchange_info
@@ -85,5 +93,61 @@ class TestDataFetcher(TestCase):
         result = self.fetcher.fetch_all_klines(symbols, start_date)
         expected_result = [('BTCUSDT', start_date, '50000', '55000', '49000', '52000')]
         self.assertEqual(result, expected_result)
-        self.fetcher.fetch_kline.assert_called_with(('BTCUSDT', 'BTC', 'USDT'), start_date)
-        self.fetcher.fetch_kline.assert_called_with(('ETHUSDT', 'ETH', 'USDT'), start_date)
\ No newline at end of file
+        self.fetcher.fetch_kline.assert_any_call(('BTCUSDT', 'BTC', 'USDT'), start_date)
+        self.fetcher.fetch_kline.assert_any_call(('ETHUSDT', 'ETH', 'USDT'), start_date)
+
+class TestDataFetcherAsync(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.pool = MagicMock()
+        patcher = patch('find_coins.DataFetcher.client_pool', self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('find_coins.DataFetcher.FETCHED_SYMBOLS_PATH', 'missing_fetched_symbols.json')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.async_client = MagicMock()
+        self.async_client.close_connection = AsyncMock()
+        self.pool.get_async_client = AsyncMock(return_value=self.async_client)
+        self.fetcher = DataFetcher(kline_store=MagicMock())
+        self.fetcher.kline_store.load.return_value = None
+        self.fetcher.logger = MagicMock()
+
+    async def test_iter_klines_async(self):
+        # Results are yielded as they arrive and listed symbols are marked as fetched
+        async def get_klines(symbol, **params):
+            await asyncio.sleep(0.01 if symbol == 'BTCUSDT' else 0)
+            if symbol == 'XRPUSDT':
+                return []
+            return [[1620000000000, '50000', '55000', '49000', '52000', '10', 1620086399999]]
+        self.async_client.get_klines = get_klines
+        symbols = [('BTCUSDT', 'BTC', 'USDT'), ('ETHUSDT', 'ETH', 'USDT'), ('XRPUSDT', 'XRP', 'USDT')]
+        result = [symbol_date async for symbol_date in self.fetcher.iter_klines_async(symbols, 0, concurrency=2)]
+        self.assertEqual([symbol_date[0][0] for symbol_date in result], ['ETHUSDT', 'BTCUSDT'])
+        self.assertEqual(result[0][2:], ('50000', '55000', '49000', '52000'))
+        self.assertEqual(self.fetcher.fetched_symbols, {'BTCUSDT', 'ETHUSDT'})
+        # The pooled client stays open for later callers
+        self.async_client.close_connection.assert_not_awaited()
+
+    async def test_iter_klines_async_skips_fetched(self):
+        # Already fetched symbols make no requests
+        self.async_client.get_klines = AsyncMock()
+        self.fetcher.fetched_symbols = {'BTCUSDT'}
+        result = [symbol_date async for symbol_date in self.fetcher.iter_klines_async([('BTCUSDT', 'BTC', 'USDT')], 0)]
+        self.assertEqual(result, [])
+        self.async_client.get_klines.assert_not_awaited()
+
+    async def test_iter_outcomes_async(self):
+        # Failures are yielded with their error instead of being logged away
+        async def get_klines(symbol, **params):
+            if symbol == 'BADUSDT':
+                raise TimeoutError('timed out')
+            if symbol == 'XRPUSDT':
+                return []
+            return [[1620000000000, '50000', '55000', '49000', '52000', '10', 1620086399999]]
+        self.async_client.get_klines = get_klines
+        symbols = [('BTCUSDT', 'BTC', 'USDT'), ('XRPUSDT', 'XRP', 'USDT'), ('BADUSDT', 'BAD', 'USDT')]
+        outcomes = {symbol_info[0]: (symbol_date, error) async for symbol_info, symbol_date, error in self.fetcher.iter_outcomes_async(symbols, 0)}
+        self.assertEqual(outcomes['BTCUSDT'][0][2:], ('50000', '55000', '49000', '52000'))
+        self.assertEqual(outcomes['XRPUSDT'], (None, None))
+        self.assertIsInstance(outcomes['BADUSDT'][1], TimeoutError)
+        self.assertEqual(self.fetcher.fetched_symbols, {'BTCUSDT'})
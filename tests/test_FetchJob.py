@@ -0,0 +1,155 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from binance.exceptions import BinanceAPIException
+
+from find_coins.FetchJob import FetchJob, is_permanent, PENDING, DONE, NOT_LISTED, RETRY, FAILED
+from find_coins.find_coins import FindCoins
+
+SYMBOLS = [('AAAUSDT', 'AAA', 'USDT'), ('BBBUSDT', 'BBB', 'USDT'), ('CCCUSDT', 'CCC', 'USDT'), ('DDDUSDT', 'DDD', 'USDT')]
+
+
+def api_error(status_code):
+    response = MagicMock(status_code=status_code, text='{"code": -1121, "msg": "Invalid symbol."}')
+    return BinanceAPIException(response, status_code, response.text)
+
+
+def symbol_date(symbol_info):
+    return (symbol_info, datetime(2021, 1, 1), 1.0, 2.0, 0.5, 1.5)
+
+
+class TestFetchJob(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'jobs', 'fetch_job.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_error_classification(self):
+        # Client errors are permanent; bans, server errors and network errors are transient
+        self.assertTrue(is_permanent(api_error(400)))
+        self.assertFalse(is_permanent(api_error(429)))
+        self.assertFalse(is_permanent(api_error(418)))
+        self.assertFalse(is_permanent(api_error(502)))
+        self.assertFalse(is_permanent(ConnectionError('reset')))
+
+    def test_states_survive_a_checkpoint(self):
+        job = FetchJob.create(self.path, '1 Jan, 2017', SYMBOLS)
+        job.mark('AAAUSDT', DONE)
+        job.mark('BBBUSDT', NOT_LISTED)
+        job.mark_error('CCCUSDT', api_error(400))
+        job.mark_error('DDDUSDT', TimeoutError('timed out'))
+        job.checkpoint()
+
+        loaded = FetchJob.load(self.path)
+        self.assertEqual(loaded.counts(), {PENDING: 0, DONE: 1, NOT_LISTED: 1, RETRY: 1, FAILED: 1})
+        self.assertEqual(loaded.unfinished(), [('DDDUSDT', 'DDD', 'USDT')])
+        self.assertEqual(loaded.failed(), ['CCCUSDT'])
+        self.assertEqual(loaded.states['DDDUSDT']['error'], 'timed out')
+        self.assertIsNone(FetchJob.load(os.path.join(self.root, 'missing.json')))
+
+    def test_transient_failures_stop_after_max_attempts(self):
+        job = FetchJob(self.path, '1 Jan, 2017', SYMBOLS[:1], max_attempts=2)
+        job.mark_error('AAAUSDT', TimeoutError())
+        self.assertFalse(job.is_complete())
+        job.mark_error('AAAUSDT', TimeoutError())
+        self.assertTrue(job.is_complete())
+        self.assertEqual(job.failed(), [])
+
+
+class TestFindCoinsJobs(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'fetch_job.json')
+        patcher = patch('find_coins.find_coins.DataFetcher')
+        self.addCleanup(patcher.stop)
+        self.data_fetcher = patcher.start().return_value
+        self.data_fetcher.fetched_symbols = set()
+        self.data_fetcher.get_symbols.return_value = SYMBOLS
+        self.find_coins = FindCoins(job_path=self.path)
+        self.find_coins.write_batch = MagicMock()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_restart_fetches_only_unfinished_symbols(self):
+        # The first run is interrupted at CCC; whatever finished before is written and checkpointed
+        def interrupted(symbol_info, start_date):
+            if symbol_info[0] == 'CCCUSDT':
+                raise KeyboardInterrupt
+            return symbol_date(symbol_info), None
+        self.data_fetcher.fetch_outcome.side_effect = interrupted
+        with self.assertRaises(KeyboardInterrupt):
+            self.find_coins.fetch_klines_data('1 Jan, 2017', None)
+        written = {date[0][0] for call in self.find_coins.write_batch.call_args_list for date in call.args[0]}
+        job = FetchJob.load(self.path)
+        self.assertEqual({symbol for symbol, entry in job.states.items() if entry['state'] == DONE}, written)
+        self.assertIn(('CCCUSDT', 'CCC', 'USDT'), job.unfinished())
+
+        # The restart resumes the job and only requests what is left
+        self.data_fetcher.fetch_outcome.side_effect = lambda symbol_info, start_date: (symbol_date(symbol_info), None)
+        self.data_fetcher.fetch_outcome.reset_mock()
+        self.data_fetcher.get_symbols.reset_mock()
+        self.find_coins.fetch_klines_data('1 Jan, 2017', None)
+        requested = {call.args[0][0] for call in self.data_fetcher.fetch_outcome.call_args_list}
+        self.assertEqual(requested, {symbol for symbol, base, quote in SYMBOLS} - written)
+        self.assertTrue(FetchJob.load(self.path).is_complete())
+        self.data_fetcher.get_symbols.assert_not_called()
+
+    def test_interrupt_cancels_queued_symbols(self):
+        # Symbols still queued when the run is interrupted are not requested, and stay unfinished
+        symbols = [(f"S{index:03d}USDT", f"S{index:03d}", 'USDT') for index in range(200)]
+        self.data_fetcher.get_symbols.return_value = symbols
+
+        def interrupted(symbol_info, start_date):
+            if symbol_info[0] == 'S003USDT':
+                raise KeyboardInterrupt
+            return symbol_date(symbol_info), None
+        self.data_fetcher.fetch_outcome.side_effect = interrupted
+        with self.assertRaises(KeyboardInterrupt):
+            self.find_coins.fetch_klines_data('1 Jan, 2017', None)
+        self.assertLess(self.data_fetcher.fetch_outcome.call_count, 100)
+        self.assertGreater(len(FetchJob.load(self.path).unfinished()), 100)
+
+    def test_without_a_job_path_the_fetch_runs_as_one_batch(self):
+        self.data_fetcher.fetch_all_klines.return_value = [symbol_date(SYMBOLS[0])]
+        find_coins = FindCoins(job_path=None)
+        find_coins.write_batch = MagicMock()
+        find_coins.fetch_klines_data('1 Jan, 2017', None)
+        self.data_fetcher.fetch_all_klines.assert_called_once_with(SYMBOLS, '1 Jan, 2017')
+        find_coins.write_batch.assert_called_once_with([symbol_date(SYMBOLS[0])])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_new_job_leaves_out_fetched_and_permanently_failed_symbols(self):
+        job = FetchJob.create(self.path, '1 Jan, 2017', SYMBOLS)
+        job.mark('AAAUSDT', DONE)
+        job.mark_error('BBBUSDT', api_error(400))
+        job.mark('CCCUSDT', NOT_LISTED)
+        job.mark('DDDUSDT', DONE)
+        job.checkpoint()
+        self.data_fetcher.fetched_symbols = {'AAAUSDT', 'DDDUSDT'}
+        new_job = self.find_coins.open_job('1 Jan, 2017', None)
+        self.assertEqual(new_job.symbols, [('CCCUSDT', 'CCC', 'USDT')])
+
+    def test_async_job_records_every_outcome(self):
+        async def outcomes(symbols, start_date, concurrency):
+            results = {
+                'AAAUSDT': (symbol_date(SYMBOLS[0]), None),
+                'BBBUSDT': (None, None),
+                'CCCUSDT': (None, api_error(400)),
+                'DDDUSDT': (None, TimeoutError('timed out')),
+            }
+            for symbol_info in symbols:
+                yield (symbol_info,) + results[symbol_info[0]]
+        self.data_fetcher.iter_outcomes_async = outcomes
+        asyncio.run(self.find_coins.fetch_klines_data_async('1 Jan, 2017', None))
+        job = FetchJob.load(self.path)
+        self.assertEqual(job.counts(), {PENDING: 0, DONE: 1, NOT_LISTED: 1, RETRY: 1, FAILED: 1})
+        self.find_coins.write_batch.assert_called_once_with([symbol_date(SYMBOLS[0])])
+
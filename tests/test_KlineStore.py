@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from find_coins.KlineStore import KlineStore
+
+HOUR = 3600000
+
+
+def make_klines(start, count, step=HOUR, price=1.0):
+    return [
+        [start + i * step, str(price + i), str(price + i + 0.5), str(price + i - 0.5), str(price + i + 0.25), "10", start + (i + 1) * step - 1, "0", 0, "0", "0", "0"]
+        for i in range(count)
+    ]
+
+
+class TestKlineStore(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = KlineStore(self.root)
+        self.client = MagicMock()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_sync_fetches_full_range_once(self):
+        # The first sync downloads the range and stores it as columns
+        self.client.get_historical_klines.return_value = make_klines(1630000000000, 3)
+        columns = self.store.sync(self.client, "BTCUSDT", "1h", "1630000000000")
+        self.client.get_historical_klines.assert_called_once_with("BTCUSDT", "1h", 1630000000000)
+        self.assertEqual(columns['open_time'].tolist(), [1630000000000, 1630003600000, 1630007200000])
+        self.assertEqual(columns['close'].tolist(), [1.25, 2.25, 3.25])
+
+    def test_sync_is_incremental_and_persistent(self):
+        # A rerun only asks for klines from the last stored open time
+        self.client.get_historical_klines.return_value = make_klines(1630000000000, 3)
+        self.store.sync(self.client, "BTCUSDT", "1h", 1630000000000)
+
+        reopened = KlineStore(self.root)
+        self.client.get_historical_klines.reset_mock()
+        self.client.get_historical_klines.return_value = make_klines(1630007200000, 2, price=3.0)
+        columns = reopened.sync(self.client, "BTCUSDT", "1h", 1630000000000)
+        self.client.get_historical_klines.assert_called_once_with("BTCUSDT", "1h", 1630007200000)
+        self.assertEqual(len(columns['open_time']), 4)
+        self.assertEqual(columns['open'].tolist(), [1.0, 2.0, 3.0, 4.0])
+
+    def test_sync_skips_requests_while_last_kline_is_open(self):
+        # No request is made while the last stored kline has not closed yet
+        start = int(time.time() * 1000) // HOUR * HOUR
+        self.client.get_historical_klines.return_value = make_klines(start, 1)
+        self.store.sync(self.client, "BTCUSDT", "1h", start)
+        self.client.get_historical_klines.reset_mock()
+        columns = self.store.sync(self.client, "BTCUSDT", "1h", start)
+        self.client.get_historical_klines.assert_not_called()
+        self.assertEqual(len(columns['open_time']), 1)
+
+    def test_sync_backfills_earlier_start(self):
+        # An earlier start fetches only the missing head of the series
+        self.client.get_historical_klines.return_value = make_klines(1630007200000, 2)
+        self.store.sync(self.client, "BTCUSDT", "1h", 1630007200000)
+        self.client.get_historical_klines.side_effect = [make_klines(1630000000000, 2), make_klines(1630010800000, 1)]
+        columns = self.store.sync(self.client, "BTCUSDT", "1h", 1630000000000)
+        self.assertEqual(self.client.get_historical_klines.call_args_list[1].args, ("BTCUSDT", "1h", 1630000000000, 1630007199999))
+        self.assertEqual(columns['open_time'].tolist(), [1630000000000, 1630003600000, 1630007200000, 1630010800000])
+
+    def test_sync_returns_range_from_start(self):
+        # Stored klines before the requested start are not returned
+        self.client.get_historical_klines.return_value = make_klines(1630000000000, 5)
+        self.store.sync(self.client, "BTCUSDT", "1h", 1630000000000)
+        self.client.get_historical_klines.return_value = []
+        columns = self.store.sync(self.client, "BTCUSDT", "1h", 1630007200000)
+        self.assertEqual(columns['open_time'].tolist(), [1630007200000, 1630010800000, 1630014400000])
@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+import numpy as np
+
+from find_coins.Klines import Klines, KLINE_DTYPE
+
+HOUR = 3600000
+
+
+def make_klines(start, count):
+    return [
+        [start + i * HOUR, str(1.0 + i), str(1.5 + i), str(0.5 + i), str(1.25 + i), "10", start + (i + 1) * HOUR - 1, "0", 0, "0", "0", "0"]
+        for i in range(count)
+    ]
+
+
+class TestKlines(TestCase):
+    def setUp(self):
+        self.klines = Klines.from_raw(make_klines(1630000000000, 4), start=1630000000000)
+
+    def test_from_raw(self):
+        # The payload is parsed once into typed columns of 56 bytes per kline
+        self.assertEqual(len(self.klines), 4)
+        self.assertEqual(self.klines.open_time.tolist(), [1630000000000 + i * HOUR for i in range(4)])
+        self.assertEqual(self.klines.close.tolist(), [1.25, 2.25, 3.25, 4.25])
+        self.assertEqual(self.klines.volume.tolist(), [10.0] * 4)
+        self.assertEqual(self.klines.nbytes, 4 * KLINE_DTYPE.itemsize)
+        self.assertEqual(KLINE_DTYPE.itemsize, 56)
+
+    def test_short_rows_are_refused(self):
+        # A row cut before the close time would look like a stale series, so it is an error
+        with self.assertRaises(ValueError):
+            Klines.from_raw([[1, "2", "3", "1", "2.5"]])
+        self.assertEqual(len(Klines.from_raw([])), 0)
+
+    def test_views_are_zero_copy(self):
+        # Columns and slices share the buffer of the container
+        self.assertTrue(np.shares_memory(self.klines.close, self.klines.data))
+        tail = self.klines[2:]
+        self.assertTrue(np.shares_memory(tail.data, self.klines.data))
+        self.assertEqual(tail.start, 1630000000000)
+        self.assertEqual(tail['open'].tolist(), [3.0, 4.0])
+
+    def test_columns_round_trip(self):
+        # Columns written out can be read back into an equal container
+        klines = Klines.from_columns(self.klines.columns(), self.klines.start)
+        self.assertEqual(klines.data.tolist(), self.klines.data.tolist())
+        joined = Klines.concatenate((self.klines[:1], self.klines[3:]))
+        self.assertEqual(joined.open.tolist(), [1.0, 4.0])
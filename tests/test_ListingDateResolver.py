@@ -0,0 +1,43 @@
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from find_coins.KlineStore import KlineStore
+from find_coins.ListingDateResolver import ListingDateResolver
+
+DAY_KLINE = [1630022400000, "40000", "41000", "39000", "40500", "10", 1630108799999, "0", 0, "0", "0", "0"]
+
+
+class TestListingDateResolver(TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        self.resolver = ListingDateResolver(self.client)
+
+    def test_resolve_with_single_request(self):
+        # The first daily kline is found with one limit=1 request from epoch 0
+        self.client.get_klines.return_value = [DAY_KLINE]
+        result = self.resolver.resolve(('BTCUSDT', 'BTC', 'USDT'))
+        expected_result = (('BTCUSDT', 'BTC', 'USDT'), datetime.fromtimestamp(1630022400), "40000", "41000", "39000", "40500")
+        self.assertEqual(result, expected_result)
+        self.client.get_klines.assert_called_once_with(symbol='BTCUSDT', interval='1d', startTime=0, limit=1)
+
+    def test_resolve_not_listed(self):
+        # A symbol without klines resolves to None
+        self.client.get_klines.return_value = []
+        self.assertIsNone(self.resolver.resolve(('BTCUSDT', 'BTC', 'USDT')))
+        self.client.get_klines.assert_called_once_with(symbol='BTCUSDT', interval='1d', startTime=0, limit=1)
+
+    def test_resolve_from_kline_store(self):
+        # A stored series synced from before the listing answers without requests
+        root = tempfile.mkdtemp()
+        try:
+            store = KlineStore(root)
+            store.append('BTCUSDT', '1d', [DAY_KLINE], 0)
+            result = ListingDateResolver(self.client, store).resolve(('BTCUSDT', 'BTC', 'USDT'))
+            self.assertEqual(result[1], datetime.fromtimestamp(1630022400))
+            self.assertEqual(result[2:], ("40000.00000000", "41000.00000000", "39000.00000000", "40500.00000000"))
+            self.client.get_klines.assert_not_called()
+        finally:
+            shutil.rmtree(root)
@@ -0,0 +1,60 @@
+from datetime import datetime
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, AsyncMock
+
+from find_coins.ListingWatcher import ListingWatcher
+
+
+def tickers(*symbols):
+    return [{'symbol': symbol, 'price': '1.0'} for symbol in symbols]
+
+
+def symbol_info(symbol, status='TRADING'):
+    return {'symbol': symbol, 'status': status, 'baseAsset': symbol[:-4], 'quoteAsset': 'USDT'}
+
+
+class TestListingWatcher(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.get_all_tickers = AsyncMock(return_value=tickers('BTCUSDT'))
+        self.client.get_exchange_info_for_symbols = AsyncMock()
+        self.data_fetcher = MagicMock()
+        self.data_fetcher.fetched_symbols = set()
+
+        async def fetch_kline_async(resolver, info, start_date):
+            return (info, datetime(2024, 1, 1), 1.0, 2.0, 0.5, 1.5)
+        self.data_fetcher.fetch_kline_async = fetch_kline_async
+        self.write_batch = MagicMock()
+        self.on_listing = AsyncMock()
+        self.watcher = ListingWatcher(self.data_fetcher, self.write_batch, self.on_listing, poll_interval=0)
+        self.watcher.logger = MagicMock()
+
+    async def test_unchanged_symbols_cost_one_request(self):
+        # Without new symbols only the ticker is requested
+        await self.watcher.snapshot(self.client)
+        self.assertEqual(await self.watcher.poll(self.client, MagicMock()), [])
+        self.client.get_exchange_info_for_symbols.assert_not_awaited()
+        self.write_batch.assert_not_called()
+
+    async def test_new_trading_symbol(self):
+        # A new TRADING symbol is written and reported
+        await self.watcher.snapshot(self.client)
+        self.client.get_all_tickers.return_value = tickers('BTCUSDT', 'NEWUSDT')
+        self.client.get_exchange_info_for_symbols.return_value = {'symbols': [symbol_info('NEWUSDT')]}
+        result = await self.watcher.poll(self.client, MagicMock())
+        self.assertEqual([symbol_date[0][0] for symbol_date in result], ['NEWUSDT'])
+        self.client.get_exchange_info_for_symbols.assert_awaited_once_with(['NEWUSDT'])
+        self.write_batch.assert_called_once_with(result)
+        self.on_listing.assert_awaited_once_with('NEWUSDT')
+        self.assertEqual(self.watcher.pending, set())
+
+    async def test_symbol_waits_until_trading(self):
+        # A symbol that is not trading yet is checked again on the next poll
+        await self.watcher.snapshot(self.client)
+        self.client.get_all_tickers.return_value = tickers('BTCUSDT', 'NEWUSDT')
+        self.client.get_exchange_info_for_symbols.return_value = {'symbols': [symbol_info('NEWUSDT', 'PRE_TRADING')]}
+        self.assertEqual(await self.watcher.poll(self.client, MagicMock()), [])
+        self.assertEqual(self.watcher.pending, {'NEWUSDT'})
+        self.client.get_exchange_info_for_symbols.return_value = {'symbols': [symbol_info('NEWUSDT')]}
+        self.assertEqual(len(await self.watcher.poll(self.client, MagicMock())), 1)
+        self.on_listing.assert_awaited_once_with('NEWUSDT')
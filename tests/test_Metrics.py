@@ -0,0 +1,108 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import urllib.request
+from unittest import TestCase
+
+from find_coins import fast_json
+from find_coins.Metrics import MetricsRegistry, MetricsServer, MetricsDumper, Histogram, metrics
+from find_coins.decorators import timer_decorator
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_quantiles(self):
+        # Quantiles land within a bucket of the true value and never outside the observed range
+        histogram = Histogram()
+        for value in range(1, 10001):
+            histogram.observe(value * 1000)
+        self.assertAlmostEqual(histogram.quantile(0.5), 5000 * 1000, delta=0.2 * 5000 * 1000)
+        self.assertAlmostEqual(histogram.quantile(0.99), 9900 * 1000, delta=0.2 * 9900 * 1000)
+        self.assertLessEqual(histogram.quantile(1.0), 10000 * 1000)
+        self.assertIsNone(Histogram().quantile(0.5))
+
+    def test_metrics_are_keyed_by_name_and_labels(self):
+        self.registry.counter('requests_total', endpoint='/a').inc()
+        self.registry.counter('requests_total', endpoint='/a').inc(2)
+        self.registry.counter('requests_total', endpoint='/b').inc()
+        counters = self.registry.snapshot()['counters']
+        self.assertEqual(counters, {'requests_total{endpoint="/a"}': 3, 'requests_total{endpoint="/b"}': 1})
+
+    def test_reset_keeps_held_metrics_registered(self):
+        counter = self.registry.counter('messages_total')
+        counter.inc(5)
+        self.registry.reset()
+        counter.inc()
+        self.assertEqual(self.registry.snapshot()['counters'], {'messages_total': 1})
+
+    def test_prometheus_text(self):
+        self.registry.counter('bytes_total').inc(10)
+        with self.registry.timer('call_seconds', function='f'):
+            pass
+        text = self.registry.render_prometheus()
+        self.assertIn('# TYPE bytes_total counter\nbytes_total 10\n', text)
+        self.assertIn('# TYPE call_seconds histogram', text)
+        self.assertIn('call_seconds_bucket{function="f",le="+Inf"} 1', text)
+        self.assertIn('call_seconds_count{function="f"} 1', text)
+
+    def test_reads_are_consistent_while_observing(self):
+        # Snapshots taken while other threads observe never see a histogram halfway through an update
+        histogram = self.registry.histogram('busy_seconds')
+        stop = threading.Event()
+
+        def observe():
+            while not stop.is_set():
+                histogram.observe(1500)
+                self.registry.counter('busy_total', worker=threading.get_ident()).inc()
+
+        workers = [threading.Thread(target=observe) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        try:
+            for _ in range(200):
+                copy = histogram.copy()
+                self.assertEqual(sum(copy.counts), copy.count)
+                self.registry.snapshot()
+                self.registry.render_prometheus()
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+    def test_timer_decorator_records_sync_and_async_calls(self):
+        @timer_decorator
+        def work():
+            return 1
+
+        @timer_decorator
+        async def work_async():
+            return 2
+
+        self.assertEqual(work(), 1)
+        self.assertEqual(asyncio.run(work_async()), 2)
+        histograms = metrics.snapshot()['histograms']
+        self.assertEqual(histograms[f'function_duration_seconds{{function="{work.__qualname__}"}}']['count'], 1)
+        self.assertEqual(histograms[f'function_duration_seconds{{function="{work_async.__qualname__}"}}']['count'], 1)
+
+    def test_server_and_dumper(self):
+        self.registry.counter('messages_total').inc(3)
+        server = MetricsServer(self.registry, 0, host='127.0.0.1').start()
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/metrics') as response:
+                self.assertIn('messages_total 3', response.read().decode())
+            with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/metrics.json') as response:
+                self.assertEqual(fast_json.loads(response.read())['counters'], {'messages_total': 3})
+        finally:
+            server.stop()
+
+        root = tempfile.mkdtemp()
+        try:
+            path = os.path.join(root, 'metrics.json')
+            MetricsDumper(self.registry, path, interval=3600).start().stop()
+            self.assertEqual(fast_json.load(path)['counters'], {'messages_total': 3})
+        finally:
+            shutil.rmtree(root)
@@ -0,0 +1,83 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from binance.exceptions import BinanceAPIException
+
+from find_coins.BinanceClient import RateLimitedClient
+from find_coins.RateLimiter import WeightRateLimiter, endpoint_weight, backoff_delay
+
+
+def api_exception(status_code, headers=None):
+    response = MagicMock()
+    response.headers = headers or {}
+    return BinanceAPIException(response, status_code, '{"code": -1003, "msg": "Too many requests"}')
+
+
+class TestWeightRateLimiter(TestCase):
+    def test_endpoint_weight(self):
+        # Weight depends on the endpoint and on whether a symbol is given
+        self.assertEqual(endpoint_weight('https://api.binance.com/api/v3/exchangeInfo'), 20)
+        self.assertEqual(endpoint_weight('https://api.binance.com/api/v3/klines', {'symbol': 'BTCUSDT'}), 2)
+        self.assertEqual(endpoint_weight('https://api.binance.com/api/v3/ticker/price'), 4)
+        self.assertEqual(endpoint_weight('https://api.binance.com/api/v3/ticker/price', {'symbol': 'BTCUSDT'}), 2)
+
+    def test_backoff_delay_is_bounded(self):
+        # The jittered delay never exceeds the exponential cap
+        for attempt in range(10):
+            self.assertLessEqual(backoff_delay(attempt, 1.0, 8.0), min(8.0, 2 ** attempt))
+
+    def test_acquire_waits_when_bucket_is_empty(self):
+        # Spending more than the bucket holds sleeps until enough weight is refilled
+        limiter = WeightRateLimiter(capacity=60, period=60.0)
+        limiter.acquire(60)
+        with patch('find_coins.RateLimiter.time.sleep') as sleep:
+            sleep.side_effect = lambda seconds: setattr(limiter, '_tokens', limiter.capacity)
+            limiter.acquire(10)
+        self.assertAlmostEqual(sleep.call_args.args[0], 10, delta=0.1)
+
+    def test_update_from_headers(self):
+        # The used weight reported by the server caps the local bucket
+        limiter = WeightRateLimiter(capacity=1200)
+        limiter.update_from_headers({'X-MBX-USED-WEIGHT-1M': '1150'})
+        self.assertLessEqual(limiter._tokens, 50.1)
+
+    def test_penalize_honours_retry_after(self):
+        # A ban blocks the bucket for at least the Retry-After time
+        limiter = WeightRateLimiter(capacity=1200)
+        delay = limiter.penalize({'Retry-After': '3'}, 0)
+        self.assertGreaterEqual(delay, 3)
+        self.assertGreater(limiter._reserve(1), 2.9)
+
+
+class TestRateLimitedClient(TestCase):
+    def setUp(self):
+        self.limiter = MagicMock()
+        self.limiter.penalize.return_value = 0
+        patcher = patch('binance.client.Client._request', return_value={})
+        self.request = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('find_coins.BinanceClient.time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = RateLimitedClient(rate_limiter=self.limiter)
+
+    def test_request_spends_endpoint_weight(self):
+        # Every request acquires the weight of its endpoint first
+        self.limiter.reset_mock()
+        self.client.get_exchange_info()
+        self.limiter.acquire.assert_called_once_with(20)
+
+    def test_request_retries_on_429(self):
+        # A 429 is retried after the limiter's backoff delay
+        self.request.side_effect = [api_exception(429, {'Retry-After': '1'}), [[1, '1', '1', '1', '1']]]
+        klines = self.client.get_klines(symbol='BTCUSDT', interval='1d', limit=1)
+        self.assertEqual(klines, [[1, '1', '1', '1', '1']])
+        self.limiter.penalize.assert_called_once_with({'Retry-After': '1'}, 0)
+        self.sleep.assert_called_once()
+
+    def test_request_does_not_retry_other_errors(self):
+        # Errors other than 429/418 are raised immediately
+        self.request.side_effect = api_exception(400)
+        with self.assertRaises(BinanceAPIException):
+            self.client.get_klines(symbol='BTCUSDT', interval='1d', limit=1)
+        self.limiter.penalize.assert_not_called()
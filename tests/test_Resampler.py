@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from find_coins.Klines import Klines
+from find_coins.KlineStore import KlineStore
+from find_coins.Resampler import resample, can_resample, bucket_start, IncrementalResampler, HOUR, DAY
+
+# Monday 2021-08-30 00:00 UTC
+MONDAY = 1630281600000
+
+
+def make_klines(start, count, step=HOUR, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    open = np.r_[100, close[:-1]]
+    return [
+        [start + i * step, str(open[i]), str(max(open[i], close[i]) + 0.5), str(min(open[i], close[i]) - 0.5), str(close[i]), str(10 + i), start + (i + 1) * step - 1]
+        for i in range(count)
+    ]
+
+
+class TestResampler(TestCase):
+    def test_can_resample(self):
+        self.assertTrue(can_resample('4h', '1h'))
+        self.assertTrue(can_resample('1w', '1h'))
+        self.assertFalse(can_resample('1h', '1h'))
+        self.assertFalse(can_resample('1h', '1d'))
+        self.assertFalse(can_resample('1M', '1h'))
+        # A week is not a whole number of 3d candles
+        self.assertFalse(can_resample('1w', '3d'))
+
+    def test_weeks_open_on_monday(self):
+        self.assertEqual(bucket_start(MONDAY + 3 * DAY + 5 * HOUR, '1w'), MONDAY)
+        self.assertEqual(bucket_start(MONDAY - 1, '1w'), MONDAY - 7 * DAY)
+
+    def test_resample_matches_a_direct_aggregation(self):
+        raw = make_klines(MONDAY, 24 * 9)
+        hourly = Klines.from_raw(raw, MONDAY)
+        daily = resample(hourly, '1d')
+        self.assertEqual(len(daily), 9)
+        for day in range(9):
+            rows = raw[day * 24:(day + 1) * 24]
+            record = daily[day]
+            self.assertEqual(record['open_time'], MONDAY + day * DAY)
+            self.assertEqual(record['close_time'], MONDAY + (day + 1) * DAY - 1)
+            self.assertEqual(record['open'], float(rows[0][1]))
+            self.assertEqual(record['high'], max(float(row[2]) for row in rows))
+            self.assertEqual(record['low'], min(float(row[3]) for row in rows))
+            self.assertEqual(record['close'], float(rows[-1][4]))
+            self.assertEqual(record['volume'], sum(float(row[5]) for row in rows))
+        weekly = resample(hourly, '1w')
+        self.assertEqual(weekly.open_time.tolist(), [MONDAY, MONDAY + 7 * DAY])
+
+    def test_resample_drops_a_candle_cut_by_the_start(self):
+        # The series starts at 02:00, so the first 4h candle is missing two hours and is dropped
+        hourly = Klines.from_raw(make_klines(MONDAY + 2 * HOUR, 10), MONDAY + 2 * HOUR)
+        self.assertEqual(resample(hourly, '4h').open_time.tolist(), [MONDAY + 4 * HOUR, MONDAY + 8 * HOUR])
+        # A listing after the start keeps its first, partial candle like Binance does
+        listed = Klines.from_raw(make_klines(MONDAY + 2 * HOUR, 10), 0)
+        self.assertEqual(resample(listed, '4h').open_time[0], MONDAY)
+        # Synced from 05:00 and listed at 08:00, the first day is the listing day
+        late = Klines.from_raw(make_klines(MONDAY + 8 * HOUR, 30), MONDAY + 5 * HOUR)
+        daily = resample(late, '1d')
+        self.assertEqual(daily.open_time[0], MONDAY)
+        self.assertEqual(daily.open[0], late.open[0])
+        self.assertEqual(len(resample(Klines.empty(0), '1d')), 0)
+
+    def test_incremental_matches_vectorized(self):
+        raw = make_klines(MONDAY, 24 * 3 + 5)
+        expected = resample(Klines.from_raw(raw, MONDAY), '1d')
+        resampler = IncrementalResampler('1d')
+        finished = []
+        for kline in raw:
+            # Each hourly candle is first seen while forming, then final
+            forming = [kline[0], kline[1], kline[1], kline[1], kline[1], '1']
+            for update in (forming, kline):
+                candle = resampler.update(update)
+                if candle is not None:
+                    finished.append(candle)
+        candles = finished + [resampler.current]
+        self.assertEqual(len(candles), len(expected))
+        for candle, record in zip(candles, expected.data):
+            self.assertEqual(candle.tolist(), record.tolist())
+
+
+class TestKlineStoreResampling(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = KlineStore(self.root, base_interval='1h')
+        self.client = MagicMock()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_coarser_intervals_are_served_from_the_base_series(self):
+        self.client.get_historical_klines.return_value = make_klines(MONDAY, 48)
+        hourly = self.store.sync(self.client, 'BTCUSDT', '1h', MONDAY)
+        self.client.get_historical_klines.reset_mock()
+
+        daily = self.store.load('BTCUSDT', '1d')
+        self.assertEqual(daily.open_time.tolist(), [MONDAY, MONDAY + DAY])
+        self.assertEqual(daily.close[-1], hourly.close[-1])
+        four_hourly = self.store.load('BTCUSDT', '4h')
+        self.assertEqual(len(four_hourly), 12)
+        self.client.get_historical_klines.assert_not_called()
+
+    def test_sync_of_a_coarser_interval_only_syncs_the_base(self):
+        self.client.get_historical_klines.return_value = make_klines(MONDAY, 48)
+        daily = self.store.sync(self.client, 'BTCUSDT', '1d', MONDAY + DAY)
+        self.client.get_historical_klines.assert_called_once_with('BTCUSDT', '1h', MONDAY + DAY)
+        self.assertEqual(daily.open_time.tolist(), [MONDAY + DAY])
+
+    def test_stored_series_take_precedence(self):
+        # A daily series stored on its own is not replaced by a resampled one
+        self.store.append('BTCUSDT', '1d', make_klines(MONDAY, 1, step=DAY, seed=1), 0)
+        self.store.append('BTCUSDT', '1h', make_klines(MONDAY, 24), 0)
+        self.assertEqual(self.store.load('BTCUSDT', '1d').close[0], float(make_klines(MONDAY, 1, step=DAY, seed=1)[0][4]))
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from find_coins.KlineStore import KlineStore
+from find_coins.Scanner import Scanner, YEAR
+
+HOUR = 3600000
+START = 1630000000000
+
+
+def make_klines(closes, start=START, volume=10.0):
+    klines, previous = [], closes[0]
+    for i, close in enumerate(closes):
+        open_time = start + i * HOUR
+        klines.append([open_time, str(previous), str(max(previous, close) * 1.01), str(min(previous, close) * 0.99), str(close), str(volume), open_time + HOUR - 1])
+        previous = close
+    return klines
+
+
+class TestScanner(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = KlineStore(self.root, base_interval='1h')
+        self.closes = {
+            'UPUSDT': [1.0, 1.5, 2.0, 3.0],
+            'DIPUSDT': [10.0, 5.0, 8.0, 12.0],
+            'FLATUSDT': [100.0, 100.0, 100.0, 100.0],
+        }
+        for symbol, closes in self.closes.items():
+            self.store.append(symbol, '1h', make_klines(closes), START)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_metrics(self):
+        scanner = Scanner(self.store)
+        scanner.update(list(self.closes))
+        scan = {row['symbol']: row for row in scanner.metrics()}
+        self.assertAlmostEqual(scan['UPUSDT']['return_since_listing'], 2.0)
+        self.assertAlmostEqual(scan['DIPUSDT']['return_since_listing'], 0.2)
+        self.assertAlmostEqual(scan['DIPUSDT']['max_drawdown'], 0.5)
+        self.assertEqual(scan['FLATUSDT']['max_drawdown'], 0.0)
+        self.assertAlmostEqual(scan['UPUSDT']['listing_move'], 3.0 * 1.01 - 1)
+        log_returns = np.diff(np.log(self.closes['DIPUSDT']))
+        self.assertAlmostEqual(scan['DIPUSDT']['volatility'], log_returns.std() * np.sqrt(YEAR / HOUR))
+        self.assertEqual(scan['FLATUSDT']['volatility'], 0.0)
+        self.assertEqual(scan['FLATUSDT']['volume_rank'], 1)
+        self.assertEqual(scan['UPUSDT']['volume_rank'], 3)
+
+    def test_rank(self):
+        scanner = Scanner(self.store)
+        scanner.update(list(self.closes))
+        self.assertEqual(scanner.rank('return_since_listing'), ['UPUSDT', 'DIPUSDT', 'FLATUSDT'])
+        self.assertEqual(scanner.rank('max_drawdown'), ['UPUSDT', 'FLATUSDT', 'DIPUSDT'])
+        self.assertEqual(scanner.rank('volatility', ascending=False, limit=1), ['DIPUSDT'])
+        with self.assertRaises(ValueError):
+            scanner.rank('missing')
+
+    def test_incremental_update_matches_a_full_scan(self):
+        # Aggregates saved after part of the series are folded forward with only the new klines
+        partial = KlineStore(os.path.join(self.root, 'partial'), base_interval='1h')
+        closes = [10.0, 5.0, 8.0, 12.0, 6.0, 15.0]
+        partial.append('DIPUSDT', '1h', make_klines(closes[:3]), START)
+        Scanner(partial).update(['DIPUSDT'])
+        partial.append('DIPUSDT', '1h', make_klines(closes)[3:], START)
+        scanner = Scanner(partial)
+        scanner.update(['DIPUSDT'])
+
+        full = KlineStore(os.path.join(self.root, 'full'), base_interval='1h')
+        full.append('DIPUSDT', '1h', make_klines(closes), START)
+        expected = Scanner(full)
+        expected.update(['DIPUSDT'])
+        for name in scanner.metrics().dtype.names[1:]:
+            self.assertAlmostEqual(scanner.metrics()[name][0], expected.metrics()[name][0], msg=name)
+
+    def test_forming_klines_are_left_out(self):
+        now = int(time.time() * 1000) // HOUR * HOUR
+        store = KlineStore(os.path.join(self.root, 'live'), base_interval='1h')
+        store.append('LIVEUSDT', '1h', make_klines([1.0, 2.0, 4.0], start=now - 2 * HOUR), 0)
+        scanner = Scanner(store)
+        scanner.update(['LIVEUSDT', 'MISSINGUSDT'])
+        self.assertEqual(scanner.aggregates['last_open_time'][0], now - HOUR)
+        self.assertEqual(scanner.rank('return_since_listing'), ['LIVEUSDT'])
+
+    def test_update_syncs_with_a_client(self):
+        client = MagicMock()
+        client.get_historical_klines.return_value = make_klines([1.0, 2.0])
+        store = KlineStore(os.path.join(self.root, 'synced'), base_interval='1h')
+        scanner = Scanner(store)
+        scanner.update(['NEWUSDT'], client, START)
+        client.get_historical_klines.assert_called_once_with('NEWUSDT', '1h', START)
+        self.assertEqual(scanner.rank('return_since_listing'), ['NEWUSDT'])
+
+    def test_a_new_start_time_rebuilds_the_aggregates(self):
+        Scanner(self.store).update(['DIPUSDT'], start_time=START)
+        scanner = Scanner(self.store)
+        self.assertEqual(scanner.start, START)
+        scanner.update(['DIPUSDT'], start_time=START + 2 * HOUR)
+        scan = scanner.metrics()
+        self.assertAlmostEqual(scan['return_since_listing'][0], 12.0 / 8.0 - 1)
+        self.assertEqual(scan['max_drawdown'][0], 0.0)
+        self.assertEqual(Scanner(self.store).start, START + 2 * HOUR)
@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from find_coins.SymbolStore import SymbolStore
+
+
+class TestSymbolStore(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = SymbolStore(os.path.join(self.root, 'symbols.db'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.root)
+
+    def test_append_keeps_date_order_and_fetch_order(self):
+        # Batches are read back ordered by date, while fetched symbols keep their insertion order
+        self.store.append([(("XRPUSDT", "XRP", "USDT"), datetime(2022, 1, 3), 0.5, 0.6, 0.4, 0.55)])
+        self.store.append([
+            (("ETHUSDT", "ETH", "USDT"), datetime(2022, 1, 2), 3000, 3100, 2900, 3050),
+            (("BTCUSDT", "BTC", "USDT"), datetime(2022, 1, 1), 40000, 41000, 39000, 40500),
+        ])
+        self.assertEqual([row['symbol'] for row in self.store.listings()], ["BTC/USDT", "ETH/USDT", "XRP/USDT"])
+        self.assertEqual(self.store.fetched_symbols(), ["XRPUSDT", "ETHUSDT", "BTCUSDT"])
+        self.assertEqual(self.store.listings()[0], {
+            "symbol": "BTC/USDT", "date": "2022-01-01T00:00:00", "open": 40000, "high": 41000, "low": 39000, "close": 40500
+        })
+
+    def test_append_ignores_duplicates(self):
+        # A symbol fetched twice keeps its first entry
+        self.store.append([(("BTCUSDT", "BTC", "USDT"), datetime(2022, 1, 1), 1, 1, 1, 1)])
+        self.store.append([(("BTCUSDT", "BTC", "USDT"), datetime(2022, 1, 5), 2, 2, 2, 2)])
+        self.assertEqual(self.store.fetched_symbols(), ["BTCUSDT"])
+        self.assertEqual([row['open'] for row in self.store.listings()], [1])
+
+    def test_listings_range(self):
+        # Range reads include start and stop before end
+        self.store.append([
+            ((symbol, symbol[:3], "USDT"), datetime(2022, 1, day), 1, 1, 1, 1)
+            for day, symbol in enumerate(["BTCUSDT", "ETHUSDT", "XRPUSDT"], start=1)
+        ])
+        rows = self.store.listings(start="2022-01-02", end="2022-01-03")
+        self.assertEqual([row['symbol'] for row in rows], ["ETH/USDT"])
+
+    def test_import_and_export_json(self):
+        # The legacy JSON files round-trip through the store
+        symbols_path = os.path.join(self.root, 'symbols.json')
+        fetched_symbols_path = os.path.join(self.root, 'fetched_symbols.json')
+        symbols = [{"symbol": "BTC/USDT", "date": "2022-01-01T00:00:00", "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5}]
+        with open(symbols_path, 'w') as f:
+            json.dump(symbols, f)
+        with open(fetched_symbols_path, 'w') as f:
+            json.dump(["BTCUSDT"], f)
+        self.assertTrue(self.store.is_empty())
+        self.store.import_json(symbols_path, fetched_symbols_path)
+        self.assertFalse(self.store.is_empty())
+        os.remove(symbols_path)
+        os.remove(fetched_symbols_path)
+        self.store.export_json(symbols_path, fetched_symbols_path)
+        with open(symbols_path) as f:
+            self.assertEqual(json.load(f), symbols)
+        with open(fetched_symbols_path) as f:
+            self.assertEqual(json.load(f), ["BTCUSDT"])
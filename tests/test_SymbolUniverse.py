@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from find_coins.SymbolUniverse import SymbolUniverse, compact
+
+
+def symbol_info(symbol, quote='USDT', status='TRADING', permissions=None, permission_sets=None, min_notional=None):
+    filters = [{'filterType': 'PRICE_FILTER', 'minPrice': '0.01'}]
+    if min_notional is not None:
+        filters.append({'filterType': 'NOTIONAL', 'minNotional': str(min_notional), 'applyMinToMarket': True})
+    return {
+        'symbol': symbol, 'status': status, 'baseAsset': symbol[:-len(quote)], 'quoteAsset': quote,
+        'permissions': permissions if permissions is not None else [],
+        'permissionSets': permission_sets if permission_sets is not None else [['SPOT', 'MARGIN']],
+        'filters': filters,
+    }
+
+
+EXCHANGE_INFO = {'symbols': [
+    symbol_info('BTCUSDT', min_notional=5),
+    symbol_info('ETHBTC', quote='BTC', min_notional=0.0001),
+    symbol_info('OLDUSDT', status='BREAK'),
+    symbol_info('BIGUSDT', min_notional=5000),
+    symbol_info('LEGACYUSDT', permissions=['SPOT'], permission_sets=[]),
+    symbol_info('LEVUSDT', permission_sets=[['LEVERAGED']]),
+]}
+
+
+class TestSymbolUniverse(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'universe.json')
+        self.client = MagicMock()
+        self.client.get_exchange_info.return_value = EXCHANGE_INFO
+        self.universe = SymbolUniverse(self.path, ttl=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def symbols(self, **filters):
+        return [symbol for symbol, base, quote in self.universe.query(self.client, **filters)]
+
+    def test_compact_reads_permission_sets_and_notional(self):
+        record = compact(symbol_info('BTCUSDT', permissions=['SPOT'], permission_sets=[['MARGIN']], min_notional=5))
+        self.assertEqual(record, {
+            'symbol': 'BTCUSDT', 'base': 'BTC', 'quote': 'USDT', 'status': 'TRADING',
+            'permissions': ['MARGIN', 'SPOT'], 'min_notional': 5.0,
+        })
+        self.assertIsNone(compact(symbol_info('ETHUSDT'))['min_notional'])
+
+    def test_filters(self):
+        self.assertEqual(self.symbols(statuses=[], quote_assets=[], permissions=[], max_min_notional=0),
+                         ['BTCUSDT', 'ETHBTC', 'OLDUSDT', 'BIGUSDT', 'LEGACYUSDT', 'LEVUSDT'])
+        self.assertNotIn('OLDUSDT', self.symbols(statuses=['TRADING']))
+        self.assertEqual(self.symbols(statuses=['BREAK']), ['OLDUSDT'])
+        self.assertNotIn('ETHBTC', self.symbols(quote_assets=['USDT']))
+        self.assertEqual(self.symbols(permissions=['SPOT'], statuses=['TRADING']),
+                         ['BTCUSDT', 'ETHBTC', 'BIGUSDT', 'LEGACYUSDT'])
+        self.assertNotIn('BIGUSDT', self.symbols(max_min_notional=100))
+        self.assertIn('LEGACYUSDT', self.symbols(max_min_notional=100))
+
+    def test_limit_applies_after_filtering(self):
+        self.assertEqual(self.symbols(statuses=['TRADING'], quote_assets=['USDT'], limit=2), ['BTCUSDT', 'BIGUSDT'])
+
+    def test_snapshot_is_cached_until_stale(self):
+        self.symbols()
+        # A new instance reads the fresh snapshot from disk instead of requesting it
+        SymbolUniverse(self.path, ttl=60).query(self.client)
+        self.client.get_exchange_info.assert_called_once()
+
+        stale = SymbolUniverse(self.path, ttl=0)
+        stale.query(self.client)
+        self.assertEqual(self.client.get_exchange_info.call_count, 2)
+
+    def test_without_path_the_snapshot_stays_in_memory(self):
+        universe = SymbolUniverse(None, ttl=60)
+        universe.query(self.client)
+        universe.query(self.client)
+        self.client.get_exchange_info.assert_called_once()
+        self.assertEqual(os.listdir(self.root), [])
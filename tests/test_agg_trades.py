@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from simulation.agg_trades import archive_files, read_chunks, parse_chunk, iter_agg_trades
+from simulation.exit_strategies import TrailingStop
+from simulation.historical_trade_simulator import HistoricalTradeSimulator
+
+# 2021-08-01 and 2021-09-01 in milliseconds
+AUGUST = 1627776000000
+SEPTEMBER = 1630454400000
+
+
+def rows(trades, first_id=0):
+    return ''.join(
+        f"{first_id + index},{price},{quantity},{index},{index},{time},False,True\n"
+        for index, (time, price, quantity) in enumerate(trades)
+    )
+
+
+def write_archive(root, symbol, month, text, extension='zip'):
+    os.makedirs(os.path.join(root, symbol), exist_ok=True)
+    name = f"{symbol}-aggTrades-{month}"
+    path = os.path.join(root, symbol, f"{name}.{extension}")
+    if extension == 'zip':
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(f"{name}.csv", text)
+    else:
+        with open(path, 'w') as f:
+            f.write(text)
+    return path
+
+
+class TestAggTrades(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_parse_chunk_skips_header_and_converts_microseconds(self):
+        chunk = (b"agg_trade_id,price,quantity,first_trade_id,last_trade_id,transact_time,is_buyer_maker,is_best_match\n"
+                 + rows([(AUGUST, 1.5, 2.0), (AUGUST * 1000 + 1500, 1.25, 0.5)]).encode())
+        trades = parse_chunk(chunk)
+        self.assertEqual(trades['time'].tolist(), [AUGUST, AUGUST + 1])
+        self.assertEqual(trades['price'].tolist(), [1.5, 1.25])
+        self.assertEqual(trades['quantity'].tolist(), [2.0, 0.5])
+        self.assertEqual(len(parse_chunk(b'')), 0)
+
+    def test_chunks_end_on_line_breaks(self):
+        text = rows([(AUGUST + index, 100 + index, 1) for index in range(200)])
+        for extension in ('zip', 'csv'):
+            path = write_archive(self.root, 'BTCUSDT', '2021-08', text, extension)
+            chunks = list(read_chunks(path, chunk_size=100))
+            self.assertGreater(len(chunks), 10)
+            self.assertTrue(all(chunk.endswith(b'\n') for chunk in chunks))
+            self.assertEqual(b''.join(chunks).decode(), text)
+
+    def test_archive_files_in_month_order_within_range(self):
+        write_archive(self.root, 'BTCUSDT', '2021-09', '')
+        write_archive(self.root, 'BTCUSDT', '2021-07', '')
+        august = write_archive(self.root, 'BTCUSDT', '2021-08', '')
+        extracted = write_archive(self.root, 'BTCUSDT', '2021-08', '', 'csv')
+        write_archive(self.root, 'ETHUSDT', '2021-08', '')
+        files = [os.path.basename(path) for path in archive_files(self.root, 'BTCUSDT', AUGUST + 1)]
+        self.assertEqual(files, ['BTCUSDT-aggTrades-2021-08.csv', 'BTCUSDT-aggTrades-2021-09.zip'])
+        self.assertEqual(archive_files(self.root, 'BTCUSDT', AUGUST, SEPTEMBER), [extracted])
+        os.remove(extracted)
+        self.assertEqual(archive_files(self.root, 'BTCUSDT', AUGUST, SEPTEMBER), [august])
+        self.assertEqual(archive_files(self.root, 'XRPUSDT'), [])
+
+    def test_iter_agg_trades_streams_the_range_across_months(self):
+        write_archive(self.root, 'BTCUSDT', '2021-08', rows([(SEPTEMBER - 300 + index, index, 1) for index in range(300)]))
+        write_archive(self.root, 'BTCUSDT', '2021-09', rows([(SEPTEMBER + index, 300 + index, 1) for index in range(300)]))
+        chunks = list(iter_agg_trades(self.root, 'BTCUSDT', SEPTEMBER - 100, SEPTEMBER + 50, chunk_size=256))
+        self.assertGreater(len(chunks), 2)
+        prices = np.concatenate([chunk['price'] for chunk in chunks])
+        self.assertEqual(prices.tolist(), list(range(200, 350)))
+
+
+class TestHistoricalAggTradeSimulator(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.logger = MagicMock()
+        # Within one hour the price touches 3 and falls back, which hourly closes never show
+        write_archive(self.root, 'NEWUSDT', '2021-08', rows([
+            (AUGUST, 1.0, 5), (AUGUST + 60000, 2.0, 1), (AUGUST + 120000, 3.0, 1), (AUGUST + 180000, 1.5, 2),
+        ]))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def simulator(self, target_price, exit_strategy=None):
+        return HistoricalTradeSimulator(MagicMock(), self.logger, 'NEWUSDT', AUGUST, 100, target_price, exit_strategy=exit_strategy, trades_root=self.root)
+
+    async def test_sells_at_the_trade_that_reaches_the_target(self):
+        await self.simulator(250).simulate_trade()
+        self.logger.info.assert_called_with(f"Simulated selling 100.0 NEWUSDT at 3.0 on {datetime.fromtimestamp((AUGUST + 120000) / 1000)}...")
+
+    async def test_target_not_reached_continues_with_the_last_trade(self):
+        new_amount_usd = await self.simulator(1000).simulate_trade()
+        self.logger.info.assert_called_with("Target price not reached in historical data, continuing with real-time data...")
+        self.assertEqual(new_amount_usd, 150.0)
+
+    async def test_exit_strategy(self):
+        await self.simulator(1000, TrailingStop(0.4)).simulate_trade()
+        self.logger.info.assert_called_with(f"Simulated selling 100.0 NEWUSDT at 1.5 on {datetime.fromtimestamp((AUGUST + 180000) / 1000)} (trailing_stop)...")
+
+    async def test_symbols_without_archives_use_klines(self):
+        client = MagicMock()
+        client.get_historical_klines.return_value = []
+        simulator = HistoricalTradeSimulator(client, self.logger, 'OLDUSDT', AUGUST, 100, 1000, trades_root=self.root)
+        await simulator.simulate_trade()
+        client.get_historical_klines.assert_called_once()
+        self.logger.error.assert_called_with("The coin OLDUSDT did not exist at the given start time.")
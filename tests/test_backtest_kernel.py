@@ -0,0 +1,54 @@
+from datetime import datetime
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from find_coins.Klines import Klines
+from simulation.backtest_kernel import first_index, first_target_index
+from simulation.historical_trade_simulator import HistoricalTradeSimulator
+
+KLINES = [
+    [1630000000000, "40000", "41000", "39000", "40500", "10", 1630003599999],
+    [1630003600000, "40500", "41500", "40000", "41000", "10", 1630007199999],
+    [1630007200000, "41000", "42000", "38000", "41500", "10", 1630010799999],
+    [1630010800000, "41500", "43000", "41000", "42000", "10", 1630014399999],
+    [1630014400000, "42000", "43000", "41500", "42500", "10", 1630017999999],
+]
+
+
+class TestBacktestKernel(TestCase):
+    def setUp(self):
+        self.klines = Klines.from_raw(KLINES)
+        self.quantity = 1000 / 40000
+
+    def test_first_target_index_matches_loop(self):
+        # The vectorized search finds the same candle as a loop over closes
+        for target in (1010, 1037.5, 1050, 1062.5, 1063):
+            expected = next((i for i, kline in enumerate(KLINES) if self.quantity * float(kline[4]) >= target), -1)
+            self.assertEqual(first_target_index(self.quantity, self.klines.close, target), expected)
+
+    def test_first_index(self):
+        # The first True value, or -1 for no match or an empty mask
+        self.assertEqual(first_index(np.array([False, True, True])), 1)
+        self.assertEqual(first_index(np.array([False, False])), -1)
+        self.assertEqual(first_index(np.array([], dtype=bool)), -1)
+
+
+class TestHistoricalTradeSimulatorKernel(IsolatedAsyncioTestCase):
+    async def test_simulate_trade_intra_candle(self):
+        # With intra-candle checks the sale happens at the target on the first touching candle
+        client = MagicMock()
+        logger = MagicMock()
+        client.get_historical_klines.return_value = KLINES
+        simulator = HistoricalTradeSimulator(client, logger, "BTCUSDT", 1630000000000, 1000, 1075, intra_candle=True)
+        await simulator.simulate_trade()
+        logger.info.assert_called_with(f"Simulated selling 0.025 BTCUSDT at 43000.0 on {datetime.fromtimestamp(1630010800)}...")
+
+    async def test_simulate_trade_not_reached(self):
+        # The position value at the last close is carried into real-time simulation
+        client = MagicMock()
+        logger = MagicMock()
+        client.get_historical_klines.return_value = KLINES
+        simulator = HistoricalTradeSimulator(client, logger, "BTCUSDT", 1630000000000, 1000, 2000)
+        self.assertEqual(await simulator.simulate_trade(), 1062.5)
@@ -0,0 +1,34 @@
+import logging
+from unittest import TestCase
+
+from config_logs.logger import setup_logger
+
+from benchmarks.runner import run_suite, compare, BENCHMARKS
+
+
+class TestBenchmarks(TestCase):
+    def test_suite_runs_at_smallest_scale(self):
+        # Every benchmark runs once at scale 10 against the fake server and is recorded
+        document = run_suite(scales=[10], repeat=1)
+        self.assertEqual({result['name'] for result in document['results']}, set(BENCHMARKS))
+        for result in document['results']:
+            self.assertEqual(result['scale'], 10)
+            self.assertGreater(result['min_ns'], 0)
+        self.assertIn('json_backend', document['meta'])
+
+    def test_suite_restores_the_log_level(self):
+        # Logging is quietened only while the benchmarks run
+        logger = setup_logger()
+        level = logger.level
+        logger.setLevel(logging.DEBUG)
+        try:
+            run_suite(names=['no such benchmark'])
+            self.assertEqual(logger.level, logging.DEBUG)
+        finally:
+            logger.setLevel(level)
+
+    def test_compare_flags_regressions(self):
+        # Only slowdowns past the threshold are reported
+        baseline = {'results': [{'name': 'a', 'scale': 10, 'min_ns': 100}, {'name': 'b', 'scale': 10, 'min_ns': 100}]}
+        current = {'results': [{'name': 'a', 'scale': 10, 'min_ns': 150}, {'name': 'b', 'scale': 10, 'min_ns': 110}, {'name': 'c', 'scale': 10, 'min_ns': 1}]}
+        self.assertEqual(compare(current, baseline, 0.2), [('a', 10, 1.5)])
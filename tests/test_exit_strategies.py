@@ -0,0 +1,103 @@
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from simulation.exit_strategies import (
+    TargetValue, TakeProfit, StopLoss, TrailingStop, TimeExit, MovingAverageCross, AnyExit, ExitStrategy, parse_exit_strategy,
+)
+from simulation.real_time_trade_simulator import RealTimeTradeSimulator
+
+HOUR = 3600000
+
+
+def streaming_exit(strategy, times, prices):
+    for index, (time, price) in enumerate(zip(times, prices)):
+        reason = strategy.update(time, price)
+        if reason is not None:
+            return index, reason
+    return -1, None
+
+
+def make_strategies():
+    return [
+        TargetValue(105), TakeProfit(1.04), StopLoss(0.1), TrailingStop(0.05), TimeExit(50 * HOUR),
+        MovingAverageCross(3, 8), AnyExit([TakeProfit(1.3), TrailingStop(0.08)]),
+    ]
+
+
+class TestExitStrategies(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 200)))
+        self.times = np.arange(len(self.prices)) * HOUR
+
+    def test_streaming_matches_vectorized(self):
+        # Tick-by-tick updates and the NumPy scan exit at the same price for the same reason
+        for streamed, scanned in zip(make_strategies(), make_strategies()):
+            streamed.start(100, 1, 0)
+            scanned.start(100, 1, 0)
+            self.assertEqual(streaming_exit(streamed, self.times, self.prices), scanned.first_exit(self.times, self.prices), type(streamed).__name__)
+
+    def test_live_continues_historical_state(self):
+        # A scan without an exit leaves the state where tick-by-tick updates would have left it
+        for streamed, resumed in zip(make_strategies(), make_strategies()):
+            streamed.start(100, 1, 0)
+            resumed.start(100, 1, 0)
+            expected = streaming_exit(streamed, self.times, self.prices)
+            # The historical part stops right before the exit, or halfway if there is none
+            split = expected[0] if expected[0] > 0 else len(self.prices) // 2
+            self.assertEqual(resumed.first_exit(self.times[:split], self.prices[:split]), (-1, None))
+            rest_index, reason = streaming_exit(resumed, self.times[split:], self.prices[split:])
+            self.assertEqual((split + rest_index if rest_index >= 0 else -1, reason), expected, type(resumed).__name__)
+
+    def test_trailing_stop(self):
+        # The stop follows the highest price since the buy
+        strategy = TrailingStop(0.1)
+        strategy.start(100, 1, 0)
+        self.assertEqual(strategy.first_exit([0, 1, 2, 3], [100, 150, 140, 134]), (3, 'trailing_stop'))
+
+    def test_moving_average_cross(self):
+        # The fast average crossing below the slow one exits once
+        strategy = MovingAverageCross(2, 4)
+        strategy.start(1, 1, 0)
+        prices = [1, 2, 3, 4, 5, 1, 1, 1]
+        self.assertEqual(streaming_exit(strategy, range(len(prices)), prices), (5, 'ma_cross'))
+
+    def test_incomplete_strategy_fails_on_instantiation(self):
+        class PriceOnly(ExitStrategy):
+            def update(self, time, price):
+                return None
+        with self.assertRaises(TypeError):
+            PriceOnly()
+
+    def test_any_exit_mask_combines_strategies(self):
+        strategy = AnyExit([TakeProfit(2), StopLoss(0.5)])
+        strategy.start(10.0, 1.0, 0)
+        prices = np.array([10.0, 4.0, 12.0, 25.0])
+        self.assertEqual(strategy.exit_mask(np.arange(4.0), prices).tolist(), [False, True, False, True])
+
+    def test_parse_exit_strategy(self):
+        # Entries are combined, and an empty spec keeps the fixed target rule
+        strategy = parse_exit_strategy('take_profit:2,ma_cross:5:20,target', 150)
+        self.assertIsInstance(strategy, AnyExit)
+        self.assertEqual([type(part) for part in strategy.strategies], [TakeProfit, MovingAverageCross, TargetValue])
+        self.assertEqual(strategy.strategies[2].target_value, 150)
+        self.assertIsInstance(parse_exit_strategy(None, 150), TargetValue)
+        with self.assertRaises(ValueError):
+            parse_exit_strategy('unknown:1')
+
+
+class TestRealTimeExitStrategy(IsolatedAsyncioTestCase):
+    async def test_stop_loss_on_live_messages(self):
+        # A live simulator sells when its strategy fires instead of waiting for the target
+        logger = MagicMock()
+        simulator = RealTimeTradeSimulator(MagicMock(), logger, 'BTCUSDT', 10 ** 9, 1000, hub=MagicMock(), exit_strategy=StopLoss(0.1))
+        simulator._done = MagicMock()
+        simulator._buy(100.0)
+        await simulator.process_message({'e': 'trade', 'E': 1, 'p': '95'})
+        simulator._done.set.assert_not_called()
+        await simulator.process_message({'e': 'trade', 'E': 2, 'p': '89'})
+        self.assertIn("at 89.0", logger.info.call_args.args[0])
+        self.assertIn("(stop_loss)", logger.info.call_args.args[0])
+        simulator._done.set.assert_called_once()
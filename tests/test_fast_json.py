@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from find_coins import fast_json
+from find_coins.BinanceClient import RateLimitedClient
+
+
+class TestFastJson(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'data.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_dump_and_load(self):
+        # Documents round-trip, NumPy scalars included
+        fast_json.dump([{"symbol": "BTC/USDT", "open": np.float64(1.5)}], self.path)
+        self.assertEqual(fast_json.load(self.path), [{"symbol": "BTC/USDT", "open": 1.5}])
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    def test_dumps_numpy_with_every_backend(self):
+        # NumPy scalars and arrays serialize the same whichever backend is installed
+        obj = {"close": np.float64(1.5), "volume": np.int64(3), "closes": np.array([1.0, 2.0])}
+        for backend in ('orjson', 'ujson', 'json'):
+            if getattr(fast_json, backend) is None:
+                continue
+            with patch.object(fast_json, 'BACKEND', backend):
+                self.assertEqual(json.loads(fast_json.dumps(obj)), {"close": 1.5, "volume": 3, "closes": [1.0, 2.0]}, msg=backend)
+        with self.assertRaises(TypeError):
+            fast_json.dumps(object())
+
+    def test_iter_array_across_chunks(self):
+        # Items spanning chunk boundaries, numbers included, are decoded whole
+        items = [{"symbol": f"S{i}", "price": 12345.678 + i, "tags": [i, None, True]} for i in range(200)] + [1234567890]
+        with open(self.path, 'w') as f:
+            json.dump(items, f, indent=2)
+        for chunk_size in (3, 17, 4096):
+            self.assertEqual(list(fast_json.iter_array(self.path, chunk_size)), items)
+
+    def test_iter_array_rejects_non_arrays(self):
+        # Only a top-level array can be streamed
+        with open(self.path, 'w') as f:
+            f.write('{"a": 1}')
+        with self.assertRaises(ValueError):
+            list(fast_json.iter_array(self.path))
+
+    def test_tail(self):
+        # The last entries are kept while the rest of the file is streamed past
+        with open(self.path, 'w') as f:
+            json.dump([f"SYM{i}USDT" for i in range(1000)], f)
+        self.assertEqual(fast_json.tail(self.path, 2), ["SYM998USDT", "SYM999USDT"])
+        self.assertEqual(len(fast_json.tail(self.path, None)), 1000)
+        self.assertEqual(fast_json.tail(self.path, 0), [])
+        self.assertEqual(fast_json.tail(os.path.join(self.root, 'missing.json'), 5), [])
+
+    def test_select_backend(self):
+        # 'auto' picks an installed backend and unknown backends are refused
+        self.assertIn(fast_json._select_backend('auto'), ('orjson', 'ujson', 'json'))
+        self.assertEqual(fast_json._select_backend('json'), 'json')
+        with self.assertRaises(ValueError):
+            fast_json._select_backend('missing')
+
+    def test_client_response_parsing(self):
+        # REST responses are decoded from the raw body
+        response = MagicMock(status_code=200, content=b'{"symbols": []}')
+        self.assertEqual(RateLimitedClient._handle_response(response), {"symbols": []})
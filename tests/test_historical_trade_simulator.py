@@ -24,11 +24,11 @@ class TestHistoricalTradeSimulator(TestCase):
     def test_simulate_trade_target_price_reached(self):
         # Simulate the case where the target price is reached
         klines = [
-            [1630000000000, "40000", "41000", "39000", "40500"],
-            [1630003600000, "40500", "41500", "40000", "41000"],
-            [1630007200000, "41000", "42000", "40500", "41500"],
-            [1630010800000, "41500", "42500", "41000", "42000"],
-            [1630014400000, "42000", "43000", "41500", "42500"],
+            [1630000000000, "40000", "41000", "39000", "40500", "10", 1630003599999],
+            [1630003600000, "40500", "41500", "40000", "41000", "10", 1630007199999],
+            [1630007200000, "41000", "42000", "40500", "41500", "10", 1630010799999],
+            [1630010800000, "41500", "42500", "41000", "42000", "10", 1630014399999],
+            [1630014400000, "42000", "43000", "41500", "42500", "10", 1630017999999],
         ]
         self.client.get_historical_klines.return_value = klines
         simulator = HistoricalTradeSimulator(self.client, self.logger, self.symbol, self.start_time, self.amount_usd, self.target_price)
@@ -38,11 +38,11 @@ class TestHistoricalTradeSimulator(TestCase):
     def test_simulate_trade_target_price_not_reached(self):
         # Simulate the case where the target price is not reached
         klines = [
-            [1630000000000, "40000", "41000", "39000", "40500"],
-            [1630003600000, "40500", "41500", "40000", "41000"],
-            [1630007200000, "41000", "42000", "40500", "41500"],
-            [1630010800000, "41500", "42500", "41000", "42000"],
-            [1630014400000, "42000", "43000", "41500", "42000"],
+            [1630000000000, "40000", "41000", "39000", "40500", "10", 1630003599999],
+            [1630003600000, "40500", "41500", "40000", "41000", "10", 1630007199999],
+            [1630007200000, "41000", "42000", "40500", "41500", "10", 1630010799999],
+            [1630010800000, "41500", "42500", "41000", "42000", "10", 1630014399999],
+            [1630014400000, "42000", "43000", "41500", "42000", "10", 1630017999999],
         ]
         self.client.get_historical_klines.return_value = klines
         simulator = HistoricalTradeSimulator(self.client, self.logger, self.symbol, self.start_time, self.amount_usd, self.target_price)
@@ -69,11 +69,11 @@ class TestHistoricalTradeSimulatorAsync(IsolatedAsyncioTestCase):
     async def test_simulate_trade_target_price_reached(self):
         # Simulate the case where the target price is reached
         klines = [
-            [1630000000000, "40000", "41000", "39000", "40500"],
-            [1630003600000, "40500", "41500", "40000", "41000"],
-            [1630007200000, "41000", "42000", "40500", "41500"],
-            [1630010800000, "41500", "42500", "41000", "42000"],
-            [1630014400000, "42000", "43000", "41500", "42500"],
+            [1630000000000, "40000", "41000", "39000", "40500", "10", 1630003599999],
+            [1630003600000, "40500", "41500", "40000", "41000", "10", 1630007199999],
+            [1630007200000, "41000", "42000", "40500", "41500", "10", 1630010799999],
+            [1630010800000, "41500", "42500", "41000", "42000", "10", 1630014399999],
+            [1630014400000, "42000", "43000", "41500", "42500", "10", 1630017999999],
         ]
         self.client.get_historical_klines.return_value = klines
         simulator = HistoricalTradeSimulator(self.client, self.logger, self.symbol, self.start_time, self.amount_usd, self.target_price)
@@ -83,11 +83,11 @@ class TestHistoricalTradeSimulatorAsync(IsolatedAsyncioTestCase):
     async def test_simulate_trade_target_price_not_reached(self):
         # Simulate the case where the target price is not reached
         klines = [
-            [1630000000000, "40000", "41000", "39000", "40500"],
-            [1630003600000, "40500", "41500", "40000", "41000"],
-            [1630007200000, "41000", "42000", "40500", "41500"],
-            [1630010800000, "41500", "42500", "41000", "42000"],
-            [1630014400000, "42000", "43000", "41500", "42000"],
+            [1630000000000, "40000", "41000", "39000", "40500", "10", 1630003599999],
+            [1630003600000, "40500", "41500", "40000", "41000", "10", 1630007199999],
+            [1630007200000, "41000", "42000", "40500", "41500", "10", 1630010799999],
+            [1630010800000, "41500", "42500", "41000", "42000", "10", 1630014399999],
+            [1630014400000, "42000", "43000", "41500", "42000", "10", 1630017999999],
         ]
         self.client.get_historical_klines.return_value = klines
         simulator = HistoricalTradeSimulator(self.client, self.logger, self.symbol, self.start_time, self.amount_usd, self.target_price)
@@ -0,0 +1,72 @@
+import json
+import logging
+import queue
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from config_logs.logger import setup_logger, DroppingQueueHandler, SamplingFilter, JsonFormatter, SAMPLED
+
+
+def make_record(level=logging.INFO, msg='message', lineno=1, created=1000.0, sampled=False):
+    record = logging.LogRecord('coin_searcher', level, 'module.py', lineno, msg, None, None)
+    record.created = created
+    if sampled:
+        record.__dict__.update(SAMPLED)
+    return record
+
+
+class TestLogger(TestCase):
+    def test_logger_only_enqueues(self):
+        # Records reach the writer thread through one queue handler; the others are pytest's capture handlers
+        handlers = setup_logger().handlers
+        self.assertEqual(len([handler for handler in handlers if isinstance(handler, DroppingQueueHandler)]), 1)
+        self.assertFalse(any(type(handler) is logging.StreamHandler for handler in handlers))
+
+    def test_full_queue_drops_low_levels_and_reports_them(self):
+        log_queue = queue.Queue(maxsize=2)
+        handler = DroppingQueueHandler(log_queue)
+        for msg in ('first', 'second', 'third'):
+            handler.handle(make_record(msg=msg))
+        self.assertEqual(handler.dropped, 1)
+
+        # The count is kept until there is room for the report as well
+        log_queue.get_nowait()
+        handler.handle(make_record(msg='fourth'))
+        self.assertEqual(handler.dropped, 1)
+        log_queue.get_nowait()
+        log_queue.get_nowait()
+        handler.handle(make_record(msg='fifth'))
+        self.assertEqual(handler.dropped, 0)
+        self.assertEqual(log_queue.get_nowait().getMessage(), 'fifth')
+        report = log_queue.get_nowait()
+        self.assertEqual((report.levelno, report.getMessage()), (logging.WARNING, 'Dropped 1 log records while the log queue was full'))
+
+    def test_warnings_wait_for_room(self):
+        log_queue = MagicMock()
+        log_queue.put_nowait.side_effect = queue.Full
+        handler = DroppingQueueHandler(log_queue)
+        handler.handle(make_record(level=logging.ERROR, msg='error'))
+        log_queue.put.assert_called_once()
+        self.assertEqual(handler.dropped, 0)
+
+    def test_sampling_filter(self):
+        # At most rate sampled records per second per call site, warnings always pass
+        sampler = SamplingFilter(2)
+        passed = [sampler.filter(make_record(created=1000.5, sampled=True)) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(sampler.filter(make_record(lineno=2, created=1000.5, sampled=True)))
+        self.assertTrue(sampler.filter(make_record(level=logging.ERROR, created=1000.5, sampled=True)))
+        record = make_record(msg='price', created=1001.0, sampled=True)
+        self.assertTrue(sampler.filter(record))
+        self.assertEqual(record.getMessage(), 'price (3 similar records suppressed)')
+        self.assertTrue(SamplingFilter(0).filter(make_record(sampled=True)))
+
+    def test_sampling_filter_never_drops_unmarked_records(self):
+        # Trade results and other lines that do not opt in are never sampled
+        sampler = SamplingFilter(1)
+        self.assertTrue(all(sampler.filter(make_record(created=1000.5)) for _ in range(5)))
+
+    def test_json_formatter(self):
+        line = JsonFormatter().format(make_record(level=logging.ERROR, msg='boom'))
+        entry = json.loads(line)
+        self.assertEqual((entry['level'], entry['message'], entry['logger']), ('ERROR', 'boom', 'coin_searcher'))
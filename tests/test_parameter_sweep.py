@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from find_coins.KlineStore import KlineStore
+from simulation import parameter_sweep
+from simulation.parameter_sweep import ParameterSweep
+
+HOUR = 3600000
+START = 1630000000000
+
+
+def make_klines(closes):
+    klines = []
+    for i, close in enumerate(closes):
+        open_price = closes[i - 1] if i else closes[0]
+        klines.append([START + i * HOUR, str(open_price), str(close), str(close), str(close), "1", START + (i + 1) * HOUR - 1])
+    return klines
+
+
+class TestParameterSweep(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        store = KlineStore(self.root)
+        store.append("AAAUSDT", "1h", make_klines([10, 11, 12, 15, 9]), 0)
+        store.append("BBBUSDT", "1h", make_klines([2, 2, 1, 1, 1]), 0)
+        self.sweep = ParameterSweep(KlineStore(self.root), processes=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_run_evaluates_every_combination(self):
+        # One row per coin, start time, amount, target and number of coins
+        results = self.sweep.run(["AAAUSDT", "BBBUSDT"], [START, START + HOUR], [100, 200], [120, 150, 1000], [1, 2])
+        self.assertEqual(len(results), 2 * 2 * 3 * (1 + 2))
+
+    def test_run_hit_and_time_to_target(self):
+        # Buying AAA at 10 for 100 USD reaches 120 at the close of 12 and 150 at the close of 15
+        results = self.sweep.run(["BBBUSDT", "AAAUSDT"], [START], [100], [120, 150, 1000], [1])
+        self.assertEqual(results['symbol'].tolist(), ["AAAUSDT"] * 3)
+        self.assertEqual(results['hit'].tolist(), [True, True, False])
+        self.assertEqual(results['time_to_target'].tolist(), [2 * HOUR, 3 * HOUR, -1])
+        self.assertEqual(results['final_value'].tolist(), [120.0, 150.0, 90.0])
+
+    def test_run_splits_amount_between_coins(self):
+        # With two coins each one gets half of the amount
+        results = self.sweep.run(["AAAUSDT", "BBBUSDT"], [START], [200], [100], [2])
+        by_symbol = {row['symbol']: row for row in results}
+        self.assertEqual(by_symbol["AAAUSDT"]['final_value'], 100.0)
+        self.assertEqual(by_symbol["BBBUSDT"]['final_value'], 100.0)
+        self.assertTrue(by_symbol["BBBUSDT"]['hit'])
+
+    def test_run_with_process_pool(self):
+        # The process pool gives the same table as the in-process run
+        expected = self.sweep.run(["AAAUSDT", "BBBUSDT"], [START], [100, 200], [120, 150], [2])
+        self.sweep.processes = 2
+        results = self.sweep.run(["AAAUSDT", "BBBUSDT"], [START], [100, 200], [120, 150], [2])
+        self.assertEqual(results.tolist(), expected.tolist())
+
+    def test_failed_in_process_run_releases_the_shared_arrays(self):
+        # An error while evaluating leaves no module-global view of the released block behind
+        with patch.object(parameter_sweep, '_sweep_coin', side_effect=ValueError('boom')):
+            with self.assertRaises(ValueError):
+                self.sweep.run(["AAAUSDT", "BBBUSDT"], [START], [100], [120], [1])
+        self.assertEqual(parameter_sweep._shared, {})
@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from find_coins.KlineStore import KlineStore
+from simulation.portfolio_backtest import PortfolioBacktest, align_series, forward_fill
+
+HOUR = 3600000
+START = 1630000000000
+
+
+def make_klines(closes, offset=0, first_open=None):
+    klines = []
+    for i, close in enumerate(closes):
+        open_price = closes[i - 1] if i else (first_open or closes[0])
+        open_time = START + (offset + i) * HOUR
+        klines.append([open_time, str(open_price), str(close), str(close), str(close), "1", open_time + HOUR - 1])
+    return klines
+
+
+class TestPortfolioBacktest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        store = KlineStore(self.root)
+        store.append("AAAUSDT", "1h", make_klines([10, 20, 20, 20]), 0)
+        # BBB is listed two hours later and falls
+        store.append("BBBUSDT", "1h", make_klines([3, 3], offset=2, first_open=5), 0)
+        self.backtest = PortfolioBacktest(KlineStore(self.root))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_align_and_forward_fill(self):
+        # Coins without a candle at a time hold NaN, and forward filling keeps leading NaN values
+        series = self.backtest.kline_store.load("AAAUSDT", "1h"), self.backtest.kline_store.load("BBBUSDT", "1h")
+        times, open_prices, closes = align_series(dict(zip(["AAAUSDT", "BBBUSDT"], series)), ["AAAUSDT", "BBBUSDT"])
+        self.assertEqual(len(times), 4)
+        self.assertTrue(np.isnan(closes[:2, 1]).all())
+        filled = forward_fill(np.array([[np.nan, 1.0], [2.0, np.nan], [np.nan, np.nan]]))
+        np.testing.assert_array_equal(filled[1:], [[2.0, 1.0], [2.0, 1.0]])
+        self.assertTrue(np.isnan(filled[0, 0]))
+
+    def test_shared_cash_is_reinvested(self):
+        # AAA gets half of the cash and doubles; BBB is bought later with all the cash left, proceeds included
+        equity, trades = self.backtest.run(["AAAUSDT", "BBBUSDT"], START, 100, 100)
+        by_symbol = {trade['symbol']: trade for trade in trades}
+        self.assertTrue(by_symbol["AAAUSDT"]['hit'])
+        self.assertEqual(by_symbol["AAAUSDT"]['sell_time'], START + HOUR)
+        self.assertEqual(by_symbol["AAAUSDT"]['final_value'], 100.0)
+        self.assertEqual(by_symbol["BBBUSDT"]['buy_time'], START + 2 * HOUR)
+        self.assertEqual(by_symbol["BBBUSDT"]['quantity'], 150.0 / 5)
+        self.assertFalse(by_symbol["BBBUSDT"]['hit'])
+        self.assertEqual(by_symbol["BBBUSDT"]['final_value'], 90.0)
+        self.assertEqual(equity['time'].tolist(), [START + i * HOUR for i in range(4)])
+        self.assertEqual(equity['cash'].tolist(), [50.0, 150.0, 0.0, 0.0])
+        self.assertEqual(equity['equity'].tolist(), [100.0, 150.0, 90.0, 90.0])
+
+    def test_missing_coins(self):
+        # Coins without stored klines are left out
+        equity, trades = self.backtest.run(["MISSING"], START, 100, 100)
+        self.assertEqual(len(equity), 0)
+        self.assertEqual(len(trades), 0)
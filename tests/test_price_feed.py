@@ -0,0 +1,45 @@
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+from config_logs.logger import SAMPLED
+
+from simulation.price_feed import extract_price, open_socket, PriceCoalescer
+from simulation.real_time_trade_simulator import RealTimeTradeSimulator
+
+
+class TestPriceFeed(TestCase):
+    def test_extract_price(self):
+        # Each feed mode reads its own price fields
+        self.assertEqual(extract_price('trade', {'e': 'trade', 'p': '1.5'}), (1.5, 1.5))
+        self.assertEqual(extract_price('aggTrade', {'e': 'aggTrade', 'p': '2.5'}), (2.5, 2.5))
+        self.assertEqual(extract_price('bookTicker', {'s': 'BTCUSDT', 'b': '3.5', 'a': '3.6'}), (3.5, 3.5))
+        self.assertEqual(extract_price('kline_1s', {'e': 'kline', 'k': {'c': '4.5', 'h': '4.8'}}), (4.5, 4.8))
+
+    def test_open_socket(self):
+        # The feed mode picks the socket type
+        bm = MagicMock()
+        open_socket(bm, 'bookTicker', 'BTCUSDT')
+        bm.symbol_book_ticker_socket.assert_called_once_with('BTCUSDT')
+        open_socket(bm, 'kline_1s', 'BTCUSDT')
+        bm.kline_socket.assert_called_once_with('BTCUSDT', interval='1s')
+
+    def test_coalescer(self):
+        # At most one price per interval is let through
+        coalescer = PriceCoalescer(1.0)
+        self.assertEqual([coalescer.update(price, now) for price, now in [(1, 0.0), (2, 0.5), (3, 0.9), (4, 1.1)]], [True, False, False, True])
+        self.assertTrue(all(PriceCoalescer(0).update(price) for price in range(3)))
+
+
+class TestRealTimeTradeSimulatorFeed(IsolatedAsyncioTestCase):
+    async def test_process_message_coalesces_logging(self):
+        # Prices inside a tick are not logged, but a target hit is never missed
+        logger = MagicMock()
+        simulator = RealTimeTradeSimulator(MagicMock(), logger, 'BTCUSDT', 1200, 1000, hub=MagicMock(), feed='bookTicker', tick_interval=60)
+        simulator.quantity = 1
+        simulator._done = MagicMock()
+        for bid in ['1000', '1001', '1002']:
+            await simulator.process_message({'s': 'BTCUSDT', 'b': bid, 'a': '1003'})
+        logger.info.assert_called_once_with("Current price of BTCUSDT: 1000.0", extra=SAMPLED)
+        await simulator.process_message({'s': 'BTCUSDT', 'b': '1200', 'a': '1201'})
+        self.assertIn("Simulating selling 1 BTCUSDT at 1200.0", logger.info.call_args.args[0])
+        simulator._done.set.assert_called_once()
@@ -0,0 +1,129 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, AsyncMock
+
+from simulation.real_time_trade_simulator import RealTimeTradeSimulator
+from simulation.stream_hub import StreamHub
+
+
+class FakeSocket:
+    def __init__(self, streams):
+        self.streams = streams
+        self.queue = asyncio.Queue()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def recv(self):
+        return await self.queue.get()
+
+
+class TestStreamHub(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.logger = MagicMock()
+        self.hub = StreamHub(MagicMock(tld='com', testnet=False), self.logger, streams_per_connection=2, connect_delay=0)
+        self.sockets = []
+
+        def multiplex_socket(streams):
+            socket = FakeSocket(streams)
+            self.sockets.append(socket)
+            return socket
+        self.hub.bm = MagicMock()
+        self.hub.bm.multiplex_socket.side_effect = multiplex_socket
+
+    async def asyncTearDown(self):
+        await self.hub.close()
+
+    async def test_symbols_are_sharded(self):
+        # Five symbols with two streams per connection need three connections
+        for symbol in ['AAAUSDT', 'BBBUSDT', 'CCCUSDT', 'DDDUSDT', 'EEEUSDT']:
+            self.hub.subscribe(symbol, AsyncMock())
+        await asyncio.sleep(0.01)
+        self.assertEqual([socket.streams for socket in self.sockets], [
+            ['aaausdt@trade', 'bbbusdt@trade'],
+            ['cccusdt@trade', 'dddusdt@trade'],
+            ['eeeusdt@trade'],
+        ])
+        self.assertEqual(self.hub.connection_count, 3)
+
+    async def test_dispatch_to_symbol_callbacks(self):
+        # Messages only reach the callbacks of their own symbol
+        first, second = AsyncMock(), AsyncMock()
+        self.hub.subscribe('AAAUSDT', first)
+        self.hub.subscribe('BBBUSDT', second)
+        await asyncio.sleep(0.01)
+        self.sockets[0].queue.put_nowait({'stream': 'bbbusdt@trade', 'data': {'e': 'trade', 'p': '1.5'}})
+        await asyncio.sleep(0.01)
+        first.assert_not_awaited()
+        second.assert_awaited_once_with({'e': 'trade', 'p': '1.5'})
+
+    async def test_connection_closes_without_subscribers(self):
+        # A connection ends once all of its symbols are unsubscribed
+        callback = AsyncMock()
+        self.hub.subscribe('AAAUSDT', callback)
+        await asyncio.sleep(0.01)
+        self.hub.unsubscribe('AAAUSDT', callback)
+        self.sockets[0].queue.put_nowait({'stream': 'aaausdt@trade', 'data': {'e': 'trade', 'p': '1'}})
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.hub.connection_count, 0)
+        callback.assert_not_awaited()
+
+    async def test_real_time_simulator_with_hub(self):
+        # The simulator finishes through the hub once the target is reached
+        client = MagicMock()
+        client.get_symbol_ticker.return_value = {'price': '40000'}
+        simulator = RealTimeTradeSimulator(client, self.logger, 'BTCUSDT', 50000, 1000, self.hub)
+        task = asyncio.create_task(simulator.simulate_trade())
+        await asyncio.sleep(0.05)
+        self.sockets[0].queue.put_nowait({'stream': 'btcusdt@trade', 'data': {'e': 'trade', 'p': '45000'}})
+        self.sockets[0].queue.put_nowait({'stream': 'btcusdt@trade', 'data': {'e': 'trade', 'p': '2000000'}})
+        await asyncio.wait_for(task, 1)
+        self.assertEqual(self.hub.connection_count, 0)
+
+    async def test_failing_callback_does_not_affect_other_subscribers(self):
+        failing, other = AsyncMock(side_effect=ValueError('boom')), AsyncMock()
+        self.hub.subscribe('AAAUSDT', failing)
+        self.hub.subscribe('AAAUSDT', other)
+        await asyncio.sleep(0.01)
+        self.sockets[0].queue.put_nowait({'stream': 'aaausdt@trade', 'data': {'e': 'trade', 'p': '1'}})
+        self.sockets[0].queue.put_nowait({'stream': 'aaausdt@trade', 'data': {'e': 'trade', 'p': '2'}})
+        await asyncio.sleep(0.01)
+        self.assertEqual(other.await_count, 2)
+        self.assertEqual(self.hub.connection_count, 1)
+        self.logger.error.assert_called_with("A subscriber of AAAUSDT failed on a message: boom")
+
+    async def test_idle_connection_closes_on_unsubscribe(self):
+        # No message has to arrive for the connection to end
+        callback = AsyncMock()
+        self.hub.subscribe('AAAUSDT', callback)
+        await asyncio.sleep(0.01)
+        self.hub.unsubscribe('AAAUSDT', callback)
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.hub.connection_count, 0)
+
+    async def test_failed_connection_is_reopened(self):
+        self.hub.reconnect_delay = 0
+        callback = AsyncMock()
+        self.hub.subscribe('AAAUSDT', callback)
+        await asyncio.sleep(0.01)
+        self.sockets[0].queue.put_nowait({'e': 'error', 'm': 'Max reconnect retries reached'})
+        await asyncio.sleep(0.01)
+        self.assertEqual(len(self.sockets), 2)
+        self.sockets[1].queue.put_nowait({'stream': 'aaausdt@trade', 'data': {'e': 'trade', 'p': '1'}})
+        await asyncio.sleep(0.01)
+        callback.assert_awaited_once_with({'e': 'trade', 'p': '1'})
+
+    async def test_subscribers_are_notified_when_reconnecting_fails(self):
+        # A hub-mode simulator finishes instead of waiting forever on a dead connection
+        self.hub.reconnect_delay = 0
+        self.hub.max_reconnects = 1
+        self.hub.bm.multiplex_socket.side_effect = OSError('unreachable')
+        client = MagicMock()
+        client.get_symbol_ticker.return_value = {'price': '40000'}
+        simulator = RealTimeTradeSimulator(client, self.logger, 'BTCUSDT', 50000, 1000, self.hub)
+        await asyncio.wait_for(simulator.simulate_trade(), 1)
+        self.logger.error.assert_called_with("Stream connection lost: unreachable")
+        self.assertEqual(self.hub.connection_count, 0)